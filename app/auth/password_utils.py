@@ -1,15 +1,106 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import settings
 
+_ROUNDS = int(settings.BCRYPT_ROUNDS)
 
-def hash_password(password: str) -> str:
+# min == max == default: hashes with any other cost factor "need update"
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=_ROUNDS,
+    bcrypt__min_rounds=_ROUNDS,
+    bcrypt__max_rounds=_ROUNDS,
+)
+
+# bcrypt is CPU bound; run it on a few dedicated threads so login bursts
+# cannot occupy every request worker.
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, int(settings.PASSWORD_HASH_WORKERS)),
+    thread_name_prefix="bcrypt",
+)
+_stats_lock = threading.Lock()
+_stats = {"pending": 0, "running": 0, "completed": 0, "rejected": 0}
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Too many hash/verify calls are already waiting for the executor."""
+
+
+def _prepare(password: str) -> str:
     if not password:
         raise ValueError("Password cannot be empty.")
     if len(password.encode("utf-8")) > 72:
         password = password[:72]
-    return pwd_context.hash(password)
+    return password
+
+
+def _submit(fn, *args) -> Future:
+    with _stats_lock:
+        if _stats["pending"] >= max(1, int(settings.PASSWORD_HASH_MAX_QUEUE)):
+            _stats["rejected"] += 1
+            raise PasswordHasherBusy("Password hashing queue is full")
+        _stats["pending"] += 1
+
+    def _task():
+        with _stats_lock:
+            _stats["pending"] -= 1
+            _stats["running"] += 1
+        try:
+            return fn(*args)
+        finally:
+            with _stats_lock:
+                _stats["running"] -= 1
+                _stats["completed"] += 1
+
+    return _executor.submit(_task)
+
+
+def _run(fn, *args):
+    return _submit(fn, *args).result()
+
+
+async def _run_async(fn, *args):
+    # awaited from async routes: no request worker is held while bcrypt runs
+    return await asyncio.wrap_future(_submit(fn, *args))
+
+
+def hash_password(password: str) -> str:
+    return _run(pwd_context.hash, _prepare(password))
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_async(pwd_context.hash, _prepare(password))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return _run(pwd_context.verify, plain_password, hashed_password)
+
+
+def verify_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password; when the stored hash uses another cost factor than
+    BCRYPT_ROUNDS, also return a fresh hash for the caller to store.
+    """
+    return _run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+async def verify_and_update_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Awaitable `verify_and_update` for async routes."""
+    return await _run_async(pwd_context.verify_and_update, plain_password, hashed_password)
+
+
+def hasher_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return {
+            "workers": _executor._max_workers,
+            "max_queue": int(settings.PASSWORD_HASH_MAX_QUEUE),
+            "bcrypt_rounds": _ROUNDS,
+            "queue_depth": _stats["pending"],
+            **{k: v for k, v in _stats.items() if k != "pending"},
+        }
@@ -0,0 +1,69 @@
+# app/auth/principal_cache.py
+from __future__ import annotations
+
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user_models import Admin, Landlord, ManagerUser, SuperAdmin, Tenant
+
+# (role, user_id, token id) -> auth context dict returned by get_current_user
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    name="principal",
+)
+
+_ROLE_BY_MODEL = {
+    Landlord: "landlord",
+    Tenant: "tenant",
+    Admin: "admin",
+    SuperAdmin: "super_admin",
+    ManagerUser: "manager",
+}
+
+
+def principal_key(role: str, user_id: Any, payload: Dict[str, Any]) -> Hashable:
+    # tokens issued before jti/iat were added fall back to exp
+    token_id = payload.get("jti") or payload.get("iat") or payload.get("exp")
+    return (str(role), int(user_id), str(token_id))
+
+
+def get_principal(key: Hashable) -> Optional[Dict[str, Any]]:
+    ctx = principal_cache.get(key)
+    return dict(ctx) if ctx is not None else None
+
+
+def put_principal(key: Hashable, ctx: Dict[str, Any]) -> None:
+    principal_cache.set(key, dict(ctx))
+
+
+def invalidate_principal(role: str, user_id: int) -> int:
+    """Drop every cached token of one user (deactivated, password changed, deleted)."""
+    role, user_id = str(role), int(user_id)
+    return principal_cache.invalidate_where(lambda k: k[0] == role and k[1] == user_id)
+
+
+# ---------- invalidation on committed user changes ----------
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed: Set[Tuple[str, int]] = session.info.setdefault("principal_changed", set())
+    for obj in (*session.dirty, *session.deleted):
+        role = _ROLE_BY_MODEL.get(type(obj))
+        if role is not None and getattr(obj, "id", None) is not None:
+            changed.add((role, int(obj.id)))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    for role, user_id in session.info.pop("principal_changed", ()):
+        invalidate_principal(role, user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_changed_users(session):
+    session.info.pop("principal_changed", None)
@@ -0,0 +1,130 @@
+# app/core/access_log.py
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, TextIO
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.access")
+logger.propagate = False
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = getattr(record, "access", None) or {"message": record.getMessage()}
+        return json.dumps(payload, default=str, separators=(",", ":"))
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks the request: when the queue is full the
+    record is dropped and counted instead.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the payload is already a plain dict; skip QueueHandler's message formatting
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # the writer thread is still draining, so wait for room rather than fail on a full queue
+        self.queue.put(self._sentinel)
+
+
+def configure_access_logging(stream: TextIO = sys.stdout) -> QueueListener:
+    """
+    (Re)attach the queue handler and start the background writer thread.
+    """
+    global _listener
+    stop_access_logging()
+
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonLineFormatter())
+
+    q: queue.Queue = queue.Queue(maxsize=max(1, int(settings.ACCESS_LOG_QUEUE_SIZE)))
+    for h in list(logger.handlers):
+        logger.removeHandler(h)
+    logger.addHandler(DroppingQueueHandler(q))
+    logger.setLevel(logging.INFO)
+
+    _listener = _Listener(q, handler)
+    _listener.start()
+    return _listener
+
+
+def stop_access_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_access_logging)
+
+
+def _should_log(status: int, duration_ms: float) -> bool:
+    if status >= 500 or duration_ms >= settings.ACCESS_LOG_SLOW_MS:
+        return True
+    rate = settings.ACCESS_LOG_SAMPLE_RATE
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def access_record(request, status: int, duration_ms: float) -> Dict[str, Any]:
+    route = request.scope.get("route")
+    claims = getattr(request.state, "claims", None) or {}
+    record: Dict[str, Any] = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "method": request.method,
+        "route": getattr(route, "path", None) or request.url.path,
+        "status": status,
+        "duration_ms": round(duration_ms, 2),
+        "role": claims.get("role"),
+    }
+    sql = getattr(request.state, "sql", None)
+    if sql is not None:
+        record["db_queries"] = sql.count
+        record["db_ms"] = round(sql.duration * 1000, 2)
+    return record
+
+
+async def access_log_middleware(request, call_next):
+    """
+    One JSON line per (sampled) request. Formatting and I/O happen on the
+    listener thread; the request only builds a dict and enqueues it.
+    """
+    if not settings.ACCESS_LOG_ENABLED:
+        return await call_next(request)
+
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        if _should_log(status, duration_ms):
+            logger.info("access", extra={"access": access_record(request, status, duration_ms)})
@@ -41,10 +41,33 @@ def _parse_origins(raw: Optional[str]) -> List[str]:
 class Settings(BaseSettings):
     # ─────────── DATABASE ───────────
     DATABASE_URL: str
+    DB_ECHO: bool = False  # log every statement (debugging only)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # server-side statement timeout (PostgreSQL only); 0 disables it
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # optional read replica for reports/dashboards; unset = everything on the primary
+    READ_REPLICA_URL: Optional[str] = None
+    # principals that wrote within this window, and any replica lagging more
+    # than it, read from the primary (read-your-writes)
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    # per-request query budget / N+1 detector: "off" | "warn" | "strict"
+    SQL_BUDGET_MODE: str = "warn"
+    SQL_QUERY_BUDGET: int = 50  # statements per request; 0 disables
+    SQL_REPEAT_THRESHOLD: int = 10  # same statement shape per request; 0 disables
 
     # ─────────── SECURITY ───────────
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
+    # bcrypt cost factor; existing hashes are upgraded on the next login
+    BCRYPT_ROUNDS: int = 12
+    # dedicated executor for hashing/verification (bounded, off the request workers);
+    # login/register await it, so queued calls beyond MAX_QUEUE get a 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
 
     # ─────────── OTP / PASSWORD RESET ───────────
     PASSWORD_RESET_OTP_EXPIRY_MINUTES: int = 10
@@ -79,6 +102,28 @@ class Settings(BaseSettings):
     DARAJA_INITIATOR_PASSWORD: Optional[str] = None
     DARAJA_SECURITY_CERT_PATH: Optional[str] = None
 
+    # HTTP client: pooled keep-alive connections, cached OAuth token, breaker
+    DARAJA_TOKEN_REFRESH_MARGIN_SECONDS: int = 60  # refresh this long before Daraja's expiry
+    DARAJA_HTTP_POOL_SIZE: int = 10
+    DARAJA_HTTP_RETRIES: int = 2
+    DARAJA_HTTP_BACKOFF_SECONDS: float = 0.3
+    DARAJA_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    DARAJA_BREAKER_FAILURES: int = 5  # consecutive failures that open the circuit
+    DARAJA_BREAKER_RESET_SECONDS: float = 30.0
+
+    # STK status reconciler for payments whose callback never arrived
+    STK_RECONCILE_INTERVAL_SECONDS: int = 300
+    STK_RECONCILE_MIN_AGE_SECONDS: int = 120  # give the real callback this long first
+    STK_RECONCILE_MAX_AGE_HOURS: int = 48
+    STK_RECONCILE_BATCH_SIZE: int = 200
+    STK_RECONCILE_CONCURRENCY: int = 4
+    STK_RECONCILE_RATE_PER_SECOND: float = 5.0  # Daraja query API is rate limited
+
+    # Paybill statement (CSV) reconciliation
+    STATEMENT_RECONCILE_BATCH_SIZE: int = 500  # statement lines matched per round of lookups
+    STATEMENT_RECONCILE_APPLY_CHUNK_SIZE: int = 100  # confirmed matches committed per transaction
+    STATEMENT_RECONCILE_PENDING_MATCH_DAYS: int = 7  # pending STK payment may predate the line by this much
+
     # ─────────── EMAIL CONFIG ───────────
     EMAIL_HOST: Optional[str] = None
     EMAIL_PORT: Optional[int] = None
@@ -89,6 +134,47 @@ class Settings(BaseSettings):
     # ─────────── CORS / FRONTEND ORIGINS ───────────
     FRONTEND_ORIGINS_RAW: Optional[str] = None
 
+    # ─────────── CACHING ───────────
+    # Admin dashboard overview snapshot; 0 disables the cache
+    ADMIN_OVERVIEW_CACHE_TTL_SECONDS: int = 15
+    # Authenticated principal (auth context) per token; 0 disables the cache
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAXSIZE: int = 10000
+    # Visible property-id set per manager/landlord principal
+    PROPERTY_ACCESS_CACHE_TTL_SECONDS: int = 60
+
+    # ─────────── REPORT JOBS ───────────
+    REPORT_JOB_WORKERS: int = 2
+    REPORT_JOB_RETENTION_HOURS: int = 24
+
+    # ─────────── WEBHOOK INBOX ───────────
+    # callbacks are stored and acknowledged, then processed by this pool
+    WEBHOOK_INBOX_WORKERS: int = 4  # 0 = only the scheduler drain picks events up
+    WEBHOOK_INBOX_MAX_ATTEMPTS: int = 8
+    WEBHOOK_INBOX_RETRY_BASE_SECONDS: int = 5  # doubled per attempt
+    WEBHOOK_INBOX_RETRY_MAX_SECONDS: int = 900
+    WEBHOOK_INBOX_LEASE_SECONDS: int = 300  # "processing" rows older than this are reclaimed
+    WEBHOOK_INBOX_POLL_SECONDS: int = 30
+    WEBHOOK_DEDUP_CACHE_SIZE: int = 10000  # recently seen callback ids answered from memory
+    WEBHOOK_DEDUP_CACHE_TTL_SECONDS: int = 3600
+
+    # ─────────── IDEMPOTENCY ───────────
+    # Idempotency-Key header on payment POSTs: stored response replayed on retry
+    IDEMPOTENCY_KEY_TTL_HOURS: int = 24
+    IDEMPOTENCY_IN_PROGRESS_SECONDS: int = 300  # reservation lease; a crashed request frees the key after this
+    IDEMPOTENCY_CACHE_SIZE: int = 2048
+
+    # ─────────── LOGGING ───────────
+    # JSON access log, written by a background thread via a bounded queue
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0  # 0..1 of ordinary requests
+    ACCESS_LOG_SLOW_MS: int = 1000  # slow and 5xx requests are always logged
+    ACCESS_LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped, not blocked on
+
+    # Prometheus text exposition on GET /metrics (per worker process)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None  # if set, scrapers must send "Authorization: Bearer <token>"
+
     # ─────────── GENERAL ───────────
     APP_NAME: str = "Property Manager"
     DEBUG: bool = True
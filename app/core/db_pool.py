@@ -0,0 +1,111 @@
+# app/core/db_pool.py
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.core.metrics import Histogram, registry
+
+
+class PoolMetrics:
+    """
+    Checkout counters for InstrumentedQueuePool. Module-level so the numbers
+    survive Pool.recreate() (which builds a fresh pool instance).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_latency: Histogram = registry.histogram(
+            "db_pool_checkout_seconds", "Pool checkout latency (queue wait, connect and pre-ping)."
+        ).labels()
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+            }
+        return {**counters, "checkout_latency_seconds": self.checkout_latency.snapshot()}
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout (queue wait + connect + pre-ping)
+    and counts waiters and timeouts.
+    """
+
+    def connect(self):
+        started = time.perf_counter()
+        with pool_metrics._lock:
+            pool_metrics.waiting += 1
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            with pool_metrics._lock:
+                pool_metrics.timeouts += 1
+            raise
+        finally:
+            with pool_metrics._lock:
+                pool_metrics.waiting -= 1
+        pool_metrics.checkout_latency.observe(time.perf_counter() - started)
+        with pool_metrics._lock:
+            pool_metrics.checkouts += 1
+        return conn
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    """
+    Current pool occupancy plus checkout metrics, for the admin metrics endpoint.
+    """
+    pool = engine.pool
+    out: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        out.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+        })
+    out.update(pool_metrics.snapshot())
+    return out
+
+
+_pool_engines: Dict[str, Engine] = {}
+
+
+def register_pool_gauges(engine: Engine, name: str = "primary") -> None:
+    """
+    Expose the engine's pool occupancy on /metrics, labelled by `name`
+    (primary / replica). Values are read at scrape time.
+    """
+    _pool_engines[name] = engine
+
+
+def _pool_occupancy() -> Dict[tuple, int]:
+    out = {}
+    for name, engine in _pool_engines.items():
+        status = pool_status(engine)
+        for state in ("size", "checked_in", "checked_out", "overflow"):
+            if state in status:
+                out[(name, state)] = status[state]
+    return out
+
+
+registry.gauge("db_pool_connections", "Connection pool occupancy by engine and state.", _pool_occupancy, ("engine", "state"))
+registry.gauge("db_pool_waiting", "Threads currently waiting for a pooled connection.", lambda: pool_metrics.waiting)
+registry.gauge("db_pool_checkouts_total", "Completed pool checkouts.", lambda: pool_metrics.checkouts, kind="counter")
+registry.gauge("db_pool_timeouts_total", "Pool checkouts that timed out.", lambda: pool_metrics.timeouts, kind="counter")
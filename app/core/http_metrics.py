@@ -0,0 +1,47 @@
+# app/core/http_metrics.py
+from __future__ import annotations
+
+import time
+
+from app.core.metrics import registry
+
+# keyed on the route template so /units/1 and /units/2 share one series
+http_requests_total = registry.counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template.",
+    ("method", "route"),
+)
+http_requests_in_progress = 0
+
+registry.gauge(
+    "http_requests_in_progress",
+    "Requests currently being handled by this process.",
+    lambda: http_requests_in_progress,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+async def http_metrics_middleware(request, call_next):
+    """
+    Per-route request counts and latency. Requests that match no route (404
+    scans and the like) are folded into one series to bound label cardinality.
+    """
+    global http_requests_in_progress
+    started = time.perf_counter()
+    status = 500
+    http_requests_in_progress += 1
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        http_requests_in_progress -= 1
+        route = getattr(request.scope.get("route"), "path", None) or UNMATCHED_ROUTE
+        http_request_duration_seconds.observe(time.perf_counter() - started, method=request.method, route=route)
+        http_requests_total.inc(method=request.method, route=route, status=status)
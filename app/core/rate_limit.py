@@ -0,0 +1,30 @@
+# app/core/rate_limit.py
+from __future__ import annotations
+
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Thread-safe pacing limiter: callers of `acquire()` are released at most
+    `rate_per_second` times per second, evenly spaced (no bursts), in call order.
+    """
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / float(rate_per_second) if rate_per_second > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until the caller may proceed; returns the time waited."""
+        if self.interval <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
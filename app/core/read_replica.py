@@ -0,0 +1,89 @@
+# app/core/read_replica.py
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, Hashable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# principal key -> True while that principal must read from the primary
+recent_writers = TTLCache(
+    maxsize=50000,
+    ttl_seconds=settings.READ_REPLICA_MAX_LAG_SECONDS,
+    name="replica_recent_writers",
+)
+# engine url -> measured replica lag in seconds (re-probed every few seconds)
+_lag_cache = TTLCache(maxsize=8, ttl_seconds=5, name="replica_lag")
+
+
+def principal_key(claims: Optional[Dict[str, Any]]) -> Optional[Hashable]:
+    if not claims or not claims.get("sub"):
+        return None
+    return (str(claims.get("role") or ""), str(claims.get("sub")))
+
+
+def record_write(claims: Optional[Dict[str, Any]]) -> None:
+    key = principal_key(claims)
+    if key is not None:
+        recent_writers.set(key, True)
+
+
+def wrote_recently(claims: Optional[Dict[str, Any]]) -> bool:
+    key = principal_key(claims)
+    return key is not None and recent_writers.get(key) is not None
+
+
+def replica_lag_seconds(engine: Engine) -> float:
+    """
+    Replay lag of a PostgreSQL standby (0 for other backends, where the
+    replica is assumed to be in sync; infinite when it is unreachable).
+    """
+    key = str(engine.url)
+    cached = _lag_cache.get(key)
+    if cached is not None:
+        return cached
+
+    lag = 0.0
+    if engine.dialect.name == "postgresql":
+        try:
+            with engine.connect() as conn:
+                value = conn.execute(text(
+                    "SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+                )).scalar()
+            lag = max(0.0, float(value or 0))
+        except Exception:
+            logger.warning("read replica unreachable; routing reads to the primary", exc_info=True)
+            lag = float("inf")
+
+    _lag_cache.set(key, lag)
+    return lag
+
+
+def use_replica(engine: Optional[Engine], claims: Optional[Dict[str, Any]]) -> bool:
+    """
+    Staleness guard: the replica serves a read only if it is configured, the
+    principal has not written within READ_REPLICA_MAX_LAG_SECONDS, and the
+    replica is not lagging more than that.
+    """
+    if engine is None or wrote_recently(claims):
+        return False
+    return replica_lag_seconds(engine) <= settings.READ_REPLICA_MAX_LAG_SECONDS
+
+
+async def pin_writers_to_primary(request, call_next):
+    """
+    HTTP middleware: after a successful write request, keep that principal
+    on the primary for the lag window so it sees its own changes.
+    """
+    response = await call_next(request)
+    if request.method in _WRITE_METHODS and response.status_code < 400:
+        record_write(getattr(request.state, "claims", None))
+    return response
@@ -0,0 +1,150 @@
+# app/core/sql_monitor.py
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.sql")
+
+_current: ContextVar[Optional["QueryStats"]] = ContextVar("sql_query_stats", default=None)
+
+_WS_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"\((?:\s*(?:\?|%\([^)]*\)s|%s|:\w+)\s*,)+\s*(?:\?|%\([^)]*\)s|%s|:\w+)\s*\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Statement with literals and expanded IN-lists collapsed, so the same
+    query issued with different parameters counts as one shape.
+    """
+    shape = _WS_RE.sub(" ", statement).strip()
+    shape = _STRING_RE.sub("?", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    return _IN_LIST_RE.sub("(?)", shape)
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in strict mode when a request exceeds its query budget."""
+
+
+class QueryStats:
+    """
+    Statements executed (and time spent in the DB) for one request.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.duration += elapsed
+        self.shapes[statement_shape(statement)] += 1
+
+    def problems(self, budget: int, repeat_threshold: int) -> List[str]:
+        out: List[str] = []
+        if budget > 0 and self.count > budget:
+            out.append(f"{self.count} queries (budget {budget})")
+        if repeat_threshold > 0:
+            for shape, n in self.shapes.most_common():
+                if n <= repeat_threshold:
+                    break
+                out.append(f"{n}x same statement (possible N+1): {shape[:200]}")
+        return out
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries", '
+            f"app;dur={total_seconds * 1000:.1f}"
+        )
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    Count statements executed in this context (request, job or test).
+    """
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def check_budget(stats: QueryStats, label: str) -> List[str]:
+    """
+    Apply SQL_QUERY_BUDGET / SQL_REPEAT_THRESHOLD: log in "warn" mode,
+    raise QueryBudgetExceeded in "strict" mode. Returns the problems found.
+    """
+    mode = (settings.SQL_BUDGET_MODE or "off").lower()
+    if mode == "off":
+        return []
+    problems = stats.problems(settings.SQL_QUERY_BUDGET, settings.SQL_REPEAT_THRESHOLD)
+    if problems:
+        message = f"{label}: " + "; ".join(problems)
+        if mode == "strict":
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    return problems
+
+
+# ---------- engine hooks (every engine; no-op outside a tracked context) ----------
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._sql_monitor_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_sql_monitor_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+# ---------- HTTP middleware ----------
+
+def _route_label(request) -> Tuple[str, str]:
+    route = request.scope.get("route")
+    return request.method, getattr(route, "path", None) or request.url.path
+
+
+async def sql_monitor_middleware(request, call_next):
+    """
+    Count queries per request, add a Server-Timing header and enforce the
+    query budget (warn, or a 500 response in strict mode).
+    """
+    started = time.perf_counter()
+    with track_queries() as stats:
+        response = await call_next(request)
+    request.state.sql = stats
+
+    method, path = _route_label(request)
+    try:
+        check_budget(stats, f"{method} {path}")
+    except QueryBudgetExceeded as e:
+        response = JSONResponse(status_code=500, content={"detail": "Query budget exceeded", "problems": str(e)})
+
+    response.headers["Server-Timing"] = stats.server_timing(time.perf_counter() - started)
+    return response
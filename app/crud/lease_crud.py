@@ -9,6 +9,7 @@ from sqlalchemy import func
 
 from app import models
 from app.schemas.lease_schema import LeaseCreate, LeaseUpdate
+from app.services import ledger_service
 
 
 def _recompute_unit_occupied(db: Session, unit_id: int) -> None:
@@ -55,6 +56,7 @@ def create_lease(db: Session, payload: LeaseCreate) -> models.Lease:
     db.flush()
 
     _recompute_unit_occupied(db, payload.unit_id)
+    ledger_service.sync_lease(db, lease)
 
     db.commit()
     db.refresh(lease)
@@ -99,6 +101,7 @@ def update_lease(db: Session, lease_id: int, payload: LeaseUpdate) -> Optional[m
         lease.terms_accepted_at = payload.terms_accepted_at
 
     _recompute_unit_occupied(db, lease.unit_id)
+    ledger_service.sync_lease(db, lease)
 
     db.commit()
     db.refresh(lease)
@@ -114,6 +117,7 @@ def end_lease(db: Session, lease_id: int, end_date: datetime) -> Optional[models
     lease.active = 0
 
     _recompute_unit_occupied(db, lease.unit_id)
+    ledger_service.sync_lease(db, lease)
 
     db.commit()
     db.refresh(lease)
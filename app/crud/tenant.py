@@ -11,8 +11,9 @@ from sqlalchemy.orm import Session
 from app.models.user_models import Tenant
 from app.models.property_models import Unit, Lease
 from app.schemas.tenant_schema import TenantCreate, TenantUpdate
-from app.auth.password_utils import hash_password
+from app.auth.password_utils import PasswordHasherBusy, hash_password
 from app.utils.phone_utils import normalize_ke_phone
+from app.services import ledger_service
 
 
 def _clean_email(email: Optional[str]) -> Optional[str]:
@@ -118,12 +119,13 @@ def create_tenant(db: Session, payload: TenantCreate):
         db.add(lease)
 
         _recompute_unit_occupied(db, payload.unit_id)
+        ledger_service.sync_lease(db, lease)
 
         db.commit()
         db.refresh(tenant)
         return tenant
 
-    except HTTPException:
+    except (HTTPException, PasswordHasherBusy):
         db.rollback()
         raise
     except Exception as e:
@@ -195,7 +197,7 @@ def update_tenant(db: Session, tenant_id: int, payload: TenantUpdate):
         db.refresh(tenant)
         return tenant
 
-    except HTTPException:
+    except (HTTPException, PasswordHasherBusy):
         db.rollback()
         raise
     except Exception as e:
@@ -254,6 +256,7 @@ def assign_existing_tenant_to_unit(
         db.add(lease)
 
         _recompute_unit_occupied(db, unit.id)
+        ledger_service.sync_lease(db, lease)
 
         db.commit()
         db.refresh(lease)
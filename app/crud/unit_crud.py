@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 
 from app import models, schemas
+from app.services import ledger_service
 
 
 def create_unit(db: Session, unit: schemas.UnitCreate) -> models.Unit:
@@ -156,6 +157,8 @@ def update_unit(db: Session, unit_id: int, unit_update: schemas.UnitUpdate) -> O
         # Sync only the ACTIVE lease for this unit
         if active_lease:
             active_lease.rent_amount = new_rent
+            # past months keep the rent that was due then
+            ledger_service.sync_lease_from(db, active_lease)
 
         _create_audit_log(
             db,
@@ -1,9 +1,13 @@
 # app/database.py
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
+from app.core.config import settings
+from app.core.db_pool import InstrumentedQueuePool, register_pool_gauges
+
 load_dotenv()  # loads .env in project root
 
 # ── Main database ──────────────────────────────────────────────────────────────
@@ -11,15 +15,49 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL not set in .env")
 
-engine = create_engine(DATABASE_URL, echo=True, future=True)
+
+def engine_options(url: str) -> dict:
+    """
+    create_engine() keyword arguments from the DB_* settings.
+    In-memory SQLite keeps SQLAlchemy's default single-connection pool.
+    """
+    backend = make_url(url).get_backend_name()
+    options = {"echo": settings.DB_ECHO, "future": True, "pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if backend == "sqlite" and make_url(url).database in (None, "", ":memory:"):
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    )
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={int(settings.DB_STATEMENT_TIMEOUT_MS)}"}
+    return options
+
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+register_pool_gauges(engine, "primary")
 
 Base = declarative_base()
 
+# ── Optional read replica (see app.core.read_replica) ──────────────────────────
+if settings.READ_REPLICA_URL:
+    replica_engine = create_engine(settings.READ_REPLICA_URL, **engine_options(settings.READ_REPLICA_URL))
+    ReplicaSessionLocal = sessionmaker(bind=replica_engine, autocommit=False, autoflush=False)
+    register_pool_gauges(replica_engine, "replica")
+else:
+    replica_engine = None
+    ReplicaSessionLocal = None
+
 # Optional test DB (kept from your version)
 TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
 if TEST_DATABASE_URL:
-    test_engine = create_engine(TEST_DATABASE_URL, echo=True, future=True)
+    test_engine = create_engine(TEST_DATABASE_URL, **engine_options(TEST_DATABASE_URL))
     TestingSessionLocal = sessionmaker(bind=test_engine, autocommit=False, autoflush=False)
 else:
     TestingSessionLocal = None
@@ -1,17 +1,72 @@
 #app/dependecies.py
-from fastapi import Depends, HTTPException, status
+"""
+Request-context dependencies shared by every router.
+
+One session (`get_db`, or `get_read_db` for replica-eligible reads), one
+decode of the bearer token (`get_claims`) and one principal lookup
+(`get_current_user`) per request: FastAPI caches each dependency per
+request, and the decoded claims are also kept on `request.state.claims`
+for middleware.
+"""
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app import database
+from app.database import get_db
+from app.core.read_replica import use_replica
 from app.auth.jwt_utils import decode_access_token
+from app.auth.principal_cache import get_principal, principal_key, put_principal
 from app.models.user_models import Landlord, Tenant, Admin, SuperAdmin, ManagerUser
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
+# auto_error=False so a missing header gets the same 401 as a bad token
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
 
-def get_db():
-    db = SessionLocal()
+def get_claims(request: Request, token: str | None = Depends(oauth2_scheme)) -> dict:
+    """
+    Decoded JWT claims of the current request (decoded once).
+    """
+    claims = getattr(request.state, "claims", None)
+    if claims is not None:
+        return claims
+
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        claims = decode_access_token(token)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    request.state.claims = claims
+    return claims
+
+
+def get_read_db(request: Request, token: str | None = Depends(oauth2_scheme)):
+    """
+    Session for read-only report/dashboard endpoints: the read replica when
+    one is configured and the staleness guard allows it, else the primary.
+    """
+    claims = getattr(request.state, "claims", None)
+    if claims is None and token:
+        try:
+            claims = get_claims(request, token)
+        except HTTPException:
+            claims = None  # the endpoint's own auth dependency reports it
+
+    factory = database.SessionLocal
+    if database.ReplicaSessionLocal is not None and use_replica(database.replica_engine, claims):
+        factory = database.ReplicaSessionLocal
+
+    db = factory()
     try:
         yield db
     finally:
@@ -19,27 +74,25 @@ def get_db():
 
 
 def get_current_user(
-    token: str = Depends(oauth2_scheme),
+    payload: dict = Depends(get_claims),
     db: Session = Depends(get_db),
 ) -> dict:
     """
-    Decode JWT, confirm user exists, and return safe auth context.
+    Confirm the token's user exists and return safe auth context.
+    The context is cached per token (see app.auth.principal_cache), so
+    repeat calls skip the user lookup until the TTL or an invalidation.
     """
-    try:
-        payload = decode_access_token(token)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
     user_id = payload.get("sub")
     role = payload.get("role")
 
     if not user_id or not role:
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
+    key = principal_key(role, user_id, payload)
+    cached = get_principal(key)
+    if cached is not None:
+        return cached
+
     model_map = {
         "landlord": Landlord,
         "tenant": Tenant,
@@ -73,6 +126,7 @@ def get_current_user(
         auth_ctx["manager_id"] = getattr(user, "manager_id", None)
         auth_ctx["staff_role"] = getattr(user, "staff_role", None)
 
+    put_principal(key, auth_ctx)
     return auth_ctx
 
 
@@ -1,10 +1,5 @@
 # app/deps.py
-from typing import Generator
-from .database import SessionLocal
+# Kept for older imports; the session dependency lives in app.database.
+from .database import get_db
 
-def get_db() -> Generator:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+__all__ = ["get_db"]
@@ -1,9 +1,10 @@
 from fastapi import FastAPI, Response, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 
 from app.database import Base, engine, SessionLocal
-from app.auth.password_utils import hash_password
+from app.auth.password_utils import PasswordHasherBusy, hash_password
 from app.utils.phone_utils import normalize_ke_phone
 from app.models.user_models import SuperAdmin
 
@@ -26,6 +27,7 @@ from app.routers import (
     payments_mpesa,
     webhooks_daraja,
     reports_property_status_router,
+    report_jobs_router,
     payment_receipts_router,
     admin_jobs_router,
     admin_seed_router,
@@ -33,30 +35,52 @@ from app.routers import (
     agency_router,
     property_router,
     admin_dashboard_router,
+    admin_metrics_router,
+    metrics_router,
+    webhook_inbox_router,
+    statement_reconciliation_router,
     payout_router,
     audit_log_router,
     receipt_routes,
 )
 from app.services import reminder_service  # import the reminder scheduler
 from app.core.config import settings
+from app.core.read_replica import pin_writers_to_primary
+from app.core.sql_monitor import sql_monitor_middleware
+from app.core.access_log import access_log_middleware, configure_access_logging
+from app.core.http_metrics import http_metrics_middleware
+from app.services.daraja_service import async_daraja_client, daraja_client
 
 # Create tables
 Base.metadata.create_all(bind=engine)
 
 app = FastAPI(title="Property Management API")
 
-from fastapi import Request
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    print(
-        f"➡️ {request.method} {request.url.path} | "
-        f"Origin={request.headers.get('origin')} | "
-        f"Referer={request.headers.get('referer')}"
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy) -> JSONResponse:
+    # bcrypt queue full (login burst): ask the client to retry instead of a 500
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many password operations in progress, please retry"},
+        headers={"Retry-After": "1"},
     )
-    response = await call_next(request)
-    print(f"⬅️ {response.status_code} {request.method} {request.url.path}")
-    return response
+
+
+# read-your-writes: principals that just wrote keep reading from the primary
+app.middleware("http")(pin_writers_to_primary)
+
+# per-request SQL count / DB time (Server-Timing) and N+1 budget
+app.middleware("http")(sql_monitor_middleware)
+
+# per-route request counts / latency histograms for GET /metrics
+app.middleware("http")(http_metrics_middleware)
+
+# structured access log (outermost, so it sees the SQL stats and final status)
+configure_access_logging()
+app.middleware("http")(access_log_middleware)
+
+
 def bootstrap_super_admin():
     """
     Create default super admin if none exists.
@@ -135,6 +159,13 @@ def startup_event():
     bootstrap_super_admin()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    # release pooled Daraja connections
+    daraja_client.close()
+    await async_daraja_client.aclose()
+
+
 @app.get("/", include_in_schema=False)
 def read_root():
     return {
@@ -177,12 +208,17 @@ app.include_router(property_units_lookup.router)
 app.include_router(payments_mpesa.router)
 #app.include_router(webhooks_daraja.router)
 app.include_router(reports_property_status_router.router)
+app.include_router(report_jobs_router.router)
 app.include_router(payment_receipts_router.router)
 app.include_router(admin_jobs_router.router)
 app.include_router(admin_seed_router.router)
 app.include_router(property_manager_router.router)
 app.include_router(agency_router.router)
 app.include_router(admin_dashboard_router.router)
+app.include_router(admin_metrics_router.router)
+app.include_router(metrics_router.router)
+app.include_router(webhook_inbox_router.router)
+app.include_router(statement_reconciliation_router.router)
 app.include_router(audit_log_router.router)
 app. include_router(receipt_routes.router)
 # ✅ Start automatic reminders
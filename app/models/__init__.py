@@ -7,3 +7,7 @@ from .agency_models import *
 from .audit_log_model import *
 from .security_models import *
 from .receipt_model import *
+from .ledger_model import *
+from .report_job_model import *
+from .webhook_inbox_model import *
+from .idempotency_model import *
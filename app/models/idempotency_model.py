@@ -0,0 +1,36 @@
+# app/models/idempotency_model.py
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, UniqueConstraint
+
+from app.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Client-supplied Idempotency-Key for a mutating request, see
+    app.services.idempotency_service.
+
+    status: in_progress -> completed (response stored for replay).
+    Scoped per principal and endpoint; rows expire after IDEMPOTENCY_KEY_TTL_HOURS.
+    """
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    principal = Column(String(60), nullable=False)  # "<role>:<sub>"
+    scope = Column(String(120), nullable=False)  # endpoint, e.g. "POST /payments/record"
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+
+    status = Column(String(20), nullable=False, default="in_progress")
+    response_status = Column(Integer, nullable=True)
+    response_json = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("principal", "scope", "key", name="uq_idempotency_keys_principal_scope_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
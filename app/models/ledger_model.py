@@ -0,0 +1,48 @@
+# app/models/ledger_model.py
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, DateTime, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.database import Base
+
+
+class LeasePeriodLedger(Base):
+    """
+    Pre-aggregated rent ledger: one row per lease per period (YYYY-MM).
+
+    - expected:  rent due for the period (0 outside the lease's active range)
+    - allocated: sum of PaymentAllocation.amount_applied for the period
+    - credit:    part of `allocated` above `expected`
+    - status:    n/a | unpaid | partial | paid | credit
+
+    Unapplied overpayments (PaymentAllocation.period == "CREDIT") are kept
+    in a single per-lease row with period "CREDIT".
+
+    Maintained by app.services.ledger_service; never write rows directly.
+    """
+    __tablename__ = "lease_period_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    lease_id = Column(Integer, ForeignKey("leases.id"), nullable=False)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    unit_id = Column(Integer, ForeignKey("units.id"), nullable=False, index=True)
+    property_id = Column(Integer, ForeignKey("properties.id"), nullable=False)
+
+    period = Column(String(7), nullable=False)
+
+    expected = Column(Numeric(12, 2), nullable=False, default=0)
+    allocated = Column(Numeric(12, 2), nullable=False, default=0)
+    credit = Column(Numeric(12, 2), nullable=False, default=0)
+    status = Column(String(20), nullable=False, default="unpaid")
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("lease_id", "period", name="uq_lease_period_ledger_lease_period"),
+        Index("ix_lease_period_ledger_property_period", "property_id", "period"),
+        Index("ix_lease_period_ledger_tenant_period", "tenant_id", "period"),
+    )
+
+    lease = relationship("Lease", back_populates="ledger_rows")
@@ -92,4 +92,9 @@ class Lease(Base):
         "Payment",
         back_populates="lease",
         cascade="all, delete-orphan",
+    )
+    ledger_rows = relationship(
+        "LeasePeriodLedger",
+        back_populates="lease",
+        cascade="all, delete-orphan",
     )
\ No newline at end of file
@@ -0,0 +1,43 @@
+# app/models/report_job_model.py
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+
+from app.database import Base
+
+
+class ReportJob(Base):
+    """
+    A report export produced in the background by app.services.report_job_service.
+
+    status: queued -> running -> done | failed; done jobs expire (file removed)
+    after REPORT_JOB_RETENTION_HOURS. Identical requests share one job via
+    params_hash while it is queued, running or still downloadable.
+    """
+    __tablename__ = "report_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    kind = Column(String(60), nullable=False)
+    params_json = Column(Text, nullable=False, default="{}")
+    params_hash = Column(String(64), nullable=False)
+
+    status = Column(String(20), nullable=False, default="queued")
+    error = Column(Text, nullable=True)
+
+    requested_by_role = Column(String(30), nullable=True)
+    requested_by_id = Column(Integer, nullable=True)
+
+    file_path = Column(String, nullable=True)
+    file_name = Column(String, nullable=True)
+    media_type = Column(String(120), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_report_jobs_hash_status", "params_hash", "status"),
+        Index("ix_report_jobs_expires_at", "expires_at"),
+    )
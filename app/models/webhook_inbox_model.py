@@ -0,0 +1,39 @@
+# app/models/webhook_inbox_model.py
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index, UniqueConstraint
+
+from app.database import Base
+
+
+class WebhookInbox(Base):
+    """
+    Raw inbound webhook, persisted before any processing by
+    app.services.webhook_inbox_service.
+
+    status: received -> processing -> done | retry -> ... | dead
+    One row per (source, event_key); for Daraja the key is CheckoutRequestID,
+    so provider retries of the same callback collapse onto the first row.
+    """
+    __tablename__ = "webhook_inbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    source = Column(String(30), nullable=False)
+    event_key = Column(String(120), nullable=False)
+    payload_json = Column(Text, nullable=False)
+
+    status = Column(String(20), nullable=False, default="received")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    result_json = Column(Text, nullable=True)
+
+    received_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("source", "event_key", name="uq_webhook_inbox_source_key"),
+        Index("ix_webhook_inbox_status_due", "status", "next_attempt_at"),
+    )
@@ -0,0 +1,183 @@
+# app/reports/admin_overview.py
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from sqlalchemy import and_, case, event, exists, func, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# (period, top_properties) -> overview dict
+overview_cache = TTLCache(
+    maxsize=64,
+    ttl_seconds=settings.ADMIN_OVERVIEW_CACHE_TTL_SECONDS,
+    name="admin_overview",
+)
+
+# any committed change to these invalidates the snapshot
+_WATCHED = (
+    models.Payment,
+    models.PaymentAllocation,
+    models.Lease,
+    models.Unit,
+    models.Property,
+    models.Tenant,
+    models.MaintenanceRequest,
+)
+
+
+def unit_rollup():
+    """
+    Per-property unit counts as a grouped subquery:
+    (property_id, units, occupied_units).
+    """
+    return (
+        select(
+            models.Unit.property_id.label("property_id"),
+            func.count(models.Unit.id).label("units"),
+            func.coalesce(
+                func.sum(case((models.Unit.occupied == 1, 1), else_=0)), 0
+            ).label("occupied_units"),
+        )
+        .group_by(models.Unit.property_id)
+        .subquery()
+    )
+
+
+def property_summary_rows(db: Session, props_q) -> List[Dict[str, Any]]:
+    """
+    Run `props_q` (a select() of Property rows, already ordered/limited)
+    joined to the unit rollup and return PropertySummaryRow-shaped dicts.
+    """
+    rollup = unit_rollup()
+    props = props_q.subquery()
+
+    rows = db.execute(
+        select(
+            props.c.id,
+            props.c.name,
+            props.c.address,
+            props.c.property_code,
+            props.c.landlord_id,
+            props.c.manager_id,
+            func.coalesce(rollup.c.units, 0),
+            func.coalesce(rollup.c.occupied_units, 0),
+        )
+        .select_from(props)
+        .outerjoin(rollup, rollup.c.property_id == props.c.id)
+        .order_by(props.c.id.desc())
+    ).all()
+
+    return [
+        {
+            "id": pid,
+            "name": name,
+            "address": address,
+            "property_code": code,
+            "landlord_id": landlord_id,
+            "manager_id": manager_id,
+            "units": int(units),
+            "occupied_units": int(occ),
+            "vacant_units": max(0, int(units) - int(occ)),
+        }
+        for pid, name, address, code, landlord_id, manager_id, units, occ in rows
+    ]
+
+
+def _counts_and_collections(db: Session, period: str) -> Dict[str, Any]:
+    U, L, P, MR, MS = models.Unit, models.Lease, models.Payment, models.MaintenanceRequest, models.MaintenanceStatus
+    paid = and_(P.period == period, P.status == models.PaymentStatus.paid)
+
+    def _maint(name: str):
+        return (
+            select(func.count(MR.id))
+            .join(MS, MS.id == MR.status_id)
+            .where(MS.name == name)
+            .scalar_subquery()
+        )
+
+    paid_for_lease = exists().where(paid, P.lease_id == L.id)
+
+    # one round trip; each scalar subquery is a single aggregate over its table
+    row = db.execute(
+        select(
+            select(func.count(models.Property.id)).scalar_subquery(),
+            select(func.count(U.id)).scalar_subquery(),
+            select(func.coalesce(func.sum(case((U.occupied == 1, 1), else_=0)), 0)).scalar_subquery(),
+            select(func.count(models.Tenant.id)).scalar_subquery(),
+            select(func.count(L.id)).where(L.active == 1).scalar_subquery(),
+            _maint("open"),
+            _maint("in_progress"),
+            _maint("resolved"),
+            select(func.coalesce(func.sum(P.amount), 0)).where(paid).scalar_subquery(),
+            select(func.count(P.id)).where(paid).scalar_subquery(),
+            select(func.count(L.id)).where(L.active == 1, ~paid_for_lease).scalar_subquery(),
+        )
+    ).one()
+
+    (properties, units, occupied, tenants, active_leases,
+     m_open, m_progress, m_resolved, collected, paid_count, unpaid_count) = row
+
+    return {
+        "counts": {
+            "properties": int(properties or 0),
+            "units": int(units or 0),
+            "occupied_units": int(occupied or 0),
+            "vacant_units": max(0, int(units or 0) - int(occupied or 0)),
+            "tenants": int(tenants or 0),
+            "active_leases": int(active_leases or 0),
+            "maintenance_open": int(m_open or 0),
+            "maintenance_in_progress": int(m_progress or 0),
+            "maintenance_resolved": int(m_resolved or 0),
+        },
+        "collections": {
+            "period": period,
+            "collected_total": float(collected or 0),
+            "paid_count": int(paid_count or 0),
+            "unpaid_count": int(unpaid_count or 0),
+        },
+    }
+
+
+def build_admin_overview(db: Session, period: str, top_properties: int) -> Dict[str, Any]:
+    """
+    Admin dashboard overview in two statements:
+      1) counts + period collections (scalar subqueries / conditional sums)
+      2) latest `top_properties` properties joined to the unit rollup
+    """
+    out = _counts_and_collections(db, period)
+    latest = select(models.Property).order_by(models.Property.id.desc()).limit(int(top_properties))
+    out["properties_top"] = property_summary_rows(db, latest)
+    return out
+
+
+def get_admin_overview(db: Session, period: str, top_properties: int) -> Dict[str, Any]:
+    """Cached build_admin_overview; snapshot lives ADMIN_OVERVIEW_CACHE_TTL_SECONDS."""
+    return overview_cache.get_or_set(
+        (period, int(top_properties)),
+        lambda: build_admin_overview(db, period, top_properties),
+    )
+
+
+# ---------- invalidation ----------
+
+@event.listens_for(Session, "after_flush")
+def _mark_overview_dirty(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _WATCHED):
+            session.info["admin_overview_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_overview(session):
+    if session.info.pop("admin_overview_dirty", False):
+        overview_cache.clear()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_overview_flag(session):
+    session.info.pop("admin_overview_dirty", None)
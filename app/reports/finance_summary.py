@@ -0,0 +1,81 @@
+# app/reports/finance_summary.py
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def build_finance_summary(
+    db: Session,
+    period: str,
+    limit: int,
+    before_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Per-property finance rows (FinancePropertyRow shape) in one statement.
+
+    Properties are paged newest-first with keyset pagination on id
+    (`before_id`). Active leases of the page's properties only are
+    outer-joined to their ledger row for `period` (at most one per lease)
+    and grouped by property, so the cost follows the page size.
+    """
+    P, L, U, LPL = models.Property, models.Lease, models.Unit, models.LeasePeriodLedger
+
+    page_q = select(P.id.label("id")).order_by(P.id.desc()).limit(int(limit))
+    if before_id is not None:
+        page_q = page_q.where(P.id < int(before_id))
+    page = page_q.subquery()
+
+    lease_agg = (
+        select(
+            U.property_id.label("property_id"),
+            func.count(L.id).label("active_leases"),
+            func.coalesce(func.sum(L.rent_amount), 0).label("expected"),
+            func.coalesce(func.sum(LPL.allocated), 0).label("received"),
+            func.count(LPL.id).filter(LPL.allocated > 0).label("paid_leases"),
+        )
+        .select_from(L)
+        .join(U, U.id == L.unit_id)
+        .join(page, page.c.id == U.property_id)
+        .outerjoin(LPL, and_(LPL.lease_id == L.id, LPL.period == period))
+        .where(L.active == 1)
+        .group_by(U.property_id)
+        .subquery()
+    )
+
+    stmt = (
+        select(
+            P.id,
+            P.name,
+            P.property_code,
+            func.coalesce(lease_agg.c.active_leases, 0),
+            func.coalesce(lease_agg.c.expected, 0),
+            func.coalesce(lease_agg.c.received, 0),
+            func.coalesce(lease_agg.c.paid_leases, 0),
+        )
+        .select_from(page)
+        .join(P, P.id == page.c.id)
+        .outerjoin(lease_agg, lease_agg.c.property_id == P.id)
+        .order_by(P.id.desc())
+    )
+
+    out: List[Dict[str, Any]] = []
+    for pid, name, code, active_leases, expected, received, paid_leases in db.execute(stmt).all():
+        expected_f = float(expected or 0)
+        received_f = float(received or 0)
+        out.append({
+            "property_id": pid,
+            "property_name": name,
+            "property_code": code,
+            "period": period,
+            "expected_rent": expected_f,
+            "received_rent": received_f,
+            "balance": round(expected_f - received_f, 2),
+            "paid_leases": int(paid_leases or 0),
+            "unpaid_leases": max(0, int(active_leases or 0) - int(paid_leases or 0)),
+        })
+    return out
@@ -0,0 +1,236 @@
+# app/reports/landlord_summary.py
+from __future__ import annotations
+
+import csv
+import io
+import os
+import tempfile
+from typing import Any, Dict, Iterator, List, Tuple
+
+from openpyxl import Workbook
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Query, Session
+
+from app import models
+
+STREAM_CHUNK_ROWS = 1000
+
+
+def _yyyymm(year: int, month: int) -> str:
+    return f"{year}-{str(month).zfill(2)}"
+
+
+def property_totals(db: Session, landlord_id: int, period: str) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """
+    One row per landlord property with expected (active lease rent) and
+    received (ledger allocations for the period, any lease) pre-aggregated.
+    """
+    LPL = models.LeasePeriodLedger
+
+    expected_agg = (
+        db.query(
+            models.Unit.property_id.label("property_id"),
+            func.coalesce(func.sum(models.Lease.rent_amount), 0).label("expected"),
+        )
+        .join(models.Lease, models.Lease.unit_id == models.Unit.id)
+        .filter(models.Lease.active == 1)
+        .group_by(models.Unit.property_id)
+        .subquery()
+    )
+    received_agg = (
+        db.query(
+            LPL.property_id.label("property_id"),
+            func.coalesce(func.sum(LPL.allocated), 0).label("received"),
+        )
+        .filter(LPL.period == period)
+        .group_by(LPL.property_id)
+        .subquery()
+    )
+
+    rows = (
+        db.query(
+            models.Property.id,
+            models.Property.name,
+            func.coalesce(expected_agg.c.expected, 0),
+            func.coalesce(received_agg.c.received, 0),
+        )
+        .outerjoin(expected_agg, expected_agg.c.property_id == models.Property.id)
+        .outerjoin(received_agg, received_agg.c.property_id == models.Property.id)
+        .filter(models.Property.landlord_id == landlord_id)
+        .order_by(models.Property.id)
+        .all()
+    )
+
+    properties: List[Dict[str, Any]] = []
+    expected_total = 0.0
+    received_total = 0.0
+    for pid, name, expected, received in rows:
+        expected, received = float(expected or 0), float(received or 0)
+        expected_total += expected
+        received_total += received
+        properties.append({
+            "property_id": pid,
+            "name": name,
+            "expected": expected,
+            "received": received,
+            "pending": round(expected - received, 2),
+        })
+
+    totals = {
+        "expected_total": expected_total,
+        "received_total": received_total,
+        "pending_total": round(expected_total - received_total, 2),
+    }
+    return properties, totals
+
+
+def arrears_query(db: Session, landlord_id: int, period: str) -> Query:
+    """
+    Active leases on the landlord's properties that are short for `period`,
+    largest balance first. Rows: (lease_id, tenant_id, tenant_name, phone,
+    expected, paid). Iterate with .yield_per() to stream.
+    """
+    LPL = models.LeasePeriodLedger
+    paid = func.coalesce(LPL.allocated, 0)
+    balance = models.Lease.rent_amount - paid
+
+    return (
+        db.query(
+            models.Lease.id,
+            models.Tenant.id,
+            models.Tenant.name,
+            models.Tenant.phone,
+            models.Lease.rent_amount,
+            paid,
+        )
+        .join(models.Unit, models.Unit.id == models.Lease.unit_id)
+        .join(models.Property, models.Property.id == models.Unit.property_id)
+        .join(models.Tenant, models.Tenant.id == models.Lease.tenant_id)
+        .outerjoin(LPL, and_(LPL.lease_id == models.Lease.id, LPL.period == period))
+        .filter(models.Property.landlord_id == landlord_id)
+        .filter(models.Lease.active == 1)
+        .filter(balance > 0)
+        .order_by(balance.desc(), models.Lease.id)
+    )
+
+
+def arrears_item(row) -> Dict[str, Any]:
+    lease_id, tenant_id, tenant_name, phone, rent, paid = row
+    expected = float(rent or 0)
+    paid = float(paid or 0)
+    return {
+        "tenant_id": tenant_id,
+        "tenant_name": tenant_name,
+        "phone": phone,
+        "expected": expected,
+        "paid": paid,
+        "balance": round(expected - paid, 2),
+        "lease_id": lease_id,
+    }
+
+
+def build_landlord_monthly_summary(db: Session, landlord_id: int, year: int, month: int) -> Dict[str, Any]:
+    """
+    Landlord monthly summary shared by the JSON endpoint and report_crud.
+
+    Two queries regardless of portfolio size:
+      1) per-property expected/received (grouped subqueries)
+      2) arrears: active leases short for the period, sorted in SQL
+
+    expected = active lease rent, received = ledger allocations for the
+    period, arrears are per active lease with a positive balance.
+    """
+    period = _yyyymm(year, month)
+    properties, totals = property_totals(db, landlord_id, period)
+    arrears = [arrears_item(r) for r in arrears_query(db, landlord_id, period).all()]
+
+    return {
+        "landlord_id": landlord_id,
+        "year": year,
+        "month": month,
+        "period": period,
+        **totals,
+        "properties": properties,
+        "arrears": arrears,
+    }
+
+
+# ---------- streaming exports ----------
+
+def _csv_line(values) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(values)
+    return buf.getvalue()
+
+
+def stream_landlord_monthly_csv(db: Session, landlord_id: int, year: int, month: int) -> Iterator[str]:
+    """
+    CSV export as a generator: totals and per-property rows first, then
+    arrears fetched in chunks of STREAM_CHUNK_ROWS (server-side cursor).
+    """
+    period = _yyyymm(year, month)
+    properties, totals = property_totals(db, landlord_id, period)
+
+    yield _csv_line(["Metric", "Value"])
+    yield _csv_line(["Expected Total", totals["expected_total"]])
+    yield _csv_line(["Received Total", totals["received_total"]])
+    yield _csv_line(["Pending Total", totals["pending_total"]])
+    yield _csv_line([])
+    yield _csv_line(["Property", "Expected", "Received", "Pending"])
+    for r in properties:
+        yield _csv_line([r["name"], r["expected"], r["received"], r["pending"]])
+    yield _csv_line([])
+    yield _csv_line(["Tenant", "Phone", "Expected", "Paid", "Balance", "Lease ID"])
+
+    for row in arrears_query(db, landlord_id, period).yield_per(STREAM_CHUNK_ROWS):
+        a = arrears_item(row)
+        yield _csv_line([a["tenant_name"], a["phone"], a["expected"], a["paid"], a["balance"], a["lease_id"]])
+
+
+def write_landlord_monthly_xlsx(db: Session, landlord_id: int, year: int, month: int) -> str:
+    """
+    XLSX export built with openpyxl write-only mode while arrears are
+    fetched in chunks. Returns the path of a temp file; the caller streams
+    it and removes it.
+    """
+    period = _yyyymm(year, month)
+    properties, totals = property_totals(db, landlord_id, period)
+
+    wb = Workbook(write_only=True)
+
+    ws = wb.create_sheet(title="Summary")
+    ws.append(["Metric", "Value"])
+    ws.append(["Expected Total", totals["expected_total"]])
+    ws.append(["Received Total", totals["received_total"]])
+    ws.append(["Pending Total", totals["pending_total"]])
+
+    ws = wb.create_sheet(title="Properties")
+    ws.append(["Property", "Expected", "Received", "Pending"])
+    for r in properties:
+        ws.append([r["name"], r["expected"], r["received"], r["pending"]])
+
+    ws = wb.create_sheet(title="Arrears")
+    ws.append(["Tenant", "Phone", "Expected", "Paid", "Balance", "Lease ID"])
+    for row in arrears_query(db, landlord_id, period).yield_per(STREAM_CHUNK_ROWS):
+        a = arrears_item(row)
+        ws.append([a["tenant_name"], a["phone"], a["expected"], a["paid"], a["balance"], a["lease_id"]])
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    wb.save(path)
+    return path
+
+
+def iter_file_and_remove(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    try:
+        with open(path, "rb") as fh:
+            while True:
+                chunk = fh.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,152 @@
+# app/reports/property_status.py
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def _as_float(x) -> float:
+    if x is None:
+        return 0.0
+    if isinstance(x, Decimal):
+        return float(x)
+    try:
+        return float(x)
+    except Exception:
+        return 0.0
+
+
+def _vacant_item(u) -> Dict[str, Any]:
+    return {
+        "unit_id": u.id,
+        "unit_number": u.number,
+        "lease_id": None,
+        "tenant_id": None,
+        "tenant_name": None,
+        "tenant_phone": None,
+        "expected": 0.0,
+        "amount_paid": 0.0,
+        "amount_due": 0.0,
+        "status": "pending",
+        "paid": False,
+    }
+
+
+def build_property_status(
+    db: Session,
+    property_ids: Iterable[int],
+    period: str,
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Per-unit monthly status grid for one or many properties.
+
+    Runs two queries regardless of unit count:
+      1) every unit of the requested properties
+      2) active leases + tenant + payment totals for `period`
+         (payments pre-aggregated per lease in a grouped subquery)
+
+    Returns {property_id: {"property_id", "period", "totals", "items"}}
+    in the same shape as GET /reports/property/{property_id}/status.
+    """
+    ids = sorted({int(pid) for pid in property_ids})
+    if not ids:
+        return {}
+
+    units = (
+        db.query(models.Unit.id, models.Unit.number, models.Unit.property_id)
+        .filter(models.Unit.property_id.in_(ids))
+        .order_by(models.Unit.property_id, models.Unit.id)
+        .all()
+    )
+
+    pay_totals = (
+        db.query(
+            models.Payment.lease_id.label("lease_id"),
+            func.coalesce(func.sum(models.Payment.amount), 0).label("amount_paid"),
+            func.max(
+                case((models.Payment.status == models.PaymentStatus.paid, 1), else_=0)
+            ).label("any_paid"),
+        )
+        .join(models.Lease, models.Lease.id == models.Payment.lease_id)
+        .join(models.Unit, models.Unit.id == models.Lease.unit_id)
+        .filter(models.Unit.property_id.in_(ids))
+        .filter(models.Payment.period == period)
+        .group_by(models.Payment.lease_id)
+        .subquery()
+    )
+
+    lease_rows = (
+        db.query(
+            models.Lease.id,
+            models.Lease.unit_id,
+            models.Lease.rent_amount,
+            models.Tenant.id,
+            models.Tenant.name,
+            models.Tenant.phone,
+            pay_totals.c.amount_paid,
+            pay_totals.c.any_paid,
+        )
+        .join(models.Unit, models.Unit.id == models.Lease.unit_id)
+        .outerjoin(models.Tenant, models.Tenant.id == models.Lease.tenant_id)
+        .outerjoin(pay_totals, pay_totals.c.lease_id == models.Lease.id)
+        .filter(models.Unit.property_id.in_(ids))
+        .filter(models.Lease.active == 1)
+        .order_by(models.Lease.id)
+        .all()
+    )
+
+    # one active lease per unit is the rule; if data has more, the latest id wins
+    lease_by_unit: Dict[int, Any] = {row[1]: row for row in lease_rows}
+
+    items_by_property: Dict[int, List[Dict[str, Any]]] = {pid: [] for pid in ids}
+
+    for u in units:
+        items = items_by_property[u.property_id]
+        row = lease_by_unit.get(u.id)
+        if row is None:
+            items.append(_vacant_item(u))
+            continue
+
+        lease_id, _, rent_amount, tenant_id, tenant_name, tenant_phone, paid_sum, any_paid = row
+
+        expected = _as_float(rent_amount)
+        amount_paid = _as_float(paid_sum)
+
+        # paid if there exists a paid row, OR sum >= expected
+        paid_flag = bool(any_paid) or (amount_paid >= expected if expected > 0 else False)
+
+        items.append({
+            "unit_id": u.id,
+            "unit_number": u.number,
+            "lease_id": lease_id,
+            "tenant_id": tenant_id,
+            "tenant_name": tenant_name,
+            "tenant_phone": tenant_phone,
+            "expected": round(expected, 2),
+            "amount_paid": round(amount_paid, 2),
+            "amount_due": max(0.0, round(expected - amount_paid, 2)),
+            "status": "paid" if paid_flag else "pending",
+            "paid": paid_flag,
+        })
+
+    out: Dict[int, Dict[str, Any]] = {}
+    for pid, items in items_by_property.items():
+        total_expected = round(sum(_as_float(it["expected"]) for it in items), 2)
+        total_paid = round(sum(_as_float(it["amount_paid"]) for it in items), 2)
+        out[pid] = {
+            "property_id": pid,
+            "period": period,
+            "totals": {
+                "expected": total_expected,
+                "received": total_paid,
+                "pending": round(max(0.0, total_expected - total_paid), 2),
+            },
+            "items": items,
+        }
+
+    return out
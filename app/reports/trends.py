@@ -0,0 +1,112 @@
+# app/reports/trends.py
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.ledger_service import CREDIT_PERIOD, period_range
+
+MAX_TREND_PERIODS = 60
+_PERIOD_RE = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+
+def _validate_range(start: str, end: str) -> List[str]:
+    for p in (start, end):
+        if not _PERIOD_RE.match(p or ""):
+            raise ValueError(f"Invalid period: {p} (expected YYYY-MM)")
+    if start > end:
+        raise ValueError("start must not be after end")
+    periods = period_range(start, end)
+    if len(periods) > MAX_TREND_PERIODS:
+        raise ValueError(f"Range too long (max {MAX_TREND_PERIODS} months)")
+    return periods
+
+
+def build_trend(db: Session, property_filter, start: str, end: str) -> Dict[str, Any]:
+    """
+    Expected / received / arrears per month for the properties matched by
+    `property_filter` (a SQLAlchemy criterion on Property), start..end inclusive.
+
+    One grouped query over the lease_period_ledger (which already carries
+    allocations per period and the lease active ranges); months without rows
+    are zero-filled and rates / running totals are computed with numpy.
+    Arrears are summed per lease, so one tenant's overpayment never hides
+    another's shortfall.
+    """
+    periods = _validate_range(start, end)
+    LPL = models.LeasePeriodLedger
+
+    rows = (
+        db.query(
+            LPL.period,
+            func.coalesce(func.sum(LPL.expected), 0),
+            func.coalesce(func.sum(LPL.allocated), 0),
+            func.coalesce(
+                func.sum(case((LPL.expected > LPL.allocated, LPL.expected - LPL.allocated), else_=0)), 0
+            ),
+        )
+        .join(models.Property, models.Property.id == LPL.property_id)
+        .filter(property_filter)
+        .filter(LPL.period >= start, LPL.period <= end, LPL.period != CREDIT_PERIOD)
+        .group_by(LPL.period)
+        .all()
+    )
+
+    index = {p: i for i, p in enumerate(periods)}
+    data = np.zeros((3, len(periods)), dtype=float)
+    if rows:
+        pos = np.fromiter((index[r[0]] for r in rows), dtype=int, count=len(rows))
+        data[:, pos] = np.array([[float(r[1] or 0), float(r[2] or 0), float(r[3] or 0)] for r in rows]).T
+
+    expected, received, arrears = data
+    rate = np.divide(received, expected, out=np.zeros_like(expected), where=expected > 0)
+    cumulative_arrears = np.cumsum(arrears)
+
+    expected_r = np.round(expected, 2).tolist()
+    received_r = np.round(received, 2).tolist()
+    arrears_r = np.round(arrears, 2).tolist()
+    rate_r = np.round(rate, 4).tolist()
+    cumulative_r = np.round(cumulative_arrears, 2).tolist()
+
+    series = [
+        {
+            "period": p,
+            "expected": expected_r[i],
+            "received": received_r[i],
+            "arrears": arrears_r[i],
+            "collection_rate": rate_r[i],
+            "cumulative_arrears": cumulative_r[i],
+        }
+        for i, p in enumerate(periods)
+    ]
+
+    total_expected = float(expected.sum())
+    total_received = float(received.sum())
+    return {
+        "start": start,
+        "end": end,
+        "series": series,
+        "totals": {
+            "expected": round(total_expected, 2),
+            "received": round(total_received, 2),
+            "arrears": round(float(arrears.sum()), 2),
+            "collection_rate": round(total_received / total_expected, 4) if total_expected > 0 else 0.0,
+        },
+    }
+
+
+def landlord_trend(db: Session, landlord_id: int, start: str, end: str) -> Dict[str, Any]:
+    return {"landlord_id": landlord_id, **build_trend(db, models.Property.landlord_id == landlord_id, start, end)}
+
+
+def property_trend(db: Session, property_id: int, start: str, end: str) -> Dict[str, Any]:
+    return {"property_id": property_id, **build_trend(db, models.Property.id == property_id, start, end)}
+
+
+def agency_trend(db: Session, manager_id: int, start: str, end: str) -> Dict[str, Any]:
+    return {"manager_id": manager_id, **build_trend(db, models.Property.manager_id == manager_id, start, end)}
@@ -4,16 +4,16 @@ from __future__ import annotations
 from datetime import date
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
-from app.dependencies import get_db, role_required
+from app.dependencies import get_read_db, role_required
 from app import models
+from app.reports.admin_overview import get_admin_overview, property_summary_rows
+from app.reports.finance_summary import build_finance_summary
 from app.schemas.admin_dashboard_schema import (
     AdminOverviewOut,
-    AdminCounts,
-    AdminCollections,
     PropertySummaryRow,
     FinancePropertyRow,
 )
@@ -32,132 +32,21 @@ def _period_today() -> str:
     dependencies=[Depends(role_required(["admin"]))],
 )
 def admin_overview(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     period: str = Query(default_factory=_period_today, description="YYYY-MM"),
     top_properties: int = Query(6, ge=1, le=30),
 ):
-    # ---------- counts ----------
-    properties = db.query(func.count(models.Property.id)).scalar() or 0
-    units = db.query(func.count(models.Unit.id)).scalar() or 0
-    occupied_units = db.query(func.count(models.Unit.id)).filter(models.Unit.occupied == 1).scalar() or 0
-    vacant_units = max(0, int(units) - int(occupied_units))
-
-    tenants = db.query(func.count(models.Tenant.id)).scalar() or 0
-    active_leases = db.query(func.count(models.Lease.id)).filter(models.Lease.active == 1).scalar() or 0
-
-    # maintenance buckets
-    # We treat missing statuses as 0 (in case seed isn't done)
-    status_map = {name: sid for (sid, name) in db.query(models.MaintenanceStatus.id, models.MaintenanceStatus.name).all()}
-    open_id = status_map.get("open")
-    in_prog_id = status_map.get("in_progress")
-    resolved_id = status_map.get("resolved")
-
-    def _count_status(sid: Optional[int]) -> int:
-        if not sid:
-            return 0
-        return (
-            db.query(func.count(models.MaintenanceRequest.id))
-            .filter(models.MaintenanceRequest.status_id == sid)
-            .scalar()
-            or 0
-        )
-
-    maintenance_open = _count_status(open_id)
-    maintenance_in_progress = _count_status(in_prog_id)
-    maintenance_resolved = _count_status(resolved_id)
-
-    counts = AdminCounts(
-        properties=int(properties),
-        units=int(units),
-        occupied_units=int(occupied_units),
-        vacant_units=int(vacant_units),
-        tenants=int(tenants),
-        active_leases=int(active_leases),
-        maintenance_open=int(maintenance_open),
-        maintenance_in_progress=int(maintenance_in_progress),
-        maintenance_resolved=int(maintenance_resolved),
-    )
-
-    # ---------- collections (period) ----------
-    # Total received (paid) in the period
-    received_total = (
-        db.query(func.coalesce(func.sum(models.Payment.amount), 0))
-        .filter(models.Payment.period == period)
-        .filter(models.Payment.status == models.PaymentStatus.paid)
-        .scalar()
-        or 0
-    )
-    paid_count = (
-        db.query(func.count(models.Payment.id))
-        .filter(models.Payment.period == period)
-        .filter(models.Payment.status == models.PaymentStatus.paid)
-        .scalar()
-        or 0
-    )
-
-    # unpaid leases for period = active leases with no PAID payment for that period
-    paid_lease_ids_subq = (
-        db.query(models.Payment.lease_id)
-        .filter(models.Payment.period == period)
-        .filter(models.Payment.status == models.PaymentStatus.paid)
-        .filter(models.Payment.lease_id.isnot(None))
-        .subquery()
-    )
-
-    unpaid_count = (
-        db.query(func.count(models.Lease.id))
-        .filter(models.Lease.active == 1)
-        .filter(~models.Lease.id.in_(paid_lease_ids_subq))
-        .scalar()
-        or 0
-    )
-
-    collections = AdminCollections(
-        period=period,
-        collected_total=float(received_total or 0),
-        paid_count=int(paid_count),
-        unpaid_count=int(unpaid_count),
-    )
-
-    # ---------- top properties (simple: latest properties) ----------
-    props = (
-        db.query(models.Property)
-        .order_by(models.Property.id.desc())
-        .limit(int(top_properties))
-        .all()
-    )
+    """
+    Dashboard counts, period collections and the latest properties.
+    Served from a short-TTL snapshot; payment/lease/unit commits invalidate it.
+    """
+    return AdminOverviewOut(**get_admin_overview(db, period, top_properties))
 
-    props_out: List[PropertySummaryRow] = []
-    for p in props:
-        # unit counts per property
-        t_units = (
-            db.query(func.count(models.Unit.id))
-            .filter(models.Unit.property_id == p.id)
-            .scalar()
-            or 0
-        )
-        t_occ = (
-            db.query(func.count(models.Unit.id))
-            .filter(models.Unit.property_id == p.id)
-            .filter(models.Unit.occupied == 1)
-            .scalar()
-            or 0
-        )
-        props_out.append(
-            PropertySummaryRow(
-                id=p.id,
-                name=p.name,
-                address=p.address,
-                property_code=p.property_code,
-                landlord_id=p.landlord_id,
-                manager_id=p.manager_id,
-                units=int(t_units),
-                occupied_units=int(t_occ),
-                vacant_units=max(0, int(t_units) - int(t_occ)),
-            )
-        )
 
-    return AdminOverviewOut(counts=counts, collections=collections, properties_top=props_out)
+def _set_next_cursor(response: Response, rows: List[Dict[str, Any]], limit: int, key: str) -> None:
+    # keyset pagination: pass X-Next-Cursor back as ?cursor= for the next page
+    if len(rows) >= int(limit):
+        response.headers["X-Next-Cursor"] = str(rows[-1][key])
 
 
 @router.get(
@@ -165,32 +54,18 @@ def admin_overview(
     response_model=List[PropertySummaryRow],
     dependencies=[Depends(role_required(["admin", "super_admin"]))],
 )
-def admin_properties_summary(db: Session = Depends(get_db), limit: int = Query(200, ge=1, le=2000)):
-    props = db.query(models.Property).order_by(models.Property.id.desc()).limit(int(limit)).all()
-    out: List[PropertySummaryRow] = []
-    for p in props:
-        t_units = db.query(func.count(models.Unit.id)).filter(models.Unit.property_id == p.id).scalar() or 0
-        t_occ = (
-            db.query(func.count(models.Unit.id))
-            .filter(models.Unit.property_id == p.id)
-            .filter(models.Unit.occupied == 1)
-            .scalar()
-            or 0
-        )
-        out.append(
-            PropertySummaryRow(
-                id=p.id,
-                name=p.name,
-                address=p.address,
-                property_code=p.property_code,
-                landlord_id=p.landlord_id,
-                manager_id=p.manager_id,
-                units=int(t_units),
-                occupied_units=int(t_occ),
-                vacant_units=max(0, int(t_units) - int(t_occ)),
-            )
-        )
-    return out
+def admin_properties_summary(
+    response: Response,
+    db: Session = Depends(get_read_db),
+    limit: int = Query(200, ge=1, le=2000),
+    cursor: Optional[int] = Query(None, description="Return properties with id below this (X-Next-Cursor)"),
+):
+    q = select(models.Property).order_by(models.Property.id.desc()).limit(int(limit))
+    if cursor is not None:
+        q = q.where(models.Property.id < int(cursor))
+    rows = property_summary_rows(db, q)
+    _set_next_cursor(response, rows, limit, "id")
+    return rows
 
 
 @router.get(
@@ -199,91 +74,29 @@ def admin_properties_summary(db: Session = Depends(get_db), limit: int = Query(2
     dependencies=[Depends(role_required(["admin", "super_admin"]))],
 )
 def admin_finance_summary(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: Session = Depends(get_read_db),
     period: str = Query(default_factory=_period_today, description="YYYY-MM"),
     limit: int = Query(200, ge=1, le=2000),
+    cursor: Optional[int] = Query(None, description="Return properties with id below this (X-Next-Cursor)"),
 ):
     """
     Per-property finance summary:
     - expected rent = sum(active lease rent_amount for leases in that property)
-    - received rent = sum(paid payments for that property+period)
+    - received rent = sum(ledger allocations for that property+period)
     - balance = expected - received
     - paid_leases / unpaid_leases counts
     """
-    props = db.query(models.Property).order_by(models.Property.id.desc()).limit(int(limit)).all()
-    out: List[FinancePropertyRow] = []
-
-    for p in props:
-        # Active leases under this property
-        leases_q = (
-            db.query(models.Lease)
-            .join(models.Unit, models.Unit.id == models.Lease.unit_id)
-            .filter(models.Unit.property_id == p.id)
-            .filter(models.Lease.active == 1)
-        )
-
-        lease_ids = [l.id for l in leases_q.all()]
-        expected = float(sum(float(l.rent_amount or 0) for l in leases_q.all()) or 0)
-
-        if not lease_ids:
-            out.append(
-                FinancePropertyRow(
-                    property_id=p.id,
-                    property_name=p.name,
-                    property_code=p.property_code,
-                    period=period,
-                    expected_rent=0.0,
-                    received_rent=0.0,
-                    balance=0.0,
-                    paid_leases=0,
-                    unpaid_leases=0,
-                )
-            )
-            continue
-
-        received = (
-            db.query(func.coalesce(func.sum(models.Payment.amount), 0))
-            .filter(models.Payment.period == period)
-            .filter(models.Payment.status == models.PaymentStatus.paid)
-            .filter(models.Payment.lease_id.in_(lease_ids))
-            .scalar()
-            or 0
-        )
-        received_f = float(received or 0)
-
-        paid_leases = (
-            db.query(func.count(func.distinct(models.Payment.lease_id)))
-            .filter(models.Payment.period == period)
-            .filter(models.Payment.status == models.PaymentStatus.paid)
-            .filter(models.Payment.lease_id.in_(lease_ids))
-            .scalar()
-            or 0
-        )
-
-        unpaid_leases = max(0, len(lease_ids) - int(paid_leases))
-
-        out.append(
-            FinancePropertyRow(
-                property_id=p.id,
-                property_name=p.name,
-                property_code=p.property_code,
-                period=period,
-                expected_rent=float(expected),
-                received_rent=received_f,
-                balance=round(float(expected) - received_f, 2),
-                paid_leases=int(paid_leases),
-                unpaid_leases=int(unpaid_leases),
-            )
-        )
-
-    return out
+    rows = build_finance_summary(db, period, limit, before_id=cursor)
+    _set_next_cursor(response, rows, limit, "property_id")
+    return rows
 
 
 @router.get(
     "/maintenance/summary",
     dependencies=[Depends(role_required(["admin", "super_admin"]))],
 )
-def admin_maintenance_summary(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def admin_maintenance_summary(db: Session = Depends(get_read_db)) -> Dict[str, Any]:
     """
     Returns counts grouped by MaintenanceStatus.name
     """
@@ -0,0 +1,71 @@
+# app/routers/admin_metrics_router.py
+from __future__ import annotations
+
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from app.dependencies import role_required
+from app.auth.password_utils import hasher_stats
+from app.core.db_pool import pool_status
+from app.database import engine
+from app.auth.principal_cache import principal_cache
+from app.reports.admin_overview import overview_cache
+from app.services.idempotency_service import replay_cache
+from app.services.property_access_service import access_cache
+from app.services.stk_reconciler_service import last_run as stk_reconcile_last_run
+from app.services.webhook_inbox_service import seen_events
+
+router = APIRouter(prefix="/admin/metrics", tags=["Admin Metrics"])
+
+
+@router.get(
+    "/caches",
+    dependencies=[Depends(role_required(["admin", "super_admin"]))],
+)
+def cache_metrics() -> Dict[str, Any]:
+    """
+    Size and hit/miss counters of the in-process caches (per worker process).
+    """
+    return {
+        "caches": [
+            principal_cache.stats(),
+            overview_cache.stats(),
+            access_cache.stats(),
+            replay_cache.stats(),
+            seen_events.stats(),
+        ]
+    }
+
+
+@router.get(
+    "/password-hashing",
+    dependencies=[Depends(role_required(["admin", "super_admin"]))],
+)
+def password_hashing_metrics() -> Dict[str, Any]:
+    """
+    bcrypt executor load: queue depth, running and rejected calls.
+    """
+    return hasher_stats()
+
+
+@router.get(
+    "/db-pool",
+    dependencies=[Depends(role_required(["admin", "super_admin"]))],
+)
+def db_pool_metrics() -> Dict[str, Any]:
+    """
+    Main engine pool occupancy (checked out / overflow) and checkout latency.
+    """
+    return pool_status(engine)
+
+
+@router.get(
+    "/stk-reconciler",
+    dependencies=[Depends(role_required(["admin", "super_admin"]))],
+)
+def stk_reconciler_metrics() -> Dict[str, Any]:
+    """
+    Last STK status reconciliation run: backlog, outcomes and throughput.
+    """
+    return dict(stk_reconcile_last_run)
@@ -1,11 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError
 
-from app.auth.dependencies import get_db
+from app.dependencies import get_claims, get_db
 from app.auth.password_utils import hash_password
-from app.auth.jwt_utils import SECRET_KEY, ALGORITHM
+from app.services.property_access_service import invalidate_property_access
 from app.utils.phone_utils import normalize_ke_phone
 
 from app.models.user_models import PropertyManager, ManagerUser
@@ -26,21 +24,11 @@ from app.schemas.agency_schemas import (
 )
 
 router = APIRouter(prefix="/agency", tags=["Agency"])
-bearer = HTTPBearer(auto_error=False)
 
 
 # ---------------------------
 # Auth helpers
 # ---------------------------
-def _decode(creds: HTTPAuthorizationCredentials) -> dict:
-    if not creds:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    try:
-        return jwt.decode(creds.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-
 def _require_manager(payload: dict) -> None:
     if payload.get("role") != "manager":
         raise HTTPException(status_code=403, detail="Not a manager session")
@@ -90,9 +78,8 @@ def _require_property_belongs_to_agency(db: Session, property_id: int, agency_ma
 @router.get("/staff", response_model=list[ManagerUserOut])
 def list_staff(
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
 
     _, manager_id = _get_ids(payload)
@@ -112,9 +99,8 @@ def list_staff(
 def create_staff(
     body: ManagerUserCreate,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
     _require_admin(payload)
 
@@ -157,9 +143,8 @@ def create_staff(
 def deactivate_staff(
     staff_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
     _require_admin(payload)
 
@@ -188,9 +173,8 @@ def deactivate_staff(
 def link_agent(
     body: LinkAgentRequest,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
     _require_admin(payload)
 
@@ -223,6 +207,7 @@ def link_agent(
     if link:
         link.status = "active"
         db.commit()
+        invalidate_property_access()
         db.refresh(link)
         return {
             "id": link.id,
@@ -238,6 +223,7 @@ def link_agent(
     )
     db.add(link)
     db.commit()
+    invalidate_property_access()
     db.refresh(link)
     return {
         "id": link.id,
@@ -251,9 +237,8 @@ def link_agent(
 @router.get("/agents", response_model=list[LinkAgentOut])
 def list_linked_agents(
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
 
     _, agency_manager_id = _get_ids(payload)
@@ -280,9 +265,8 @@ def list_linked_agents(
 def unlink_agent(
     agent_manager_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
     _require_admin(payload)
 
@@ -302,6 +286,7 @@ def unlink_agent(
 
     link.status = "inactive"
     db.commit()
+    invalidate_property_access()
     db.refresh(link)
     return {
         "id": link.id,
@@ -320,9 +305,8 @@ def assign_property_to_staff(
     property_id: int,
     assignee_user_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
     _require_admin(payload)
 
@@ -354,6 +338,7 @@ def assign_property_to_staff(
     )
     db.add(assignment)
     db.commit()
+    invalidate_property_access()
     db.refresh(assignment)
 
     return {
@@ -369,9 +354,8 @@ def assign_property_to_staff(
 def unassign_property_from_staff(
     property_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
     _require_admin(payload)
 
@@ -394,6 +378,8 @@ def unassign_property_from_staff(
 
     db.commit()
 
+    invalidate_property_access()
+
     return {"property_id": property_id, "active": False}
 
 
@@ -406,9 +392,8 @@ def assign_property_to_external_manager(
     property_id: int,
     agent_manager_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
     _require_admin(payload)
 
@@ -448,6 +433,7 @@ def assign_property_to_external_manager(
     )
     db.add(row)
     db.commit()
+    invalidate_property_access()
     db.refresh(row)
 
     return {
@@ -463,9 +449,8 @@ def assign_property_to_external_manager(
 def unassign_property_from_external_agent(
     property_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
     _require_admin(payload)
 
@@ -487,6 +472,8 @@ def unassign_property_from_external_agent(
 
     db.commit()
 
+    invalidate_property_access()
+
     return {"property_id": property_id, "active": False}
 
 
@@ -497,9 +484,8 @@ def unassign_property_from_external_agent(
 @router.get("/assignments/staff")
 def list_staff_assignments(
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
     _require_admin(payload)
 
@@ -533,9 +519,8 @@ def list_staff_assignments(
 @router.get("/assignments/external")
 def list_external_assignments(
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_manager(payload)
     _require_admin(payload)
 
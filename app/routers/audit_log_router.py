@@ -1,7 +1,7 @@
 # app/routers/audit_log_router.py
 from __future__ import annotations
 
-from typing import List, Optional, Dict, Any, Set
+from typing import List, Optional, Dict, Any
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
@@ -11,7 +11,7 @@ from app.schemas.audit_log_schema import AuditLogOut
 from app.crud import audit_log_crud
 
 from app import models
-from app.models.agency_models import PropertyAgentAssignment, PropertyExternalManagerAssignment
+from app.services.property_access_service import visible_property_ids
 
 router = APIRouter(prefix="/audit-logs", tags=["Audit Logs"])
 
@@ -54,58 +54,9 @@ def my_audit_logs(
     limit: int = Query(50, ge=1, le=200),
     q: Optional[str] = Query(None),
 ):
-    role = (current or {}).get("role")
-    sub = int((current or {}).get("sub", 0) or 0)
-
-    # Admin: sees everything
-    if role == "admin" or "super_admin":
-        rows = audit_log_crud.list_logs(db, property_ids=None, limit=limit, q=q)
-        return _enrich(db, rows)
-
-    # Landlord: only properties they own
-    if role == "landlord":
-        prop_ids = [
-            p.id for p in db.query(models.Property.id).filter(models.Property.landlord_id == sub).all()
-        ]
-        rows = audit_log_crud.list_logs(db, property_ids=prop_ids, limit=limit, q=q)
-        return _enrich(db, rows)
-
-    # Manager/Property_manager:
-    # IMPORTANT: your manager JWT uses:
-    #  - sub = staff_id
-    #  - manager_id = org id
-    manager_id = None
-    try:
-        manager_id = int((current or {}).get("manager_id") or 0) or None
-    except Exception:
-        manager_id = None
-
-    staff_id = sub
-
-    # A) org-managed
-    q_org = db.query(models.Property.id).filter(models.Property.manager_id == manager_id) if manager_id else db.query(models.Property.id).filter(False)
-
-    # B) staff assignments
-    q_staff = (
-        db.query(models.Property.id)
-        .join(PropertyAgentAssignment, PropertyAgentAssignment.property_id == models.Property.id)
-        .filter(
-            PropertyAgentAssignment.assignee_user_id == staff_id,
-            PropertyAgentAssignment.active == True,  # noqa
-        )
+    # Admins see everything (None); landlords/managers their visible properties
+    prop_ids = visible_property_ids(db, current or {})
+    rows = audit_log_crud.list_logs(
+        db, property_ids=list(prop_ids) if prop_ids is not None else None, limit=limit, q=q
     )
-
-    # C) external manager assignment (org-level)
-    q_ext = (
-        db.query(models.Property.id)
-        .join(PropertyExternalManagerAssignment, PropertyExternalManagerAssignment.property_id == models.Property.id)
-        .filter(
-            PropertyExternalManagerAssignment.agent_manager_id == manager_id,
-            PropertyExternalManagerAssignment.active == True,  # noqa
-        )
-    ) if manager_id else db.query(models.Property.id).filter(False)
-
-    ids: Set[int] = set([r[0] for r in q_org.all()] + [r[0] for r in q_staff.all()] + [r[0] for r in q_ext.all()])
-
-    rows = audit_log_crud.list_logs(db, property_ids=list(ids), limit=limit, q=q)
-    return _enrich(db, rows)
\ No newline at end of file
+    return _enrich(db, rows)
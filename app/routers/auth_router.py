@@ -1,9 +1,16 @@
 from datetime import date
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
-from app.auth.password_utils import hash_password, verify_password
+from app.auth.password_utils import (
+    PasswordHasherBusy,
+    hash_password,
+    hash_password_async,
+    verify_and_update_async,
+)
 from app.auth.jwt_utils import create_access_token
 from app.auth.dependencies import get_db
 from app.schemas.auth_schemas import (
@@ -33,9 +40,12 @@ from app.services.otp_service import (
     mark_otp_used,
 )
 from app.services.notification_service import notify_email
+from app.services import ledger_service
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+SELF_REGISTER_ROLES = {"landlord", "manager", "tenant"}
+
 
 def clean_email(email: str | None) -> str | None:
     e = (email or "").strip().lower()
@@ -59,8 +69,35 @@ def exists_by_email_or_phone(db: Session, model, email: str | None, phone: str |
     return db.query(db.query(model.id).filter(or_(*conds)).exists()).scalar()
 
 
+async def _check_password(db: Session, user, attr: str, password: Optional[str]) -> None:
+    """
+    Verify `password` against `user.<attr>` and transparently store a new
+    hash when the stored one uses a different bcrypt cost factor.
+    """
+    if not password:
+        raise HTTPException(status_code=401, detail="Invalid password")
+    ok, new_hash = await verify_and_update_async(password, getattr(user, attr))
+    if not ok:
+        raise HTTPException(status_code=401, detail="Invalid password")
+    if new_hash:
+        setattr(user, attr, new_hash)
+        await run_in_threadpool(db.commit)
+
+
 @router.post("/register")
-def register_user(data: RegisterUser, db: Session = Depends(get_db)):
+async def register_user(data: RegisterUser, db: Session = Depends(get_db)):
+    """
+    Hash the password on the bcrypt executor (awaited, so no request worker
+    waits on it), then run the database work in the threadpool.
+    """
+    role = (data.role or "").strip().lower()
+    password_hash = None
+    if data.password and role in SELF_REGISTER_ROLES and clean_phone(data.phone):
+        password_hash = await hash_password_async(data.password)
+    return await run_in_threadpool(_register_user, db, data, password_hash)
+
+
+def _register_user(db: Session, data: RegisterUser, password_hash: Optional[str]):
     try:
         email = clean_email(data.email)
         phone = clean_phone(data.phone)
@@ -94,7 +131,7 @@ def register_user(data: RegisterUser, db: Session = Depends(get_db)):
                 name=data.name.strip(),
                 phone=phone,
                 email=email,
-                password=hash_password(data.password),
+                password=password_hash,
                 id_number=data.id_number,
             )
             db.add(user)
@@ -158,7 +195,7 @@ def register_user(data: RegisterUser, db: Session = Depends(get_db)):
                 name=staff_display_name,
                 phone=phone,
                 email=email,
-                password_hash=hash_password(data.password),
+                password_hash=password_hash,
                 id_number=data.id_number,
                 staff_role="manager_admin",
                 active=True,
@@ -232,15 +269,13 @@ def register_user(data: RegisterUser, db: Session = Depends(get_db)):
             if int(getattr(unit, "occupied", 0) or 0) == 1:
                 raise HTTPException(status_code=409, detail="Unit already occupied")
 
-            tenant_password = hash_password(data.password) if data.password else None
-
             user = Tenant(
                 name=data.name.strip(),
                 phone=normalize_ke_phone(phone),
                 email=email,
                 property_id=prop.id,
                 unit_id=unit.id,
-                password=tenant_password,
+                password=password_hash,
                 id_number=data.id_number,
             )
             db.add(user)
@@ -257,6 +292,7 @@ def register_user(data: RegisterUser, db: Session = Depends(get_db)):
             )
             db.add(lease)
             unit.occupied = 1
+            ledger_service.sync_lease(db, lease)
 
             db.commit()
             db.refresh(user)
@@ -280,8 +316,16 @@ def register_user(data: RegisterUser, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _first_by_phone(db: Session, model, phone: str, *criteria):
+    return db.query(model).filter(model.phone == phone, *criteria).first()
+
+
 @router.post("/login")
-def login_user(data: LoginUser, db: Session = Depends(get_db)):
+async def login_user(data: LoginUser, db: Session = Depends(get_db)):
+    """
+    Lookups run in the threadpool and the bcrypt check is awaited on the
+    hasher executor, so a login burst does not occupy the request workers.
+    """
     role = (data.role or "").strip().lower()
 
     phone = clean_phone(data.phone)
@@ -292,31 +336,31 @@ def login_user(data: LoginUser, db: Session = Depends(get_db)):
         )
 
     if role == "manager":
-        staff = db.query(ManagerUser).filter(
-            ManagerUser.phone == phone,
-            ManagerUser.active == True,  # noqa: E712
-        ).first()
+        staff = await run_in_threadpool(
+            _first_by_phone, db, ManagerUser, phone, ManagerUser.active == True,  # noqa: E712
+        )
 
         if not staff:
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        if not data.password or not verify_password(data.password, staff.password_hash):
-            raise HTTPException(status_code=401, detail="Invalid password")
+        # read before a rehash commit expires the instance
+        staff_id, manager_id, staff_role = staff.id, staff.manager_id, staff.staff_role
+        await _check_password(db, staff, "password_hash", data.password)
 
         token = create_access_token(
             {
-                "sub": str(staff.id),
+                "sub": str(staff_id),
                 "role": "manager",
-                "manager_id": staff.manager_id,
-                "staff_role": staff.staff_role,
+                "manager_id": manager_id,
+                "staff_role": staff_role,
             }
         )
 
         return {
             "access_token": token,
             "token_type": "bearer",
-            "id": staff.id,
-            "manager_id": staff.manager_id,
+            "id": staff_id,
+            "manager_id": manager_id,
             "role": "manager",
         }
 
@@ -330,7 +374,7 @@ def login_user(data: LoginUser, db: Session = Depends(get_db)):
     if not model:
         raise HTTPException(status_code=400, detail="Invalid role")
 
-    user = db.query(model).filter(model.phone == phone).first()
+    user = await run_in_threadpool(_first_by_phone, db, model, phone)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
@@ -340,11 +384,11 @@ def login_user(data: LoginUser, db: Session = Depends(get_db)):
     if not getattr(user, "password", None):
         raise HTTPException(status_code=401, detail="Account has no password set")
 
-    if not data.password or not verify_password(data.password, user.password):
-        raise HTTPException(status_code=401, detail="Invalid password")
+    user_id = user.id
+    await _check_password(db, user, "password", data.password)
 
-    token = create_access_token({"sub": str(user.id), "role": role})
-    return {"access_token": token, "token_type": "bearer", "id": user.id, "role": role}
+    token = create_access_token({"sub": str(user_id), "role": role})
+    return {"access_token": token, "token_type": "bearer", "id": user_id, "role": role}
 
 
 # ==========================================================
@@ -452,7 +496,7 @@ def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_db)):
 
         return {"message": "Password reset successfully"}
 
-    except HTTPException:
+    except (HTTPException, PasswordHasherBusy):
         db.rollback()
         raise
     except Exception as e:
@@ -1,5 +1,6 @@
 # app/routers/bulk_router.py
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import csv
 from io import StringIO
@@ -19,6 +20,11 @@ async def import_units_csv(
         raise HTTPException(status_code=400, detail="Please upload a CSV file")
 
     text = (await file.read()).decode("utf-8-sig")
+    # row-by-row queries are blocking; keep them off the event loop
+    return await run_in_threadpool(_import_units, db, property_id, text)
+
+
+def _import_units(db: Session, property_id: int, text: str):
     reader = csv.DictReader(StringIO(text))
     required = {"number", "rent_amount"}
     if not required.issubset(set([c.strip() for c in reader.fieldnames or []])):
@@ -59,6 +65,11 @@ async def import_tenants_csv(
         raise HTTPException(status_code=400, detail="Please upload a CSV file")
 
     text = (await file.read()).decode("utf-8-sig")
+    # row-by-row queries are blocking; keep them off the event loop
+    return await run_in_threadpool(_import_tenants, db, property_id, text)
+
+
+def _import_tenants(db: Session, property_id: int, text: str):
     reader = csv.DictReader(StringIO(text))
     required = {"name", "phone"}
     if not required.issubset(set([c.strip() for c in reader.fieldnames or []])):
@@ -1,5 +1,6 @@
 # app/routers/bulk_upload.py
 from fastapi import APIRouter, UploadFile, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import pandas as pd
 from .. import models
@@ -16,6 +17,12 @@ def is_valid_email(email: str) -> bool:
     return re.match(r"[^@]+@[^@]+\.[^@]+", email) is not None
 
 
+def _read_frame(filename: str, contents: bytes) -> pd.DataFrame:
+    if filename.endswith(".csv"):
+        return pd.read_csv(BytesIO(contents))
+    return pd.read_excel(BytesIO(contents))
+
+
 # ----------------------------
 # Tenants Bulk Upload
 # ----------------------------
@@ -25,10 +32,12 @@ async def bulk_upload_tenants(file: UploadFile, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="File must be .csv or .xlsx")
 
     contents = await file.read()
-    if file.filename.endswith(".csv"):
-        df = pd.read_csv(BytesIO(contents))
-    else:
-        df = pd.read_excel(BytesIO(contents))
+    # parsing and the per-row queries are blocking; keep them off the event loop
+    return await run_in_threadpool(_import_tenants, db, file.filename, contents)
+
+
+def _import_tenants(db: Session, filename: str, contents: bytes):
+    df = _read_frame(filename, contents)
 
     required_cols = {"name", "email", "phone"}
     if not required_cols.issubset(df.columns):
@@ -78,10 +87,12 @@ async def bulk_upload_units(file: UploadFile, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="File must be .csv or .xlsx")
 
     contents = await file.read()
-    if file.filename.endswith(".csv"):
-        df = pd.read_csv(BytesIO(contents))
-    else:
-        df = pd.read_excel(BytesIO(contents))
+    # parsing and the per-row queries are blocking; keep them off the event loop
+    return await run_in_threadpool(_import_units, db, file.filename, contents)
+
+
+def _import_units(db: Session, filename: str, contents: bytes):
+    df = _read_frame(filename, contents)
 
     required_cols = {"number", "rent_amount", "property_id"}
     if not required_cols.issubset(df.columns):
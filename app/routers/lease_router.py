@@ -15,6 +15,7 @@ from app.dependencies import get_db, get_current_user
 from app.schemas.lease_schema import LeaseCreate, LeaseUpdate, LeaseOut
 from app.crud import lease_crud
 from app import models
+from app.services import ledger_service
 
 router = APIRouter(prefix="/leases", tags=["Leases"])
 
@@ -410,6 +411,7 @@ def activate_lease(
         raise HTTPException(status_code=400, detail="Accept terms first")
 
     lease.active = 1
+    ledger_service.sync_lease(db, lease)
     db.commit()
 
     return {"ok": True}
@@ -6,7 +6,7 @@ from typing import List, Optional
 from datetime import datetime
 from sqlalchemy import func
 
-from app.dependencies import get_db, get_current_user
+from app.dependencies import get_db, get_read_db, get_current_user
 from app import models
 from app.schemas import maintenance_schema as schemas
 from app.schemas.notification_schema import NotificationCreate
@@ -350,7 +350,7 @@ def delete_request(mr_id: int, db: Session = Depends(get_db)):
 # -----------------------------
 @router.get("/maintenance/reports/monthly", tags=["Reports"])
 def monthly_maintenance_report(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     year: int = datetime.utcnow().year,
     unit_id: Optional[int] = None,
 ):
@@ -371,7 +371,7 @@ def monthly_maintenance_report(
 # -----------------------------
 @router.get("/maintenance/reports/status-summary", tags=["Reports"])
 def status_summary(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     unit_id: Optional[int] = None,
@@ -397,7 +397,7 @@ def status_summary(
 # -----------------------------
 @router.get("/maintenance/reports/average-resolution", tags=["Reports"])
 def average_resolution_time(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     unit_id: Optional[int] = None,
 ):
     resolved = (
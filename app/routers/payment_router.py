@@ -1,26 +1,30 @@
 from __future__ import annotations
 
 import json
+import logging
 from datetime import date, datetime
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Response
 from sqlalchemy.orm import Session, joinedload
 
 from app import models
 from app.dependencies import get_db, get_current_user
+from app.services import idempotency_service, webhook_inbox_service
 from app.services.daraja_service import daraja_client
+from app.services.payment_allocation_service import (
+    allocate_payment,
+    build_mpesa_notes,
+    period_balance,
+    safe_decimal,
+    selected_periods,
+)
 from app.services.payment_event_service import handle_payment_success
 
-router = APIRouter(prefix="/payments", tags=["Payments"])
-
+logger = logging.getLogger(__name__)
 
-def _safe_decimal(v) -> Decimal:
-    try:
-        return Decimal(str(v or "0"))
-    except Exception:
-        return Decimal("0")
+router = APIRouter(prefix="/payments", tags=["Payments"])
 
 
 def _yyyymm(d: date) -> str:
@@ -81,32 +85,10 @@ def _get_lease_or_404(db: Session, lease_id: int) -> models.Lease:
     return lease
 
 
-def _sum_allocated_for_period(db: Session, lease_id: int, period: str) -> Decimal:
-    allocations = (
-        db.query(models.PaymentAllocation)
-        .filter(models.PaymentAllocation.lease_id == lease_id)
-        .filter(models.PaymentAllocation.period == period)
-        .all()
-    )
-    total = Decimal("0")
-    for a in allocations:
-        total += _safe_decimal(a.amount_applied)
-    return total
-
-
-def _period_balance(db: Session, lease: models.Lease, period: str) -> Decimal:
-    rent = _safe_decimal(lease.rent_amount)
-    already_paid = _sum_allocated_for_period(db, lease.id, period)
-    balance = rent - already_paid
-    if balance < Decimal("0"):
-        return Decimal("0")
-    return balance
-
-
 def _validate_periods_not_fully_paid(db: Session, lease: models.Lease, periods: List[str]) -> None:
     fully_paid: List[str] = []
     for period in periods:
-        if _period_balance(db, lease, period) <= Decimal("0"):
+        if period_balance(db, lease, period) <= Decimal("0"):
             fully_paid.append(period)
 
     if fully_paid:
@@ -146,122 +128,6 @@ def _extract_callback_metadata_items(stk: Dict[str, Any]) -> Dict[str, Any]:
     return result
 
 
-def _format_mpesa_transaction_date(raw: Any) -> Optional[str]:
-    if raw is None:
-        return None
-    s = str(raw).strip()
-    if not s:
-        return None
-    try:
-        dt_obj = datetime.strptime(s, "%Y%m%d%H%M%S")
-        return dt_obj.isoformat()
-    except Exception:
-        return s
-
-
-def _build_mpesa_notes(
-    *,
-    existing_notes: Optional[str],
-    result_code: Any,
-    result_desc: Any,
-    merchant_request_id: Any,
-    checkout_request_id: Any,
-    amount: Any = None,
-    receipt: Any = None,
-    phone: Any = None,
-    transaction_date: Any = None,
-    unapplied_amount: Any = None,
-) -> str:
-    data: Dict[str, Any] = {}
-
-    if existing_notes:
-        try:
-            maybe = json.loads(existing_notes)
-            if isinstance(maybe, dict):
-                data = maybe
-        except Exception:
-            data = {}
-
-    data.update({
-        "provider": "mpesa",
-        "result_code": result_code,
-        "result_desc": result_desc,
-        "merchant_request_id": merchant_request_id,
-        "checkout_request_id": checkout_request_id,
-        "mpesa_amount": float(amount) if amount is not None else None,
-        "mpesa_receipt_number": str(receipt) if receipt is not None else None,
-        "mpesa_phone_number": str(phone) if phone is not None else None,
-        "mpesa_transaction_date_raw": str(transaction_date) if transaction_date is not None else None,
-        "mpesa_transaction_date_iso": _format_mpesa_transaction_date(transaction_date),
-        "unapplied_amount": float(unapplied_amount) if unapplied_amount is not None else None,
-    })
-
-    return json.dumps(data)
-
-
-def allocate_payment(
-    db: Session,
-    *,
-    payment: models.Payment,
-    lease: models.Lease,
-    periods: List[str],
-) -> Dict[str, Any]:
-    existing_allocs = (
-        db.query(models.PaymentAllocation)
-        .filter(models.PaymentAllocation.payment_id == payment.id)
-        .all()
-    )
-    if existing_allocs:
-        total_existing = sum((_safe_decimal(a.amount_applied) for a in existing_allocs), Decimal("0"))
-        return {
-            "allocations": existing_allocs,
-            "remaining": _safe_decimal(payment.amount) - total_existing,
-        }
-
-    remaining = _safe_decimal(payment.amount)
-    created = []
-
-    for period in periods:
-        if remaining <= 0:
-            break
-
-        balance = _period_balance(db, lease, period)
-        if balance <= 0:
-            continue
-
-        apply_amt = balance if remaining >= balance else remaining
-
-        alloc = models.PaymentAllocation(
-            payment_id=payment.id,
-            tenant_id=payment.tenant_id,
-            unit_id=payment.unit_id,
-            lease_id=payment.lease_id,
-            period=period,
-            amount_applied=apply_amt,
-        )
-        db.add(alloc)
-        created.append(alloc)
-        remaining -= apply_amt
-
-    # keep excess as explicit credit row instead of silently overpaying a cleared month
-    if remaining > 0:
-        credit_alloc = models.PaymentAllocation(
-            payment_id=payment.id,
-            tenant_id=payment.tenant_id,
-            unit_id=payment.unit_id,
-            lease_id=payment.lease_id,
-            period="CREDIT",
-            amount_applied=remaining,
-        )
-        db.add(credit_alloc)
-        created.append(credit_alloc)
-
-    return {
-        "allocations": created,
-        "remaining": remaining,
-    }
-
-
 def _serialize_payment_response(payment: models.Payment, periods: List[str], receipt_obj=None) -> Dict[str, Any]:
     return {
         "ok": True,
@@ -276,9 +142,27 @@ def _serialize_payment_response(payment: models.Payment, periods: List[str], rec
 @router.post("/record")
 def record_payment(
     payload: Dict[str, Any],
+    response: Response,
     db: Session = Depends(get_db),
     current: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
+    """
+    Record a manual payment. Send an Idempotency-Key header to make retries
+    safe: a repeat with the same key and body returns the first response.
+    """
+    return idempotency_service.run(
+        db,
+        key=idempotency_key,
+        scope="POST /payments/record",
+        current=current,
+        payload=payload,
+        response=response,
+        fn=lambda: _record_payment(db, payload),
+    )
+
+
+def _record_payment(db: Session, payload: Dict[str, Any]) -> Dict[str, Any]:
     lease_id = payload.get("lease_id")
     amount = payload.get("amount")
 
@@ -287,7 +171,7 @@ def record_payment(
     if amount is None:
         raise HTTPException(status_code=400, detail="amount is required")
 
-    amount_dec = _safe_decimal(amount)
+    amount_dec = safe_decimal(amount)
     if amount_dec <= 0:
         raise HTTPException(status_code=400, detail="amount must be greater than 0")
 
@@ -332,7 +216,7 @@ def record_payment(
         periods=periods,
     )
 
-    payment.notes = _build_mpesa_notes(
+    payment.notes = build_mpesa_notes(
         existing_notes=payment.notes,
         result_code=0,
         result_desc="Manual payment recorded",
@@ -358,16 +242,41 @@ def record_payment(
         .first()
     )
 
-    receipt = handle_payment_success(db, payment)
+    # the payment is committed; a receipt/notification failure must not fail the request
+    try:
+        receipt = handle_payment_success(db, payment)
+    except Exception:
+        # it commits internally; leave the session usable for the idempotency update
+        db.rollback()
+        logger.exception("Receipt/notification failed for payment %s", payment.id)
+        receipt = None
     return _serialize_payment_response(payment, periods, receipt)
 
 
 @router.post("/mpesa/initiate")
 def initiate_mpesa(
     payload: Dict[str, Any],
+    response: Response,
     db: Session = Depends(get_db),
     current: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
+    """
+    Start an STK push. With an Idempotency-Key header a retried request
+    returns the first response instead of prompting the phone again.
+    """
+    return idempotency_service.run(
+        db,
+        key=idempotency_key,
+        scope="POST /payments/mpesa/initiate",
+        current=current,
+        payload=payload,
+        response=response,
+        fn=lambda: _initiate_mpesa(db, payload, current),
+    )
+
+
+def _initiate_mpesa(db: Session, payload: Dict[str, Any], current: dict) -> Dict[str, Any]:
     lease_id = payload.get("lease_id")
     amount = payload.get("amount")
     phone = payload.get("phone")
@@ -377,7 +286,7 @@ def initiate_mpesa(
     if amount is None:
         raise HTTPException(status_code=400, detail="amount is required")
 
-    amount_dec = _safe_decimal(amount)
+    amount_dec = safe_decimal(amount)
     if amount_dec <= 0:
         raise HTTPException(status_code=400, detail="amount must be greater than 0")
 
@@ -446,11 +355,19 @@ def initiate_mpesa(
     }
 
 
+# plain def: FastAPI runs it in the threadpool, so the blocking insert
+# never stalls the event loop
 @router.post("/webhooks/daraja")
-async def daraja_callback(
+def daraja_callback(
     data: Dict[str, Any] = Body(...),
     db: Session = Depends(get_db),
 ):
+    """
+    Store the callback in the webhook inbox and acknowledge at once; payment
+    matching, allocation, receipts and notifications run in the inbox
+    workers (process_daraja_callback). Provider retries of the same
+    CheckoutRequestID are acknowledged without being stored again.
+    """
     stk = data.get("Body", {}).get("stkCallback", {})
     if not stk:
         return {
@@ -458,23 +375,54 @@ async def daraja_callback(
             "ResultDesc": "No stkCallback in payload",
         }
 
+    checkout_request_id = stk.get("CheckoutRequestID")
+    if not checkout_request_id:
+        return {
+            "ResultCode": 0,
+            "ResultDesc": "Missing CheckoutRequestID in callback",
+        }
+
+    event_id, created = webhook_inbox_service.record(db, "daraja", data, event_key=checkout_request_id)
+    return {
+        "ResultCode": 0,
+        "ResultDesc": "Accepted" if created else "Duplicate callback ignored",
+        "event_id": event_id,
+    }
+
+
+@webhook_inbox_service.register_handler("daraja")
+def process_daraja_callback(db: Session, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a stored Daraja STK callback: match the payment, allocate it and
+    trigger receipt + notifications. Idempotent: an already paid payment is
+    left alone. Raises LookupError while no payment matches, so the inbox
+    retries the event.
+    """
+    stk = data.get("Body", {}).get("stkCallback", {})
     result_code = stk.get("ResultCode", 1)
     result_desc = stk.get("ResultDesc", "Unknown callback response")
     merchant_request_id = stk.get("MerchantRequestID")
     checkout_request_id = stk.get("CheckoutRequestID")
 
+    # cheap dedup before any joined loads: replays of a settled payment stop here
+    settled = (
+        db.query(models.Payment.id)
+        .filter(models.Payment.checkout_request_id == checkout_request_id)
+        .filter(models.Payment.status == models.PaymentStatus.paid)
+        .first()
+    )
+    if settled is not None:
+        return {
+            "ResultCode": 0,
+            "ResultDesc": "Payment already processed",
+        }
+
     items = _extract_callback_metadata_items(stk)
     amount = items.get("Amount")
     receipt = items.get("MpesaReceiptNumber")
     phone = items.get("PhoneNumber")
     transaction_date = items.get("TransactionDate")
 
-    if not checkout_request_id:
-        return {
-            "ResultCode": 0,
-            "ResultDesc": "Missing CheckoutRequestID in callback",
-        }
-
     payment = (
         db.query(models.Payment)
         .options(
@@ -500,10 +448,11 @@ async def daraja_callback(
         )
 
     if payment is None:
-        return {
-            "ResultCode": 0,
-            "ResultDesc": "No matching payment found",
-        }
+        # the callback can beat the commit of the payment row in _initiate_mpesa;
+        # raising puts the inbox event on retry with backoff instead of done
+        raise LookupError(
+            f"No payment for CheckoutRequestID {checkout_request_id!r} / MerchantRequestID {merchant_request_id!r} yet"
+        )
 
     if payment.status == models.PaymentStatus.paid:
         return {
@@ -513,7 +462,7 @@ async def daraja_callback(
 
     if result_code != 0:
         payment.status = models.PaymentStatus.failed
-        payment.notes = _build_mpesa_notes(
+        payment.notes = build_mpesa_notes(
             existing_notes=payment.notes,
             result_code=result_code,
             result_desc=result_desc,
@@ -534,7 +483,7 @@ async def daraja_callback(
         }
 
     if amount is not None:
-        payment.amount = _safe_decimal(amount)
+        payment.amount = safe_decimal(amount)
 
     if receipt:
         payment.reference = str(receipt)
@@ -545,18 +494,7 @@ async def daraja_callback(
     payment.status = models.PaymentStatus.paid
     payment.paid_date = date.today()
 
-    periods: List[str] = []
-    if payment.selected_periods_json:
-        try:
-            maybe = json.loads(payment.selected_periods_json)
-            if isinstance(maybe, list):
-                periods = [str(x) for x in maybe if str(x).strip()]
-        except Exception:
-            periods = []
-
-    if not periods and payment.period:
-        periods = [payment.period]
-
+    periods = selected_periods(payment)
     lease = _get_lease_or_404(db, payment.lease_id)
 
     alloc_result = allocate_payment(
@@ -566,7 +504,7 @@ async def daraja_callback(
         periods=periods,
     )
 
-    payment.notes = _build_mpesa_notes(
+    payment.notes = build_mpesa_notes(
         existing_notes=payment.notes,
         result_code=result_code,
         result_desc=result_desc,
@@ -1,11 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
-from typing import List, Optional
-from jose import jwt, JWTError
+from typing import List
 
-from app.auth.dependencies import get_db
+from app.dependencies import get_claims, get_db
 from app.schemas.property_manager_schema import (
     PropertyManagerCreate,
     PropertyManagerUpdate,
@@ -15,11 +13,7 @@ from app.models.user_models import PropertyManager, ManagerUser
 from app.auth.password_utils import hash_password
 from app.utils.phone_utils import normalize_ke_phone
 
-# IMPORTANT: set this to match your jwt_utils secret/algorithm
-from app.auth.jwt_utils import SECRET_KEY, ALGORITHM
-
 router = APIRouter(prefix="/managers", tags=["Property Managers"])
-bearer = HTTPBearer(auto_error=False)
 
 
 def _clean_email(email: str | None) -> str | None:
@@ -44,22 +38,11 @@ def _exists_by_email_or_phone(db: Session, email: str | None, phone: str | None)
     return db.query(db.query(PropertyManager.id).filter(or_(*conds)).exists()).scalar()
 
 
-def _decode_token(creds: Optional[HTTPAuthorizationCredentials]) -> dict:
-    if not creds:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    try:
-        payload = jwt.decode(creds.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-
 @router.get("/me")
 def manager_me(
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode_token(creds)
     role = payload.get("role")
     if role != "manager":
         raise HTTPException(status_code=403, detail="Not a manager session")
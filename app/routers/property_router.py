@@ -2,34 +2,18 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import func
-from jose import jwt, JWTError
 from pydantic import BaseModel
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
-from app.auth.dependencies import get_db
-from app.auth.jwt_utils import SECRET_KEY, ALGORITHM
+from app.dependencies import get_claims, get_db
+from app.services.property_access_service import can_access_property, visible_property_ids
 
 from app.models.property_models import Property, Unit, Lease
 from app.models.user_models import Landlord, PropertyManager
-from app.models.agency_models import (
-    PropertyAgentAssignment,
-    PropertyExternalManagerAssignment,
-)
 
 router = APIRouter(prefix="/properties", tags=["Properties"])
-bearer = HTTPBearer(auto_error=False)
-
-
-def _decode(creds: Optional[HTTPAuthorizationCredentials]) -> dict:
-    if not creds:
-        raise HTTPException(status_code=401, detail="Not authenticated")
-    try:
-        return jwt.decode(creds.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
 
 
 def _require_roles(payload: dict, allowed: set[str]):
@@ -56,17 +40,16 @@ def _manager_id_int(payload: dict) -> int:
 @router.get("/me")
 def properties_visible_to_me(
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
     """
     Returns properties the logged-in manager staff can access.
 
-    Visibility rules:
+    Visibility rules (see property_access_service):
     A) Properties owned by my org: Property.manager_id == my manager_id
     B) Properties assigned to me (internal staff assignment)
     C) Properties assigned to my org as an external agent (external assignment)
     """
-    payload = _decode(creds)
     if payload.get("role") != "manager":
         raise HTTPException(status_code=403, detail="Not a manager session")
 
@@ -75,30 +58,7 @@ def properties_visible_to_me(
     if not staff_id or not manager_id:
         raise HTTPException(status_code=401, detail="Invalid token payload")
 
-    # A) org-managed
-    q_org = db.query(Property.id).filter(Property.manager_id == manager_id)
-
-    # B) staff assignments
-    q_staff = (
-        db.query(Property.id)
-        .join(PropertyAgentAssignment, PropertyAgentAssignment.property_id == Property.id)
-        .filter(
-            PropertyAgentAssignment.assignee_user_id == staff_id,
-            PropertyAgentAssignment.active == True,  # noqa
-        )
-    )
-
-    # C) external manager assignment (org-level)
-    q_ext = (
-        db.query(Property.id)
-        .join(PropertyExternalManagerAssignment, PropertyExternalManagerAssignment.property_id == Property.id)
-        .filter(
-            PropertyExternalManagerAssignment.agent_manager_id == manager_id,
-            PropertyExternalManagerAssignment.active == True,  # noqa
-        )
-    )
-
-    ids = set([r[0] for r in q_org.all()] + [r[0] for r in q_staff.all()] + [r[0] for r in q_ext.all()])
+    ids = visible_property_ids(db, payload)
     if not ids:
         return []
 
@@ -121,9 +81,8 @@ def properties_visible_to_me(
 @router.get("/")
 def list_all_properties_admin(
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_roles(payload, {"admin", "super_admin"})
 
     rows = db.query(Property).order_by(Property.id.desc()).all()
@@ -145,13 +104,12 @@ def list_all_properties_admin(
 def create_property(
     payload_in: dict,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
     """
     Expected keys: name, address, landlord_id, (optional) manager_id
     Allowed: admin or manager(org) (optional policy)
     """
-    payload = _decode(creds)
     _require_roles(payload, {"admin", "manager", "super_admin"})
 
     name = (payload_in.get("name") or "").strip()
@@ -190,9 +148,8 @@ def create_property(
 def properties_by_landlord(
     landlord_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     role = payload.get("role")
     sub = _sub_int(payload)
 
@@ -223,13 +180,12 @@ def properties_by_landlord(
 def properties_by_manager(
     manager_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     role = payload.get("role")
 
     # admin can view any manager properties
-    if role == "admin" or "super_admin":
+    if role in ("admin", "super_admin"):
         pass
     # manager can only view own org id
     elif role == "manager":
@@ -286,12 +242,10 @@ def get_assigned_property_manager(property_id: int, db: Session = Depends(get_db
 def property_with_units_detailed(
     property_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     role = payload.get("role")
     sub = _sub_int(payload)
-    my_manager_id = _manager_id_int(payload)
 
     prop = (
         db.query(Property)
@@ -315,7 +269,7 @@ def property_with_units_detailed(
         if int(prop.landlord_id or 0) != sub:
             raise HTTPException(status_code=403, detail="Forbidden")
     elif role == "manager":
-        if int(prop.manager_id or 0) != my_manager_id:
+        if not can_access_property(db, payload, prop.id):
             raise HTTPException(status_code=403, detail="Forbidden")
     else:
         raise HTTPException(status_code=403, detail="Forbidden")
@@ -389,25 +343,23 @@ def property_with_units_detailed(
 def get_property(
     property_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     role = payload.get("role")
     sub = _sub_int(payload)
-    my_manager_id = _manager_id_int(payload)
 
     p = db.query(Property).filter(Property.id == property_id).first()
     if not p:
         raise HTTPException(status_code=404, detail="Property not found")
 
     # auth (basic)
-    if role == "admin" or "super_admin":
+    if role in ("admin", "super_admin"):
         pass
     elif role == "landlord":
         if int(p.landlord_id or 0) != sub:
             raise HTTPException(status_code=403, detail="Forbidden")
     elif role == "manager":
-        if int(p.manager_id or 0) != my_manager_id:
+        if not can_access_property(db, payload, p.id):
             raise HTTPException(status_code=403, detail="Forbidden")
     else:
         raise HTTPException(status_code=403, detail="Forbidden")
@@ -428,9 +380,8 @@ def update_property(
     property_id: int,
     payload_in: dict,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_roles(payload, {"admin","super_admin", "manager"})
 
     p = db.query(Property).filter(Property.id == property_id).first()
@@ -470,9 +421,8 @@ def update_property(
 def delete_property(
     property_id: int,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_roles(payload, {"admin", "super_admin"})
 
     p = db.query(Property).filter(Property.id == property_id).first()
@@ -492,9 +442,8 @@ def assign_manager(
     property_id: int,
     payload_in: AssignManagerPayload,
     db: Session = Depends(get_db),
-    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    payload: dict = Depends(get_claims),
 ):
-    payload = _decode(creds)
     _require_roles(payload, {"admin", "super_admin"})
 
     prop = db.query(Property).filter(Property.id == property_id).first()
@@ -0,0 +1,97 @@
+# app/routers/report_jobs_router.py
+from __future__ import annotations
+
+import os
+from typing import Any, Dict
+
+from fastapi import APIRouter, Body, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.dependencies import get_db, get_current_user
+from app import models
+from app.services import report_job_service
+
+router = APIRouter(prefix="/reports/jobs", tags=["Reports: Jobs"])
+
+ADMIN_ROLES = ("admin", "super_admin")
+
+
+def _get_job_for(db: Session, job_id: int, current: Dict[str, Any]) -> models.ReportJob:
+    job = db.query(models.ReportJob).filter(models.ReportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+
+    role = current.get("role")
+    sub_id = int(current.get("sub", 0) or 0)
+    if role not in ADMIN_ROLES and (job.requested_by_role != role or job.requested_by_id != sub_id):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return job
+
+
+@router.post("", status_code=202)
+def create_report_job(
+    payload: Dict[str, Any] = Body(...),
+    db: Session = Depends(get_db),
+    current: Dict[str, Any] = Depends(get_current_user),
+) -> Dict[str, Any]:
+    """
+    Queue a report export. Body: {"kind": "...", "params": {...}}.
+    Identical in-flight (or still downloadable) requests return the same job.
+    """
+    kind = str(payload.get("kind") or "").strip()
+    params = payload.get("params") or {}
+    if not isinstance(params, dict):
+        raise HTTPException(status_code=400, detail="params must be an object")
+
+    spec = report_job_service.REPORT_KINDS.get(kind)
+    if spec is None:
+        raise HTTPException(status_code=400, detail=f"Unknown report kind: {kind}")
+
+    role = current.get("role")
+    sub_id = int(current.get("sub", 0) or 0)
+
+    if spec["roles"] is not None and role not in spec["roles"]:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if role == "tenant":
+        raise HTTPException(status_code=403, detail="Tenants cannot request reports")
+    try:
+        params = report_job_service.normalize_params(kind, params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if role == "landlord" and "landlord_id" in spec["required"]:
+        if params.get("landlord_id") != sub_id:
+            raise HTTPException(status_code=403, detail="Forbidden")
+
+    try:
+        job = report_job_service.enqueue(
+            db, kind, params, requested_by_role=role, requested_by_id=sub_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return report_job_service.serialize_job(job)
+
+
+@router.get("/{job_id}")
+def get_report_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current: Dict[str, Any] = Depends(get_current_user),
+) -> Dict[str, Any]:
+    return report_job_service.serialize_job(_get_job_for(db, job_id, current))
+
+
+@router.get("/{job_id}/download")
+def download_report_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current: Dict[str, Any] = Depends(get_current_user),
+):
+    job = _get_job_for(db, job_id, current)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Report is {job.status}")
+    if not job.file_path or not os.path.exists(job.file_path):
+        raise HTTPException(status_code=410, detail="Report file is no longer available")
+
+    return FileResponse(job.file_path, media_type=job.media_type, filename=job.file_name)
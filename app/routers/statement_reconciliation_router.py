@@ -0,0 +1,46 @@
+# app/routers/statement_reconciliation_router.py
+from __future__ import annotations
+
+import io
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.dependencies import role_required
+from app.services import statement_reconciliation_service
+
+router = APIRouter(
+    prefix="/admin/reconciliation",
+    tags=["Admin Reconciliation"],
+    dependencies=[Depends(role_required(["admin", "super_admin"]))],
+)
+
+
+@router.post("/mpesa-statement")
+async def reconcile_mpesa_statement(
+    file: UploadFile = File(...),
+    apply: bool = Query(False, description="Apply confirmed matches; default is a dry run"),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    """
+    Match a downloaded paybill statement (CSV) against recorded payments and
+    tenant phones. Returns matched, unmatched and discrepancy lines; with
+    apply=true the confirmed matches are allocated and receipted.
+    """
+    if not (file.filename or "").lower().endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Please upload a CSV statement")
+
+    def _run() -> Dict[str, Any]:
+        # read the spooled upload line by line instead of loading it whole
+        stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        try:
+            return statement_reconciliation_service.reconcile_statement(db, stream, apply=apply)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        finally:
+            stream.detach()
+
+    return await run_in_threadpool(_run)
@@ -6,70 +6,50 @@ from datetime import date, datetime
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
-import jwt
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from app.database import get_db
+from app.dependencies import get_claims, get_db
 from app import models
+from app.services import ledger_service
 
-try:
-    from app.core.config import settings
-    SECRET_KEY = settings.SECRET_KEY
-    ALGORITHM = getattr(settings, "ALGORITHM", "HS256")
-except Exception:
-    SECRET_KEY = "CHANGE_ME_SECRET"
-    ALGORITHM = "HS256"
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 router = APIRouter(prefix="/tenants/me", tags=["Tenant Portal"])
 
 
-def _decode_token(token: str) -> Dict[str, Any]:
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return {
-            "sub": payload.get("sub"),
-            "role": payload.get("role"),
-            "exp": payload.get("exp"),
-        }
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-
-
 def get_current_tenant(
     db: Session = Depends(get_db),
-    token: str = Depends(oauth2_scheme),
+    claims: Dict[str, Any] = Depends(get_claims),
 ) -> models.Tenant:
-    info = _decode_token(token)
-    if info.get("role") != "tenant":
+    if claims.get("role") != "tenant":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tenant role required")
 
-    tenant_id = info.get("sub")
+    tenant_id = claims.get("sub")
     if tenant_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token: no sub")
 
-    t = (
-        db.query(models.Tenant)
-        .options(
-            joinedload(models.Tenant.leases)
-            .joinedload(models.Lease.unit)
-            .joinedload(models.Unit.property),
-            joinedload(models.Tenant.payments),
-            joinedload(models.Tenant.maintenance_requests)
-            .joinedload(models.MaintenanceRequest.status),
-        )
-        .filter(models.Tenant.id == int(tenant_id))
-        .first()
-    )
+    return _tenant_principal(db, int(tenant_id))
+
+
+def _tenant_principal(db: Session, tenant_id: int) -> models.Tenant:
+    """
+    Lean principal: the tenant row only. Each endpoint loads what it renders
+    (see _load_leases) instead of eager-loading every relationship here.
+    """
+    t = db.query(models.Tenant).filter(models.Tenant.id == tenant_id).first()
     if not t:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tenant not found")
     return t
 
 
+def _load_leases(db: Session, tenant_id: int) -> List[models.Lease]:
+    # unit/property are many-to-one, so joining them does not multiply rows
+    return (
+        db.query(models.Lease)
+        .options(joinedload(models.Lease.unit).joinedload(models.Unit.property))
+        .filter(models.Lease.tenant_id == tenant_id)
+        .all()
+    )
+
+
 def _yyyymm(dt: date | datetime) -> str:
     return f"{dt.year}-{str(dt.month).zfill(2)}"
 
@@ -87,14 +67,24 @@ def _add_months(period: str, count: int) -> str:
     return f"{y}-{str(m).zfill(2)}"
 
 
-def _sum_allocated_for_period(db: Session, lease_id: int, period: str) -> float:
-    total = (
-        db.query(func.coalesce(func.sum(models.PaymentAllocation.amount_applied), 0))
-        .filter(models.PaymentAllocation.lease_id == lease_id)
-        .filter(models.PaymentAllocation.period == period)
-        .scalar()
+def _allocated_by_lease_period(db: Session, lease_ids: List[int]) -> Dict[tuple, float]:
+    """
+    Everything allocated to `lease_ids`, keyed by (lease_id, period), in one
+    query over the ledger rollup. The planner and serializers read from this.
+    """
+    if not lease_ids:
+        return {}
+    rows = (
+        db.query(
+            models.LeasePeriodLedger.lease_id,
+            models.LeasePeriodLedger.period,
+            models.LeasePeriodLedger.allocated,
+        )
+        .filter(models.LeasePeriodLedger.lease_id.in_(lease_ids))
+        .filter(models.LeasePeriodLedger.period != ledger_service.CREDIT_PERIOD)
+        .all()
     )
-    return float(total or 0)
+    return {(lease_id, period): float(allocated or 0) for lease_id, period, allocated in rows}
 
 
 def _period_status(expected: float, received: float) -> str:
@@ -124,7 +114,7 @@ def _notes_to_dict(raw: Any) -> Dict[str, Any]:
     return {}
 
 
-def _build_period_suggestions(db: Session, lease: models.Lease) -> Dict[str, Any]:
+def _build_period_suggestions(lease: models.Lease, allocated: Dict[tuple, float]) -> Dict[str, Any]:
     rent_amount = float(lease.rent_amount or 0)
     start_period = _yyyymm(lease.start_date.date() if isinstance(lease.start_date, datetime) else lease.start_date)
     current_period = _yyyymm(date.today())
@@ -143,7 +133,7 @@ def _build_period_suggestions(db: Session, lease: models.Lease) -> Dict[str, Any
     unpaid_periods: List[str] = []
 
     for period in periods:
-        received = _sum_allocated_for_period(db, lease.id, period)
+        received = allocated.get((lease.id, period), 0.0)
         balance = round(rent_amount - received, 2)
         status = _period_status(rent_amount, received)
 
@@ -177,13 +167,13 @@ def _build_period_suggestions(db: Session, lease: models.Lease) -> Dict[str, Any
     }
 
 
-def _serialize_rental(db: Session, lease: models.Lease) -> Dict[str, Any]:
+def _serialize_rental(lease: models.Lease, allocated: Dict[tuple, float]) -> Dict[str, Any]:
     unit = lease.unit
     prop = unit.property if unit else None
 
     period = _yyyymm(date.today())
     expected = float(lease.rent_amount or 0)
-    received = _sum_allocated_for_period(db, lease.id, period)
+    received = allocated.get((lease.id, period), 0.0)
     balance = round(expected - received, 2)
 
     return {
@@ -215,7 +205,7 @@ def _serialize_rental(db: Session, lease: models.Lease) -> Dict[str, Any]:
             "paid": received >= expected and expected > 0,
             "status": _period_status(expected, received),
         },
-        "planner": _build_period_suggestions(db, lease),
+        "planner": _build_period_suggestions(lease, allocated),
     }
 
 
@@ -225,7 +215,7 @@ def tenant_overview(
     db: Session = Depends(get_db),
 ) -> Dict[str, Any]:
     leases_sorted = sorted(
-        current.leases or [],
+        _load_leases(db, current.id),
         key=lambda l: (
             int(l.active or 0),
             l.start_date or datetime.min,
@@ -236,8 +226,11 @@ def tenant_overview(
     active_leases = [l for l in leases_sorted if int(l.active or 0) == 1]
     inactive_leases = [l for l in leases_sorted if int(l.active or 0) != 1]
 
-    rentals = [_serialize_rental(db, lease) for lease in active_leases]
-    history = [_serialize_rental(db, lease) for lease in inactive_leases[:10]]
+    shown = active_leases + inactive_leases[:10]
+    allocated = _allocated_by_lease_period(db, [l.id for l in shown])
+
+    rentals = [_serialize_rental(lease, allocated) for lease in active_leases]
+    history = [_serialize_rental(lease, allocated) for lease in inactive_leases[:10]]
 
     total_expected = sum((r["this_month"]["expected"] or 0) for r in rentals)
     total_received = sum((r["this_month"]["received"] or 0) for r in rentals)
@@ -276,16 +269,15 @@ def tenant_payments(
     current: models.Tenant = Depends(get_current_tenant),
     db: Session = Depends(get_db),
 ) -> List[Dict[str, Any]]:
-    lease_ids = [l.id for l in current.leases]
+    lease_ids = [lid for (lid,) in db.query(models.Lease.id).filter(models.Lease.tenant_id == current.id).all()]
     if not lease_ids:
         return []
 
     rows = (
         db.query(models.Payment)
         .options(
-            joinedload(models.Payment.allocations),
+            selectinload(models.Payment.allocations),
             joinedload(models.Payment.unit).joinedload(models.Unit.property),
-            joinedload(models.Payment.lease),
         )
         .filter(
             (models.Payment.tenant_id == current.id) |
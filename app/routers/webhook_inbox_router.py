@@ -0,0 +1,57 @@
+# app/routers/webhook_inbox_router.py
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import get_db
+from app.dependencies import role_required
+from app.services import webhook_inbox_service
+
+router = APIRouter(
+    prefix="/admin/webhooks",
+    tags=["Admin Webhooks"],
+    dependencies=[Depends(role_required(["admin", "super_admin"]))],
+)
+
+
+@router.get("")
+def list_webhook_events(
+    status: Optional[str] = Query(None, description="received | processing | retry | done | dead"),
+    source: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+    q = db.query(models.WebhookInbox)
+    if status:
+        q = q.filter(models.WebhookInbox.status == status)
+    if source:
+        q = q.filter(models.WebhookInbox.source == source)
+    events = q.order_by(models.WebhookInbox.id.desc()).limit(limit).all()
+    return {"items": [webhook_inbox_service.serialize_event(e) for e in events]}
+
+
+@router.get("/{event_id}")
+def get_webhook_event(event_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
+    event = db.get(models.WebhookInbox, event_id)
+    if event is None:
+        raise HTTPException(status_code=404, detail="Webhook event not found")
+    return webhook_inbox_service.serialize_event(event, include_payload=True)
+
+
+@router.post("/{event_id}/replay")
+def replay_webhook_event(event_id: int, db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """
+    Re-run a stored event (e.g. a dead one after the cause was fixed).
+    Processing is idempotent, so replaying a done event is harmless.
+    """
+    try:
+        event = webhook_inbox_service.replay(db, event_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if event is None:
+        raise HTTPException(status_code=404, detail="Webhook event not found")
+    return webhook_inbox_service.serialize_event(event)
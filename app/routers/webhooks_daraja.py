@@ -4,6 +4,7 @@ from datetime import date
 from typing import Optional, Any, Dict
 
 from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session, joinedload
 
 from app.dependencies import get_db
@@ -82,6 +83,11 @@ async def daraja_callback(request: Request, db: Session = Depends(get_db)):
     except Exception:
         return {"ok": False, "detail": "Invalid JSON payload"}
 
+    # the DB work below is blocking; keep it off the event loop
+    return await run_in_threadpool(process_daraja_callback, db, body)
+
+
+def process_daraja_callback(db: Session, body: Dict[str, Any]) -> Dict[str, Any]:
     stk = body.get("Body", {}).get("stkCallback", {})
     result_code = stk.get("ResultCode", 1)
     result_desc = stk.get("ResultDesc", "Unknown callback response")
@@ -1,24 +1,88 @@
 # app/services/daraja_service.py
 from __future__ import annotations
 
+import asyncio
 import base64
 import datetime as dt
-from typing import Any, Dict
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
 
+import httpx
 import requests
 from fastapi import HTTPException
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
 from app.core.config import settings
+from app.core.metrics import registry
 
+DARAJA_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0)
+daraja_request_seconds = registry.histogram(
+    "daraja_request_duration_seconds", "Daraja API call latency.", ("operation",), buckets=DARAJA_BUCKETS
+)
+daraja_errors_total = registry.counter(
+    "daraja_errors_total", "Failed Daraja API calls by reason.", ("operation", "reason")
+)
+daraja_token_refreshes_total = registry.counter(
+    "daraja_token_refreshes_total", "OAuth access tokens fetched from Daraja."
+)
 
-class DarajaClient:
+OAUTH_READ_TIMEOUT = 20
+API_READ_TIMEOUT = 30
+
+# STK query answer for a transaction the customer has not completed yet
+# (HTTP 500 with this errorCode); a normal reply, not an outage
+STK_STILL_PROCESSING = "500.001.1001"
+
+
+class AccessTokenCache:
     """
-    M-Pesa Daraja Client (STK Push)
-    Single active implementation for the app.
+    OAuth token shared by the sync and async clients. Considered stale
+    DARAJA_TOKEN_REFRESH_MARGIN_SECONDS before Daraja's own expiry.
     """
 
     def __init__(self) -> None:
-        self.base = (settings.DARAJA_BASE_URL or "").rstrip("/")
+        self.lock = threading.Lock()
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+
+    def valid(self) -> Optional[str]:
+        if self._token and time.monotonic() < self._expires_at - settings.DARAJA_TOKEN_REFRESH_MARGIN_SECONDS:
+            return self._token
+        return None
+
+    def store(self, token: str, expires_in: float) -> None:
+        self._expires_at = time.monotonic() + expires_in
+        self._token = token
+        daraja_token_refreshes_total.inc()
+
+    def clear(self) -> None:
+        self._token = None
+        self._expires_at = 0.0
+
+
+def _still_processing(status_code: int, text: str) -> bool:
+    return status_code == 500 and STK_STILL_PROCESSING in (text or "")
+
+
+def _is_breaker_failure(status_code: int, text: str = "") -> bool:
+    if _still_processing(status_code, text):
+        return False
+    return status_code >= 500 or status_code == 429
+
+
+class _DarajaBase:
+    """Configuration, payload building and bookkeeping shared by both clients."""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        tokens: Optional[AccessTokenCache] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.base = (base_url or settings.DARAJA_BASE_URL or "").rstrip("/")
         self.consumer_key = settings.DARAJA_CONSUMER_KEY
         self.consumer_secret = settings.DARAJA_CONSUMER_SECRET
         self.shortcode = settings.DARAJA_LNM_SHORTCODE
@@ -35,31 +99,24 @@ class DarajaClient:
         ]):
             raise RuntimeError("Daraja config is incomplete")
 
-    def _access_token(self) -> str:
-        url = f"{self.base}/oauth/v1/generate?grant_type=client_credentials"
-
-        response = requests.get(
-            url,
-            auth=(self.consumer_key, self.consumer_secret),
-            timeout=20,
+        self.tokens = tokens or AccessTokenCache()
+        self.breaker = breaker or CircuitBreaker(
+            "daraja",
+            failure_threshold=settings.DARAJA_BREAKER_FAILURES,
+            reset_seconds=settings.DARAJA_BREAKER_RESET_SECONDS,
         )
 
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=502,
-                detail=f"Daraja OAuth failed: {response.text}",
-            )
+    @property
+    def oauth_url(self) -> str:
+        return f"{self.base}/oauth/v1/generate?grant_type=client_credentials"
 
-        data = response.json()
-        token = data.get("access_token")
+    @property
+    def stk_push_url(self) -> str:
+        return f"{self.base}/mpesa/stkpush/v1/processrequest"
 
-        if not token:
-            raise HTTPException(
-                status_code=502,
-                detail="Missing access_token from Daraja",
-            )
-
-        return token
+    @property
+    def stk_query_url(self) -> str:
+        return f"{self.base}/mpesa/stkpushquery/v1/query"
 
     @staticmethod
     def _timestamp() -> str:
@@ -69,23 +126,11 @@ class DarajaClient:
         raw = f"{self.shortcode}{self.passkey}{timestamp}".encode("utf-8")
         return base64.b64encode(raw).decode("utf-8")
 
-    def initiate_stk_push(
-        self,
-        *,
-        phone: str,
-        amount: int | float,
-        account_ref: str,
-        description: str,
-    ) -> Dict[str, Any]:
+    def _stk_push_payload(self, phone: str, amount: int | float, account_ref: str, description: str) -> Dict[str, Any]:
         timestamp = self._timestamp()
-        password = self._password(timestamp)
-        token = self._access_token()
-
-        url = f"{self.base}/mpesa/stkpush/v1/processrequest"
-
-        payload = {
+        return {
             "BusinessShortCode": int(self.shortcode),
-            "Password": password,
+            "Password": self._password(timestamp),
             "Timestamp": timestamp,
             "TransactionType": "CustomerPayBillOnline",
             "Amount": int(round(float(amount))),
@@ -97,27 +142,346 @@ class DarajaClient:
             "TransactionDesc": description[:60],
         }
 
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
+    def _stk_query_payload(self, checkout_request_id: str) -> Dict[str, Any]:
+        timestamp = self._timestamp()
+        return {
+            "BusinessShortCode": int(self.shortcode),
+            "Password": self._password(timestamp),
+            "Timestamp": timestamp,
+            "CheckoutRequestID": checkout_request_id,
         }
 
-        response = requests.post(
-            url,
-            json=payload,
-            headers=headers,
-            timeout=30,
-        )
+    @staticmethod
+    def _stk_query_result(status_code: int, text: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Normalised STK query answer: {"pending": True} while the customer has
+        not acted yet, otherwise Daraja's body with an int ResultCode.
+        """
+        if _still_processing(status_code, text):
+            return {"pending": True, "ResultDesc": data.get("errorMessage")}
+        if status_code != 200:
+            raise HTTPException(
+                status_code=502,
+                detail={"daraja_error": data},
+            )
+        try:
+            data["ResultCode"] = int(data.get("ResultCode"))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=502, detail={"daraja_error": data})
+        data["pending"] = False
+        return data
 
-        data = response.json() if response.content else {}
+    def _before_call(self, operation: str) -> None:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError as e:
+            daraja_errors_total.inc(operation=operation, reason="circuit_open")
+            raise HTTPException(
+                status_code=503,
+                detail="M-Pesa is temporarily unavailable, please retry shortly",
+                headers={"Retry-After": str(int(e.retry_after) or 1)},
+            )
 
-        if response.status_code != 200:
+    def _after_response(self, operation: str, status_code: int, text: str = "") -> None:
+        if status_code != 200 and not _still_processing(status_code, text):
+            daraja_errors_total.inc(operation=operation, reason=f"http_{status_code // 100}xx")
+        if _is_breaker_failure(status_code, text):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _transport_error(self, operation: str, reason: str) -> None:
+        daraja_errors_total.inc(operation=operation, reason=reason)
+        self.breaker.record_failure()
+
+    @staticmethod
+    def _parse_token(status_code: int, text: str, data: Dict[str, Any]) -> Tuple[str, float]:
+        if status_code != 200:
             raise HTTPException(
                 status_code=502,
-                detail={"daraja_error": data},
+                detail=f"Daraja OAuth failed: {text}",
+            )
+
+        token = data.get("access_token")
+
+        if not token:
+            daraja_errors_total.inc(operation="oauth", reason="bad_response")
+            raise HTTPException(
+                status_code=502,
+                detail="Missing access_token from Daraja",
             )
 
+        try:
+            expires_in = float(data.get("expires_in") or 3599)
+        except (TypeError, ValueError):
+            expires_in = 3599.0
+        return token, expires_in
+
+    @staticmethod
+    def _api_result(status_code: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        if status_code != 200:
+            raise HTTPException(
+                status_code=502,
+                detail={"daraja_error": data},
+            )
         return data
 
 
-daraja_client = DarajaClient()
\ No newline at end of file
+def _build_session() -> requests.Session:
+    """
+    Keep-alive session: one TLS handshake per pooled connection instead of
+    per call. Connection errors are retried for every method (the request
+    never left); read/status retries only for GET, so an STK push is never
+    sent twice.
+    """
+    retry = Retry(
+        total=settings.DARAJA_HTTP_RETRIES,
+        connect=settings.DARAJA_HTTP_RETRIES,
+        read=settings.DARAJA_HTTP_RETRIES,
+        status=settings.DARAJA_HTTP_RETRIES,
+        backoff_factor=settings.DARAJA_HTTP_BACKOFF_SECONDS,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.DARAJA_HTTP_POOL_SIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class DarajaClient(_DarajaBase):
+    """
+    M-Pesa Daraja Client (STK Push)
+    Single active implementation for the app.
+
+    Reuses pooled keep-alive connections and the cached OAuth token; calls
+    fail fast with 503 while the circuit breaker is open.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        tokens: Optional[AccessTokenCache] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        session: Optional[requests.Session] = None,
+    ) -> None:
+        super().__init__(base_url, tokens, breaker)
+        self.session = session or _build_session()
+
+    def _send(self, operation: str, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        One timed HTTP call through the breaker. Transport failures and
+        non-200 replies are counted in daraja_errors_total.
+        """
+        self._before_call(operation)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.Timeout:
+            self._transport_error(operation, "timeout")
+            raise
+        except requests.RequestException:
+            self._transport_error(operation, "connection")
+            raise
+        finally:
+            daraja_request_seconds.observe(time.perf_counter() - started, operation=operation)
+
+        self._after_response(operation, response.status_code, response.text)
+        return response
+
+    def _access_token(self, stale: Optional[str] = None) -> str:
+        """
+        Cached token, refreshed single-flight: concurrent callers wait for
+        the one refresh instead of each doing an OAuth round trip. `stale`
+        is a token the API just rejected.
+        """
+        token = self.tokens.valid()
+        if token and token != stale:
+            return token
+
+        with self.tokens.lock:
+            token = self.tokens.valid()
+            if token and token != stale:
+                return token
+
+            response = self._send(
+                "oauth",
+                "GET",
+                self.oauth_url,
+                auth=(self.consumer_key, self.consumer_secret),
+                timeout=(settings.DARAJA_CONNECT_TIMEOUT_SECONDS, OAUTH_READ_TIMEOUT),
+            )
+            data = response.json() if response.status_code == 200 else {}
+            token, expires_in = self._parse_token(response.status_code, response.text, data)
+            self.tokens.store(token, expires_in)
+            return token
+
+    def _authorized_post(self, operation: str, url: str, payload: Dict[str, Any]) -> requests.Response:
+        token = self._access_token()
+        for attempt in range(2):
+            response = self._send(
+                operation,
+                "POST",
+                url,
+                json=payload,
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=(settings.DARAJA_CONNECT_TIMEOUT_SECONDS, API_READ_TIMEOUT),
+            )
+            if response.status_code != 401 or attempt:
+                return response
+            # token revoked or expired early: refresh once and resend
+            token = self._access_token(stale=token)
+        return response
+
+    def initiate_stk_push(
+        self,
+        *,
+        phone: str,
+        amount: int | float,
+        account_ref: str,
+        description: str,
+    ) -> Dict[str, Any]:
+        payload = self._stk_push_payload(phone, amount, account_ref, description)
+        response = self._authorized_post("stk_push", self.stk_push_url, payload)
+        data = response.json() if response.content else {}
+        return self._api_result(response.status_code, data)
+
+    def query_stk_status(self, checkout_request_id: str) -> Dict[str, Any]:
+        """Ask Daraja for the outcome of an STK push (for lost callbacks)."""
+        payload = self._stk_query_payload(checkout_request_id)
+        response = self._authorized_post("stk_query", self.stk_query_url, payload)
+        data = response.json() if response.content else {}
+        return self._stk_query_result(response.status_code, response.text, data)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class AsyncDarajaClient(_DarajaBase):
+    """
+    httpx-based variant for async handlers. Shares the token cache and
+    breaker with the sync client when given them.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        tokens: Optional[AccessTokenCache] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        super().__init__(base_url, tokens, breaker)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # created on first use so it binds to the running event loop
+        if self._client is None:
+            transport = self._transport or httpx.AsyncHTTPTransport(
+                retries=settings.DARAJA_HTTP_RETRIES,  # connection failures only
+                limits=httpx.Limits(
+                    max_connections=settings.DARAJA_HTTP_POOL_SIZE,
+                    max_keepalive_connections=settings.DARAJA_HTTP_POOL_SIZE,
+                ),
+            )
+            self._client = httpx.AsyncClient(
+                transport=transport,
+                timeout=httpx.Timeout(API_READ_TIMEOUT, connect=settings.DARAJA_CONNECT_TIMEOUT_SECONDS),
+            )
+        return self._client
+
+    async def _send(self, operation: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        self._before_call(operation)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.TimeoutException:
+            self._transport_error(operation, "timeout")
+            raise
+        except httpx.TransportError:
+            self._transport_error(operation, "connection")
+            raise
+        finally:
+            daraja_request_seconds.observe(time.perf_counter() - started, operation=operation)
+
+        self._after_response(operation, response.status_code, response.text)
+        return response
+
+    async def _access_token(self, stale: Optional[str] = None) -> str:
+        token = self.tokens.valid()
+        if token and token != stale:
+            return token
+
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            token = self.tokens.valid()
+            if token and token != stale:
+                return token
+
+            response = await self._send(
+                "oauth",
+                "GET",
+                self.oauth_url,
+                auth=(self.consumer_key, self.consumer_secret),
+                timeout=httpx.Timeout(OAUTH_READ_TIMEOUT, connect=settings.DARAJA_CONNECT_TIMEOUT_SECONDS),
+            )
+            data = response.json() if response.status_code == 200 else {}
+            token, expires_in = self._parse_token(response.status_code, response.text, data)
+            self.tokens.store(token, expires_in)
+            return token
+
+    async def _authorized_post(self, operation: str, url: str, payload: Dict[str, Any]) -> httpx.Response:
+        token = await self._access_token()
+        for attempt in range(2):
+            response = await self._send(
+                operation, "POST", url, json=payload, headers={"Authorization": f"Bearer {token}"}
+            )
+            if response.status_code != 401 or attempt:
+                return response
+            token = await self._access_token(stale=token)
+        return response
+
+    async def initiate_stk_push(
+        self,
+        *,
+        phone: str,
+        amount: int | float,
+        account_ref: str,
+        description: str,
+    ) -> Dict[str, Any]:
+        payload = self._stk_push_payload(phone, amount, account_ref, description)
+        response = await self._authorized_post("stk_push", self.stk_push_url, payload)
+        data = response.json() if response.content else {}
+        return self._api_result(response.status_code, data)
+
+    async def query_stk_status(self, checkout_request_id: str) -> Dict[str, Any]:
+        payload = self._stk_query_payload(checkout_request_id)
+        response = await self._authorized_post("stk_query", self.stk_query_url, payload)
+        data = response.json() if response.content else {}
+        return self._stk_query_result(response.status_code, response.text, data)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._refresh_lock = None
+
+
+daraja_client = DarajaClient()
+async_daraja_client = AsyncDarajaClient(tokens=daraja_client.tokens, breaker=daraja_client.breaker)
+
+registry.gauge(
+    "daraja_circuit_open",
+    "1 while the Daraja circuit breaker is open or half-open.",
+    lambda: 0 if daraja_client.breaker.state == "closed" else 1,
+)
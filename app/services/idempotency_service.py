@@ -0,0 +1,215 @@
+# app/services/idempotency_service.py
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.utils.db_utils import insert_ignore
+
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+PARTIAL_FAILURE_DETAIL = (
+    "The request was applied but failed afterwards; check its result instead of retrying"
+)
+
+# (principal, scope, key) -> (request hash, response body) of completed requests
+replay_cache = TTLCache(
+    maxsize=settings.IDEMPOTENCY_CACHE_SIZE,
+    ttl_seconds=settings.IDEMPOTENCY_KEY_TTL_HOURS * 3600,
+    name="idempotency_replay",
+)
+
+
+def request_hash(payload: Any) -> str:
+    canonical = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _principal(current: Dict[str, Any]) -> str:
+    return f"{current.get('role') or ''}:{current.get('sub') or current.get('id') or ''}"[:60]
+
+
+def _commits(db: Session) -> int:
+    return db.info.get("idempotency_commits", 0)
+
+
+@event.listens_for(Session, "after_commit")
+def _count_commit(session):
+    # lets run() tell whether `fn` failed before or after writing anything
+    session.info["idempotency_commits"] = _commits(session) + 1
+
+
+def _replay(
+    response: Optional[Response],
+    stored_hash: str,
+    wanted_hash: str,
+    body: Any,
+    status_code: Optional[int] = None,
+) -> Any:
+    if stored_hash != wanted_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request body",
+        )
+    headers = {REPLAY_HEADER: "true"}
+    if status_code and status_code >= 400:
+        raise HTTPException(status_code=status_code, detail=(body or {}).get("detail"), headers=headers)
+    if response is not None:
+        response.headers.update(headers)
+    return body
+
+
+def _claim(db: Session, principal: str, scope: str, key: str, wanted_hash: str, now: datetime) -> Optional[models.IdempotencyKey]:
+    """
+    Reserve the key for this request. Returns None when reserved, or the
+    existing live row (completed or still in progress) otherwise.
+    """
+    IK = models.IdempotencyKey
+    # short lease while running; extended to the full TTL on completion
+    expires_at = now + timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_SECONDS)
+    row_id = insert_ignore(db, IK, {
+        "principal": principal,
+        "scope": scope,
+        "key": key,
+        "request_hash": wanted_hash,
+        "status": "in_progress",
+        "created_at": now,
+        "expires_at": expires_at,
+    }, ("principal", "scope", "key"))
+    if row_id is not None:
+        db.commit()
+        return None
+
+    # an expired row is taken over in place (one UPDATE, so only one request wins)
+    taken = (
+        db.query(IK)
+        .filter(IK.principal == principal, IK.scope == scope, IK.key == key, IK.expires_at <= now)
+        .update(
+            {
+                IK.request_hash: wanted_hash,
+                IK.status: "in_progress",
+                IK.response_status: None,
+                IK.response_json: None,
+                IK.created_at: now,
+                IK.expires_at: expires_at,
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if taken:
+        return None
+    return db.query(IK).filter(IK.principal == principal, IK.scope == scope, IK.key == key).first()
+
+
+def run(
+    db: Session,
+    *,
+    key: Optional[str],
+    scope: str,
+    current: Dict[str, Any],
+    payload: Any,
+    fn: Callable[[], Any],
+    response: Optional[Response] = None,
+) -> Any:
+    """
+    Execute `fn` at most once per (principal, scope, Idempotency-Key).
+
+    - no key: `fn` runs as usual
+    - first request: the key is reserved (for IDEMPOTENCY_IN_PROGRESS_SECONDS),
+      `fn` runs and its (JSON) response is stored for the full TTL; if `fn`
+      raises before committing anything the reservation is dropped so the
+      client can retry, after a commit the failure is stored instead so a
+      retry cannot apply the request twice
+    - retry with the same body: the stored response is returned without
+      running `fn` (memory first, then the database), marked with an
+      Idempotent-Replayed header
+    - same key, different body: 422; original still running: 409
+    """
+    if not key:
+        return fn()
+    key = key.strip()
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+
+    principal = _principal(current)
+    wanted_hash = request_hash(payload)
+    cache_key = (principal, scope, key)
+
+    cached = replay_cache.get(cache_key)
+    if cached is not None:
+        return _replay(response, cached[0], wanted_hash, cached[1], cached[2])
+
+    now = datetime.utcnow()
+    existing = _claim(db, principal, scope, key, wanted_hash, now)
+    if existing is not None:
+        if existing.status == "completed":
+            body = json.loads(existing.response_json or "null")
+            if existing.request_hash == wanted_hash:
+                replay_cache.set(cache_key, (existing.request_hash, body, existing.response_status))
+            return _replay(response, existing.request_hash, wanted_hash, body, existing.response_status)
+        if existing.request_hash != wanted_hash:
+            _replay(response, existing.request_hash, wanted_hash, None)
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key is still being processed",
+            headers={"Retry-After": "1"},
+        )
+
+    IK = models.IdempotencyKey
+    scope_filter = (IK.principal == principal, IK.scope == scope, IK.key == key)
+    commits_before = _commits(db)
+    try:
+        body = jsonable_encoder(fn())
+        status_code = response.status_code if response is not None and response.status_code else 200
+    except Exception as exc:
+        db.rollback()
+        if _commits(db) == commits_before:
+            # nothing was written: free the key for a retry
+            db.query(IK).filter(*scope_filter).delete(synchronize_session=False)
+            db.commit()
+            raise
+        status_code = exc.status_code if isinstance(exc, HTTPException) else 500
+        body = {"detail": exc.detail if isinstance(exc, HTTPException) else PARTIAL_FAILURE_DETAIL}
+        _complete(db, scope_filter, status_code, body, cache_key, wanted_hash)
+        raise
+
+    _complete(db, scope_filter, status_code, body, cache_key, wanted_hash)
+    return body
+
+
+def _complete(db: Session, scope_filter, status_code: int, body: Any, cache_key, wanted_hash: str) -> None:
+    IK = models.IdempotencyKey
+    db.query(IK).filter(*scope_filter).update(
+        {
+            IK.status: "completed",
+            IK.response_status: status_code,
+            IK.response_json: json.dumps(body),
+            IK.expires_at: datetime.utcnow() + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    replay_cache.set(cache_key, (wanted_hash, body, status_code))
+
+
+def purge_expired(db: Session, now: Optional[datetime] = None) -> int:
+    """Delete keys past their TTL (scheduler job)."""
+    now = now or datetime.utcnow()
+    deleted = (
+        db.query(models.IdempotencyKey)
+        .filter(models.IdempotencyKey.expires_at <= now)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
@@ -0,0 +1,282 @@
+# app/services/ledger_service.py
+from __future__ import annotations
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app import models
+
+CREDIT_PERIOD = "CREDIT"
+ZERO = Decimal("0")
+
+
+def yyyymm(d: date | datetime) -> str:
+    return f"{d.year}-{str(d.month).zfill(2)}"
+
+
+def current_period() -> str:
+    return yyyymm(date.today())
+
+
+def add_months(period: str, count: int) -> str:
+    y, m = period.split("-")
+    month_index = (int(y) * 12 + int(m) - 1) + count
+    return f"{month_index // 12}-{str(month_index % 12 + 1).zfill(2)}"
+
+
+def period_range(start: str, end: str) -> List[str]:
+    out: List[str] = []
+    p = start
+    while p <= end:
+        out.append(p)
+        p = add_months(p, 1)
+    return out
+
+
+def period_status(expected: Decimal, allocated: Decimal) -> str:
+    if expected <= 0:
+        return "n/a"
+    if allocated <= 0:
+        return "unpaid"
+    if allocated < expected:
+        return "partial"
+    if allocated == expected:
+        return "paid"
+    return "credit"
+
+
+def _dec(v) -> Decimal:
+    try:
+        return Decimal(str(v or "0"))
+    except Exception:
+        return ZERO
+
+
+def lease_period_bounds(lease: models.Lease, today_period: Optional[str] = None) -> Optional[Tuple[str, str]]:
+    """
+    (first, last) period in which rent is expected for `lease`.
+
+    Active leases run up to the current month (or their end date if earlier).
+    Inactive leases run up to their end date; without one the range is
+    unknown and None is returned so previously expected amounts are kept.
+    A lease that starts in the future yields an empty range (first > last).
+    """
+    if not lease.start_date:
+        return None
+
+    now = today_period or current_period()
+    first = yyyymm(lease.start_date)
+
+    if lease.end_date:
+        last = min(yyyymm(lease.end_date), now)
+    elif int(lease.active or 0) == 1:
+        last = now
+    else:
+        return None
+
+    return first, last
+
+
+def _sync(
+    db: Session,
+    leases: Sequence[models.Lease],
+    periods: Optional[Iterable[str]] = None,
+) -> int:
+    """
+    Recompute ledger rows for `leases` with a fixed number of grouped queries.
+
+    periods=None recomputes the whole lease range plus any period that has
+    allocations or an existing row; otherwise only the given periods.
+    Existing rows of months before the current one keep their expected
+    amount, so a rent change only applies from this month on.
+    Returns the number of rows written or deleted.
+    """
+    if not leases:
+        return 0
+
+    lease_ids = [l.id for l in leases]
+    only = sorted(set(periods)) if periods is not None else None
+
+    alloc_q = (
+        db.query(
+            models.PaymentAllocation.lease_id,
+            models.PaymentAllocation.period,
+            func.coalesce(func.sum(models.PaymentAllocation.amount_applied), 0),
+        )
+        .filter(models.PaymentAllocation.lease_id.in_(lease_ids))
+    )
+    if only is not None:
+        alloc_q = alloc_q.filter(models.PaymentAllocation.period.in_(only))
+    allocated: Dict[Tuple[int, str], Decimal] = {
+        (lid, period): _dec(total)
+        for lid, period, total in alloc_q.group_by(
+            models.PaymentAllocation.lease_id, models.PaymentAllocation.period
+        ).all()
+    }
+
+    rows_q = db.query(models.LeasePeriodLedger).filter(models.LeasePeriodLedger.lease_id.in_(lease_ids))
+    if only is not None:
+        rows_q = rows_q.filter(models.LeasePeriodLedger.period.in_(only))
+    existing: Dict[Tuple[int, str], models.LeasePeriodLedger] = {
+        (r.lease_id, r.period): r for r in rows_q.all()
+    }
+
+    known_periods: Dict[int, set] = {}
+    for lid, period in list(allocated) + list(existing):
+        known_periods.setdefault(lid, set()).add(period)
+
+    unit_ids = {l.unit_id for l in leases}
+    property_by_unit: Dict[int, int] = dict(
+        db.query(models.Unit.id, models.Unit.property_id).filter(models.Unit.id.in_(unit_ids)).all()
+    )
+
+    now = current_period()
+    changed = 0
+
+    for lease in leases:
+        bounds = lease_period_bounds(lease, now)
+        in_range = set(period_range(*bounds)) if bounds else set()
+
+        if only is not None:
+            targets = set(only)
+        else:
+            targets = in_range | known_periods.get(lease.id, set())
+
+        rent = _dec(lease.rent_amount)
+        property_id = property_by_unit.get(lease.unit_id)
+
+        for period in targets:
+            got = allocated.get((lease.id, period), ZERO)
+            row = existing.get((lease.id, period))
+
+            if period == CREDIT_PERIOD:
+                expected, credit, status = ZERO, got, "credit"
+            else:
+                if bounds is None:
+                    # inactive lease with unknown end: keep what was expected before
+                    expected = _dec(row.expected) if row is not None else ZERO
+                elif period not in in_range:
+                    expected = ZERO
+                elif period < now and row is not None and _dec(row.expected) > 0:
+                    # past months keep the rent that was due then
+                    expected = _dec(row.expected)
+                else:
+                    expected = rent
+                credit = got - expected if got > expected else ZERO
+                status = period_status(expected, got)
+
+            if expected <= 0 and got <= 0:
+                if row is not None:
+                    db.delete(row)
+                    changed += 1
+                continue
+
+            if row is None:
+                row = models.LeasePeriodLedger(lease_id=lease.id, period=period)
+                db.add(row)
+
+            row.tenant_id = lease.tenant_id
+            row.unit_id = lease.unit_id
+            row.property_id = property_id
+            row.expected = expected
+            row.allocated = got
+            row.credit = credit
+            row.status = status
+            changed += 1
+
+    db.flush()
+    return changed
+
+
+def sync_lease(db: Session, lease: models.Lease, periods: Optional[Iterable[str]] = None) -> int:
+    """
+    Bring the ledger for one lease up to date. Call after the lease or its
+    allocations change, inside the same transaction (flushes, never commits).
+    """
+    db.flush()
+    return _sync(db, [lease], periods)
+
+
+def sync_lease_from(db: Session, lease: models.Lease, start_period: Optional[str] = None) -> int:
+    """
+    Resync `start_period` (default: this month) and any later ledger rows of
+    the lease, leaving earlier periods as they are. Use after a rent change
+    that must not rewrite what was expected in past months.
+    """
+    start = start_period or current_period()
+    db.flush()
+    later = (
+        db.query(models.LeasePeriodLedger.period)
+        .filter(models.LeasePeriodLedger.lease_id == lease.id)
+        .filter(models.LeasePeriodLedger.period > start)
+        .filter(models.LeasePeriodLedger.period != CREDIT_PERIOD)
+        .all()
+    )
+    return _sync(db, [lease], {start, *(p for (p,) in later)})
+
+
+def rebuild(
+    db: Session,
+    lease_ids: Optional[Iterable[int]] = None,
+    periods: Optional[Iterable[str]] = None,
+    active_only: bool = False,
+    chunk_size: int = 500,
+) -> int:
+    """
+    Backfill / repair the ledger from leases and allocations, committing
+    per chunk of leases. Re-running only refreshes allocations and status
+    for past months; their expected rent is kept as recorded.
+    """
+    q = db.query(models.Lease.id).order_by(models.Lease.id)
+    if lease_ids is not None:
+        q = q.filter(models.Lease.id.in_(list(lease_ids)))
+    if active_only:
+        q = q.filter(models.Lease.active == 1)
+    ids = [lid for (lid,) in q.all()]
+    period_list = list(periods) if periods is not None else None
+
+    total = 0
+    for i in range(0, len(ids), chunk_size):
+        chunk = db.query(models.Lease).filter(models.Lease.id.in_(ids[i:i + chunk_size])).all()
+        total += _sync(db, chunk, period_list)
+        db.commit()
+    return total
+
+
+def roll_forward(db: Session, period: Optional[str] = None) -> int:
+    """
+    Open ledger rows for every active lease in `period` (default: this month).
+    Scheduled at the start of each month.
+    """
+    return rebuild(db, periods=[period or current_period()], active_only=True)
+
+
+def expected_for_period(db: Session, lease: models.Lease, period: str) -> Decimal:
+    """
+    Rent due for `period`: the ledger's recorded amount for past months,
+    the lease's current rent otherwise (same rule as `_sync`).
+    """
+    rent = _dec(lease.rent_amount)
+    if period >= current_period():
+        return rent
+    recorded = _dec(
+        db.query(models.LeasePeriodLedger.expected)
+        .filter(models.LeasePeriodLedger.lease_id == lease.id)
+        .filter(models.LeasePeriodLedger.period == period)
+        .scalar()
+    )
+    return recorded if recorded > 0 else rent
+
+
+def allocated_for_period(db: Session, lease_id: int, period: str) -> Decimal:
+    total = (
+        db.query(models.LeasePeriodLedger.allocated)
+        .filter(models.LeasePeriodLedger.lease_id == lease_id)
+        .filter(models.LeasePeriodLedger.period == period)
+        .scalar()
+    )
+    return _dec(total)
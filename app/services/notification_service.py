@@ -1,11 +1,24 @@
 from datetime import datetime
 from sqlalchemy.orm import Session
 
+from app.core.metrics import registry
 from app.models.security_models import NotificationLog
 from app.services.email_service import send_email
 from app.services.sms_service import send_sms, send_whatsapp
 
 
+notifications_total = registry.counter(
+    "notifications_total", "Notification send outcomes by channel and status.", ("channel", "status")
+)
+
+
+def _finish(db: Session, log):
+    notifications_total.inc(channel=log.channel, status=log.status)
+    db.add(log)
+    db.flush()
+    return log
+
+
 def _log_notification(
     db: Session,
     event_type: str,
@@ -57,9 +70,7 @@ def notify_email(
         log.status = "failed"
         log.error_message = str(e)
 
-    db.add(log)
-    db.flush()
-    return log
+    return _finish(db, log)
 
 
 def notify_sms(
@@ -85,9 +96,7 @@ def notify_sms(
         log.status = "failed"
         log.error_message = str(e)
 
-    db.add(log)
-    db.flush()
-    return log
+    return _finish(db, log)
 
 
 def notify_whatsapp(
@@ -113,6 +122,4 @@ def notify_whatsapp(
         log.status = "failed"
         log.error_message = str(e)
 
-    db.add(log)
-    db.flush()
-    return log
\ No newline at end of file
+    return _finish(db, log)
\ No newline at end of file
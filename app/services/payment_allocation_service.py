@@ -0,0 +1,176 @@
+# app/services/payment_allocation_service.py
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services import ledger_service
+
+
+def safe_decimal(v) -> Decimal:
+    try:
+        return Decimal(str(v or "0"))
+    except Exception:
+        return Decimal("0")
+
+
+def _sum_allocated_for_period(db: Session, lease_id: int, period: str) -> Decimal:
+    allocations = (
+        db.query(models.PaymentAllocation)
+        .filter(models.PaymentAllocation.lease_id == lease_id)
+        .filter(models.PaymentAllocation.period == period)
+        .all()
+    )
+    total = Decimal("0")
+    for a in allocations:
+        total += safe_decimal(a.amount_applied)
+    return total
+
+
+def period_balance(db: Session, lease: models.Lease, period: str) -> Decimal:
+    rent = ledger_service.expected_for_period(db, lease, period)
+    already_paid = _sum_allocated_for_period(db, lease.id, period)
+    balance = rent - already_paid
+    if balance < Decimal("0"):
+        return Decimal("0")
+    return balance
+
+
+def _format_mpesa_transaction_date(raw: Any) -> Optional[str]:
+    if raw is None:
+        return None
+    s = str(raw).strip()
+    if not s:
+        return None
+    try:
+        dt_obj = datetime.strptime(s, "%Y%m%d%H%M%S")
+        return dt_obj.isoformat()
+    except Exception:
+        return s
+
+
+def build_mpesa_notes(
+    *,
+    existing_notes: Optional[str],
+    result_code: Any,
+    result_desc: Any,
+    merchant_request_id: Any,
+    checkout_request_id: Any,
+    amount: Any = None,
+    receipt: Any = None,
+    phone: Any = None,
+    transaction_date: Any = None,
+    unapplied_amount: Any = None,
+) -> str:
+    data: Dict[str, Any] = {}
+
+    if existing_notes:
+        try:
+            maybe = json.loads(existing_notes)
+            if isinstance(maybe, dict):
+                data = maybe
+        except Exception:
+            data = {}
+
+    data.update({
+        "provider": "mpesa",
+        "result_code": result_code,
+        "result_desc": result_desc,
+        "merchant_request_id": merchant_request_id,
+        "checkout_request_id": checkout_request_id,
+        "mpesa_amount": float(amount) if amount is not None else None,
+        "mpesa_receipt_number": str(receipt) if receipt is not None else None,
+        "mpesa_phone_number": str(phone) if phone is not None else None,
+        "mpesa_transaction_date_raw": str(transaction_date) if transaction_date is not None else None,
+        "mpesa_transaction_date_iso": _format_mpesa_transaction_date(transaction_date),
+        "unapplied_amount": float(unapplied_amount) if unapplied_amount is not None else None,
+    })
+
+    return json.dumps(data)
+
+
+def allocate_payment(
+    db: Session,
+    *,
+    payment: models.Payment,
+    lease: models.Lease,
+    periods: List[str],
+) -> Dict[str, Any]:
+    existing_allocs = (
+        db.query(models.PaymentAllocation)
+        .filter(models.PaymentAllocation.payment_id == payment.id)
+        .all()
+    )
+    if existing_allocs:
+        total_existing = sum((safe_decimal(a.amount_applied) for a in existing_allocs), Decimal("0"))
+        return {
+            "allocations": existing_allocs,
+            "remaining": safe_decimal(payment.amount) - total_existing,
+        }
+
+    remaining = safe_decimal(payment.amount)
+    created = []
+
+    for period in periods:
+        if remaining <= 0:
+            break
+
+        balance = period_balance(db, lease, period)
+        if balance <= 0:
+            continue
+
+        apply_amt = balance if remaining >= balance else remaining
+
+        alloc = models.PaymentAllocation(
+            payment_id=payment.id,
+            tenant_id=payment.tenant_id,
+            unit_id=payment.unit_id,
+            lease_id=payment.lease_id,
+            period=period,
+            amount_applied=apply_amt,
+        )
+        db.add(alloc)
+        created.append(alloc)
+        remaining -= apply_amt
+
+    # keep excess as explicit credit row instead of silently overpaying a cleared month
+    if remaining > 0:
+        credit_alloc = models.PaymentAllocation(
+            payment_id=payment.id,
+            tenant_id=payment.tenant_id,
+            unit_id=payment.unit_id,
+            lease_id=payment.lease_id,
+            period="CREDIT",
+            amount_applied=remaining,
+        )
+        db.add(credit_alloc)
+        created.append(credit_alloc)
+
+    if created:
+        ledger_service.sync_lease(db, lease, periods={a.period for a in created})
+
+    return {
+        "allocations": created,
+        "remaining": remaining,
+    }
+
+
+def selected_periods(payment: models.Payment) -> List[str]:
+    """Periods chosen when the payment was initiated, falling back to its start period."""
+    periods: List[str] = []
+    if payment.selected_periods_json:
+        try:
+            maybe = json.loads(payment.selected_periods_json)
+            if isinstance(maybe, list):
+                periods = [str(x) for x in maybe if str(x).strip()]
+        except Exception:
+            periods = []
+
+    if not periods and payment.period:
+        periods = [payment.period]
+    return periods
@@ -0,0 +1,131 @@
+# app/services/property_access_service.py
+from __future__ import annotations
+
+from typing import Any, Dict, FrozenSet, Hashable, Optional
+
+from sqlalchemy import event, select, union
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.agency_models import (
+    AgencyAgentLink,
+    PropertyAgentAssignment,
+    PropertyExternalManagerAssignment,
+)
+
+ADMIN_ROLES = ("admin", "super_admin")
+MANAGER_ROLES = ("manager", "property_manager")
+
+# (role, sub, manager_id) -> frozenset of visible property ids
+access_cache = TTLCache(
+    maxsize=4096,
+    ttl_seconds=settings.PROPERTY_ACCESS_CACHE_TTL_SECONDS,
+    name="property_access",
+)
+
+# committed changes to these can change somebody's visible set
+_WATCHED = (
+    models.Property,
+    PropertyAgentAssignment,
+    PropertyExternalManagerAssignment,
+    AgencyAgentLink,
+)
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _principal_key(principal: Dict[str, Any]) -> Hashable:
+    return (
+        str(principal.get("role") or ""),
+        _int(principal.get("sub") or principal.get("id")),
+        _int(principal.get("manager_id")),
+    )
+
+
+def _visible_ids_query(role: str, sub: int, manager_id: int):
+    """
+    One statement for the principal's visible property ids.
+
+    Managers see the union of:
+      A) properties owned by their org (Property.manager_id)
+      B) properties assigned to them as staff (active PropertyAgentAssignment)
+      C) properties assigned to their org as an external agent
+         (active PropertyExternalManagerAssignment)
+    Landlords see the properties they own.
+    """
+    if role in MANAGER_ROLES:
+        return union(
+            select(models.Property.id).where(models.Property.manager_id == manager_id),
+            select(PropertyAgentAssignment.property_id).where(
+                PropertyAgentAssignment.assignee_user_id == sub,
+                PropertyAgentAssignment.active.is_(True),
+            ),
+            select(PropertyExternalManagerAssignment.property_id).where(
+                PropertyExternalManagerAssignment.agent_manager_id == manager_id,
+                PropertyExternalManagerAssignment.active.is_(True),
+            ),
+        )
+    if role == "landlord":
+        return select(models.Property.id).where(models.Property.landlord_id == sub)
+    return None
+
+
+def visible_property_ids(db: Session, principal: Dict[str, Any]) -> Optional[FrozenSet[int]]:
+    """
+    Property ids the principal (decoded claims or auth context) may access.
+    None means unrestricted (admins); other roles get an empty set.
+    """
+    role, sub, manager_id = key = _principal_key(principal)
+    if role in ADMIN_ROLES:
+        return None
+
+    def _load() -> FrozenSet[int]:
+        stmt = _visible_ids_query(role, sub, manager_id)
+        if stmt is None:
+            return frozenset()
+        return frozenset(db.execute(stmt).scalars().all())
+
+    return access_cache.get_or_set(key, _load)
+
+
+def can_access_property(db: Session, principal: Dict[str, Any], property_id: int) -> bool:
+    ids = visible_property_ids(db, principal)
+    return ids is None or int(property_id) in ids
+
+
+def invalidate_property_access() -> None:
+    """
+    Drop every cached visible set. Assignment changes are rare and may move a
+    property between several principals (previous and new assignee), so the
+    whole index is rebuilt lazily.
+    """
+    access_cache.clear()
+
+
+# ---------- invalidation on committed ORM changes ----------
+# Bulk query.update() calls bypass these hooks; their callers invalidate explicitly.
+
+@event.listens_for(Session, "after_flush")
+def _mark_access_dirty(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _WATCHED):
+            session.info["property_access_dirty"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_access(session):
+    if session.info.pop("property_access_dirty", False):
+        invalidate_property_access()
+
+
+@event.listens_for(Session, "after_rollback")
+def _reset_access_flag(session):
+    session.info.pop("property_access_dirty", None)
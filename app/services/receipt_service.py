@@ -12,11 +12,17 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 
+from app.core.metrics import registry, timed
+
 
 BASE_DIR = os.path.abspath(os.getcwd())
 RECEIPT_DIR = os.path.join(BASE_DIR, "storage", "receipts")
 os.makedirs(RECEIPT_DIR, exist_ok=True)
 
+receipt_build_seconds = registry.histogram(
+    "receipt_pdf_build_seconds", "Time to render and write a payment receipt PDF."
+)
+
 
 def generate_receipt_number() -> str:
     return f"RCPT-{uuid.uuid4().hex[:10].upper()}"
@@ -148,6 +154,7 @@ def _ensure_space(c: canvas.Canvas, current_y: float, min_y: float = 20 * mm) ->
     return current_y
 
 
+@timed(receipt_build_seconds)
 def build_receipt_pdf(
     payment,
     tenant,
@@ -3,20 +3,44 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from fastapi import Depends
-from app.database import SessionLocal
+from app.database import get_db
 from app import crud, models
+from app.services import idempotency_service, ledger_service, report_job_service, stk_reconciler_service, webhook_inbox_service
+from app.core.config import settings
+from app.core.metrics import registry
+import functools
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 scheduler = BackgroundScheduler()
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# --- Job metrics (exposed on /metrics) ---
+JOB_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+job_duration_seconds = registry.histogram(
+    "scheduler_job_duration_seconds", "Scheduled job run time.", ("job",), buckets=JOB_BUCKETS
+)
+job_runs_total = registry.counter(
+    "scheduler_job_runs_total", "Scheduled job runs by outcome.", ("job", "outcome")
+)
+
+
+def instrumented(fn):
+    """Record duration and success/error outcome of each run of a scheduled job."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "success"
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            outcome = "error"
+            logger.exception(f"Scheduled job {fn.__name__} failed")
+            raise
+        finally:
+            job_duration_seconds.observe(time.perf_counter() - started, job=fn.__name__)
+            job_runs_total.inc(job=fn.__name__, outcome=outcome)
+    return wrapper
 
 # --- Notification stubs ---
 def send_email(to_email: str, subject: str, body: str):
@@ -88,13 +112,66 @@ def overdue_balance_reminder():
             if tenant.email:
                 send_email(tenant.email, "Outstanding Balance Reminder", message)
 
+# --- Ledger Jobs ---
+def ledger_roll_forward():
+    db: Session = next(get_db())
+    try:
+        rows = ledger_service.roll_forward(db)
+        logger.info(f"Ledger rolled forward: {rows} rows for {ledger_service.current_period()}")
+    finally:
+        db.close()
+
+# --- Report Jobs ---
+def report_jobs_purge():
+    db: Session = next(get_db())
+    try:
+        purged = report_job_service.purge_expired(db)
+        if purged:
+            logger.info(f"Purged {purged} expired report artifacts")
+    finally:
+        db.close()
+
+# --- Idempotency Keys ---
+def idempotency_keys_purge():
+    db: Session = next(get_db())
+    try:
+        purged = idempotency_service.purge_expired(db)
+        if purged:
+            logger.info(f"Purged {purged} expired idempotency keys")
+    finally:
+        db.close()
+
+# --- Webhook Inbox ---
+def webhook_inbox_drain():
+    # retries that came due, events missed by a restart, stuck "processing" rows
+    db: Session = next(get_db())
+    try:
+        webhook_inbox_service.drain_due(db)
+    finally:
+        db.close()
+
+# --- STK Reconciliation ---
+def stk_status_reconcile():
+    # pending STK payments whose callback never arrived
+    db: Session = next(get_db())
+    try:
+        stk_reconciler_service.reconcile(db)
+    finally:
+        db.close()
+
 # --- Start Scheduler ---
 def start_scheduler():
     # Run every day at 8 AM UTC
-    scheduler.add_job(rent_due_reminder, "cron", hour=8, minute=0)
-    scheduler.add_job(lease_expiry_reminder, "cron", hour=8, minute=0)
-    scheduler.add_job(maintenance_status_reminder, "cron", hour=8, minute=0)
-    scheduler.add_job(overdue_balance_reminder, "cron", hour=8, minute=0)
+    scheduler.add_job(instrumented(rent_due_reminder), "cron", hour=8, minute=0)
+    scheduler.add_job(instrumented(lease_expiry_reminder), "cron", hour=8, minute=0)
+    scheduler.add_job(instrumented(maintenance_status_reminder), "cron", hour=8, minute=0)
+    scheduler.add_job(instrumented(overdue_balance_reminder), "cron", hour=8, minute=0)
+    # Open this month's ledger rows on the 1st
+    scheduler.add_job(instrumented(ledger_roll_forward), "cron", day=1, hour=0, minute=5)
+    scheduler.add_job(instrumented(report_jobs_purge), "interval", hours=1)
+    scheduler.add_job(instrumented(idempotency_keys_purge), "interval", hours=1)
+    scheduler.add_job(instrumented(stk_status_reconcile), "interval", seconds=settings.STK_RECONCILE_INTERVAL_SECONDS)
+    scheduler.add_job(instrumented(webhook_inbox_drain), "interval", seconds=settings.WEBHOOK_INBOX_POLL_SECONDS)
 
     scheduler.start()
     logger.info("Reminder scheduler started.")
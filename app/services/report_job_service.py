@@ -0,0 +1,323 @@
+# app/services/report_job_service.py
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+from app.database import SessionLocal
+from app.reports import landlord_summary
+from app.reports.finance_summary import build_finance_summary
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.getcwd())
+REPORT_DIR = os.path.join(BASE_DIR, "storage", "reports")
+
+CSV = "text/csv"
+XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+ACTIVE_STATUSES = ("queued", "running")
+
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, int(settings.REPORT_JOB_WORKERS)),
+    thread_name_prefix="report-job",
+)
+
+
+def _new_path(ext: str) -> str:
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    return os.path.join(REPORT_DIR, f"{uuid.uuid4().hex}.{ext}")
+
+
+# ---------- builders: (db, params) -> (path, download name, media type) ----------
+
+def _landlord_monthly_xlsx(db: Session, params: Dict[str, Any]) -> Tuple[str, str, str]:
+    tmp = landlord_summary.write_landlord_monthly_xlsx(
+        db, int(params["landlord_id"]), int(params["year"]), int(params["month"])
+    )
+    path = _new_path("xlsx")
+    shutil.move(tmp, path)
+    return path, f"monthly_summary_{params['year']}_{int(params['month']):02d}.xlsx", XLSX
+
+
+def _landlord_monthly_csv(db: Session, params: Dict[str, Any]) -> Tuple[str, str, str]:
+    path = _new_path("csv")
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        for line in landlord_summary.stream_landlord_monthly_csv(
+            db, int(params["landlord_id"]), int(params["year"]), int(params["month"])
+        ):
+            fh.write(line)
+    return path, f"monthly_summary_{params['year']}_{int(params['month']):02d}.csv", CSV
+
+
+def _admin_finance_summary_csv(db: Session, params: Dict[str, Any]) -> Tuple[str, str, str]:
+    period = str(params["period"])
+    path = _new_path("csv")
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow([
+            "Property ID", "Property", "Code", "Period", "Expected", "Received",
+            "Balance", "Paid Leases", "Unpaid Leases",
+        ])
+        cursor: Optional[int] = None
+        while True:
+            page = build_finance_summary(db, period, 500, before_id=cursor)
+            for r in page:
+                writer.writerow([
+                    r["property_id"], r["property_name"], r["property_code"], r["period"],
+                    r["expected_rent"], r["received_rent"], r["balance"],
+                    r["paid_leases"], r["unpaid_leases"],
+                ])
+            if len(page) < 500:
+                break
+            cursor = page[-1]["property_id"]
+    return path, f"finance_summary_{period}.csv", CSV
+
+
+def _maintenance_csv(db: Session, params: Dict[str, Any]) -> Tuple[str, str, str]:
+    q = (
+        db.query(
+            models.MaintenanceRequest.id,
+            models.MaintenanceRequest.created_at,
+            models.MaintenanceStatus.name,
+            models.Property.name,
+            models.Unit.number,
+            models.Tenant.name,
+            models.Tenant.phone,
+            models.MaintenanceRequest.description,
+        )
+        .join(models.MaintenanceStatus, models.MaintenanceStatus.id == models.MaintenanceRequest.status_id)
+        .join(models.Unit, models.Unit.id == models.MaintenanceRequest.unit_id)
+        .join(models.Property, models.Property.id == models.Unit.property_id)
+        .outerjoin(models.Tenant, models.Tenant.id == models.MaintenanceRequest.tenant_id)
+        .order_by(models.MaintenanceRequest.id.desc())
+    )
+    if params.get("status"):
+        q = q.filter(models.MaintenanceStatus.name == str(params["status"]))
+
+    path = _new_path("csv")
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["ID", "Created", "Status", "Property", "Unit", "Tenant", "Phone", "Description"])
+        for row in q.yield_per(landlord_summary.STREAM_CHUNK_ROWS):
+            writer.writerow(row)
+    return path, "maintenance_requests.csv", CSV
+
+
+# kind -> builder, required params, param types, roles allowed (None = any authenticated role)
+REPORT_KINDS: Dict[str, Dict[str, Any]] = {
+    "landlord_monthly_xlsx": {
+        "builder": _landlord_monthly_xlsx,
+        "required": ("landlord_id", "year", "month"),
+        "types": {"landlord_id": int, "year": int, "month": int},
+        "roles": None,
+    },
+    "landlord_monthly_csv": {
+        "builder": _landlord_monthly_csv,
+        "required": ("landlord_id", "year", "month"),
+        "types": {"landlord_id": int, "year": int, "month": int},
+        "roles": None,
+    },
+    "admin_finance_summary_csv": {
+        "builder": _admin_finance_summary_csv,
+        "required": ("period",),
+        "types": {"period": str},
+        "roles": ("admin", "super_admin"),
+    },
+    "maintenance_csv": {
+        "builder": _maintenance_csv,
+        "required": (),
+        "types": {"status": str},
+        "roles": ("admin", "super_admin"),
+    },
+}
+
+
+def normalize_params(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Coerce known params to their declared type ("5" and 5 are the same
+    request) and drop empty ones. Raises ValueError for an unusable value.
+    """
+    types = REPORT_KINDS[kind].get("types", {})
+    out: Dict[str, Any] = {}
+    for key, value in params.items():
+        if value in (None, ""):
+            continue
+        cast = types.get(key)
+        if cast is None:
+            out[key] = value
+            continue
+        try:
+            out[key] = cast(str(value).strip()) if cast is str else cast(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for {key}: {value!r}")
+    return out
+
+
+def params_hash(kind: str, params: Dict[str, Any]) -> str:
+    canonical = json.dumps({"kind": kind, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    params: Dict[str, Any],
+    requested_by_role: Optional[str] = None,
+    requested_by_id: Optional[int] = None,
+    submit: bool = True,
+) -> models.ReportJob:
+    """
+    Create (or reuse) a job for `kind` + `params` and hand it to the worker pool.
+
+    An identical request by the same requester that is queued, running or
+    done-and-not-expired is returned as-is instead of producing the file
+    again. Raises ValueError for an unknown kind or missing/invalid params.
+    """
+    spec = REPORT_KINDS.get(kind)
+    if spec is None:
+        raise ValueError(f"Unknown report kind: {kind}")
+    params = normalize_params(kind, params)
+    missing = [k for k in spec["required"] if params.get(k) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing params: {', '.join(missing)}")
+
+    h = params_hash(kind, params)
+    now = datetime.utcnow()
+
+    existing = (
+        db.query(models.ReportJob)
+        .filter(models.ReportJob.params_hash == h)
+        .filter(models.ReportJob.requested_by_role == requested_by_role)
+        .filter(models.ReportJob.requested_by_id == requested_by_id)
+        .filter(models.ReportJob.status.in_(ACTIVE_STATUSES + ("done",)))
+        .order_by(models.ReportJob.id.desc())
+        .first()
+    )
+    if existing and (existing.status != "done" or (existing.expires_at and existing.expires_at > now)):
+        return existing
+
+    job = models.ReportJob(
+        kind=kind,
+        params_json=json.dumps(params, sort_keys=True, default=str),
+        params_hash=h,
+        status="queued",
+        requested_by_role=requested_by_role,
+        requested_by_id=requested_by_id,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    if submit:
+        _executor.submit(_run_in_worker, job.id)
+    return job
+
+
+def run_job(db: Session, job_id: int) -> models.ReportJob:
+    """Produce the file for one job. Worker body; also callable inline."""
+    job = db.query(models.ReportJob).filter(models.ReportJob.id == job_id).first()
+    if job is None or job.status != "queued":
+        return job
+
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    db.commit()
+
+    try:
+        builder: Callable = REPORT_KINDS[job.kind]["builder"]
+        path, file_name, media_type = builder(db, json.loads(job.params_json or "{}"))
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Report job %s (%s) failed", job_id, job.kind)
+        job.status = "failed"
+        job.error = str(exc)[:2000]
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        return job
+
+    job.status = "done"
+    job.file_path = path
+    job.file_name = file_name
+    job.media_type = media_type
+    job.finished_at = datetime.utcnow()
+    job.expires_at = job.finished_at + timedelta(hours=int(settings.REPORT_JOB_RETENTION_HOURS))
+    db.commit()
+    return job
+
+
+def _run_in_worker(job_id: int) -> None:
+    db = SessionLocal()
+    try:
+        run_job(db, job_id)
+    finally:
+        db.close()
+
+
+def purge_expired(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Retention: delete artifacts of expired jobs and mark them "expired".
+    Jobs stuck in queued/running for longer than the retention window
+    (e.g. lost on restart) are marked failed.
+    """
+    now = now or datetime.utcnow()
+    purged = 0
+
+    expired = (
+        db.query(models.ReportJob)
+        .filter(models.ReportJob.status == "done")
+        .filter(models.ReportJob.expires_at <= now)
+        .all()
+    )
+    for job in expired:
+        if job.file_path:
+            try:
+                os.remove(job.file_path)
+            except OSError:
+                pass
+        job.status = "expired"
+        job.file_path = None
+        purged += 1
+
+    stale_before = now - timedelta(hours=int(settings.REPORT_JOB_RETENTION_HOURS))
+    stale = (
+        db.query(models.ReportJob)
+        .filter(models.ReportJob.status.in_(ACTIVE_STATUSES))
+        .filter(models.ReportJob.created_at <= stale_before)
+        .all()
+    )
+    for job in stale:
+        job.status = "failed"
+        job.error = "Job did not finish (worker restarted?)"
+        job.finished_at = now
+
+    db.commit()
+    return purged
+
+
+def serialize_job(job: models.ReportJob) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": json.loads(job.params_json or "{}"),
+        "status": job.status,
+        "error": job.error,
+        "file_name": job.file_name,
+        "download_url": f"/reports/jobs/{job.id}/download" if job.status == "done" else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "expires_at": job.expires_at,
+    }
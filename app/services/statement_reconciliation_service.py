@@ -0,0 +1,486 @@
+# app/services/statement_reconciliation_service.py
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import re
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO
+
+from sqlalchemy.orm import Session, joinedload
+
+from app import models
+from app.core.config import settings
+from app.core.metrics import registry
+from app.services import ledger_service
+from app.services.payment_allocation_service import (
+    allocate_payment,
+    build_mpesa_notes,
+    safe_decimal,
+    selected_periods,
+)
+from app.services.payment_event_service import handle_payment_success
+from app.utils.phone_utils import normalize_ke_phone
+
+logger = logging.getLogger(__name__)
+
+# normalized header -> field; the M-Pesa org portal export plus C2B-style names
+COLUMNS = {
+    "receiptno": "receipt",
+    "receipt": "receipt",
+    "transid": "receipt",
+    "transactionid": "receipt",
+    "completiontime": "completed_at",
+    "transtime": "completed_at",
+    "transactionstatus": "status",
+    "paidin": "amount",
+    "transamount": "amount",
+    "amount": "amount",
+    "otherpartyinfo": "party",
+    "msisdn": "party",
+    "phone": "party",
+    "phonenumber": "party",
+    "acno": "account",
+    "accountno": "account",
+    "billrefnumber": "account",
+    "merchantrequestid": "merchant_request_id",
+}
+REQUIRED = ("receipt", "amount")
+
+TIME_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%d-%m-%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%Y%m%d%H%M%S",
+)
+
+_PHONE_RE = re.compile(r"\+?\d[\d ]{7,}\d")
+
+lines_total = registry.counter(
+    "statement_reconcile_lines_total", "Paybill statement lines by reconciliation outcome.", ("outcome",)
+)
+run_seconds = registry.histogram(
+    "statement_reconcile_run_seconds", "Duration of one statement reconciliation.",
+    buckets=(0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+
+def _header_key(name: str) -> str:
+    return re.sub(r"[^a-z]", "", (name or "").lower())
+
+
+def _amount(raw: Any) -> Optional[Decimal]:
+    s = str(raw or "").replace(",", "").strip()
+    if not s:
+        return None
+    try:
+        return Decimal(s)
+    except InvalidOperation:
+        return None
+
+
+def _timestamp(raw: Any) -> Optional[datetime]:
+    s = str(raw or "").strip()
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _phone(raw: Any) -> Optional[str]:
+    """Phone from "Other Party Info" ("254712345678 - JANE DOE"); masked numbers give None."""
+    s = str(raw or "")
+    if "*" in s:
+        return None
+    found = _PHONE_RE.search(s)
+    return normalize_ke_phone(found.group(0)) if found else None
+
+
+def _phone_variants(e164: str) -> List[str]:
+    """Spellings a tenant phone may be stored in (+2547…, 2547…, 07…)."""
+    return [e164, e164[1:], "0" + e164[4:]]
+
+
+def parse_statement(stream: TextIO, counts: Optional[Dict[str, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield completed money-in lines of a paybill statement CSV, one at a time.
+
+    Preamble rows before the header (account name, period, ...) are skipped.
+    Lines that are not "Completed" or carry no "Paid In" amount (withdrawals,
+    charges) are counted in counts["skipped"] and not yielded. Raises
+    ValueError when no header with a receipt and amount column is found.
+    """
+    counts = counts if counts is not None else {}
+    columns: Optional[Dict[int, str]] = None
+    for line_no, row in enumerate(csv.reader(stream), start=1):
+        if columns is None:
+            mapped = {i: COLUMNS[_header_key(c)] for i, c in enumerate(row) if _header_key(c) in COLUMNS}
+            if all(field in mapped.values() for field in REQUIRED):
+                columns = mapped
+            continue
+
+        values: Dict[str, str] = {}
+        for i, field in columns.items():
+            if i < len(row) and field not in values:
+                values[field] = row[i].strip()
+
+        receipt = values.get("receipt") or ""
+        amount = _amount(values.get("amount"))
+        status = (values.get("status") or "completed").lower()
+        if not receipt or amount is None or amount <= 0 or status != "completed":
+            counts["skipped"] = counts.get("skipped", 0) + 1
+            continue
+
+        yield {
+            "line": line_no,
+            "receipt": receipt.upper(),
+            "amount": amount,
+            "completed_at": _timestamp(values.get("completed_at")),
+            "phone": _phone(values.get("party")),
+            "account": values.get("account") or None,
+            "merchant_request_id": values.get("merchant_request_id") or None,
+        }
+
+    if columns is None:
+        raise ValueError("Statement has no header row with 'Receipt No.' and 'Paid In' columns")
+
+
+def _batches(lines: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _item(line: Dict[str, Any], outcome: str, reason: str, action: str = "none", **extra: Any) -> Dict[str, Any]:
+    return {**line, "amount": float(line["amount"]), "outcome": outcome, "reason": reason, "action": action, **extra}
+
+
+class _BatchIndex:
+    """
+    Hash maps for one batch of statement lines, each built from a single
+    query: payments by reference and by MerchantRequestID, tenants by phone,
+    and for those tenants their active leases, unreceipted pending payments
+    and open rent periods.
+    """
+
+    def __init__(self, db: Session, lines: List[Dict[str, Any]]):
+        P = models.Payment
+        receipts = {l["receipt"] for l in lines}
+        self.by_reference: Dict[str, models.Payment] = {
+            p.reference.upper(): p for p in db.query(P).filter(P.reference.in_(receipts))
+        }
+
+        self.by_merchant_id: Dict[str, models.Payment] = {}
+        merchant_ids = {l["merchant_request_id"] for l in lines if l["merchant_request_id"]}
+        if merchant_ids:
+            # newest wins, like the callback's fallback match
+            for p in db.query(P).filter(P.merchant_request_id.in_(merchant_ids)).order_by(P.created_at, P.id):
+                self.by_merchant_id[p.merchant_request_id] = p
+
+        phones = {
+            l["phone"] for l in lines
+            if l["phone"] and l["receipt"] not in self.by_reference
+            and l["merchant_request_id"] not in self.by_merchant_id
+        }
+        self.tenants_by_phone: Dict[str, Set[int]] = {}
+        if phones:
+            variants = [v for phone in phones for v in _phone_variants(phone)]
+            rows = db.query(models.Tenant.id, models.Tenant.phone).filter(models.Tenant.phone.in_(variants))
+            for tenant_id, phone in rows:
+                self.tenants_by_phone.setdefault(normalize_ke_phone(phone), set()).add(tenant_id)
+
+        tenant_ids = {tid for ids in self.tenants_by_phone.values() for tid in ids}
+        self.leases: Dict[int, List[models.Lease]] = {}
+        self.pending: Dict[int, List[models.Payment]] = {}
+        self.open_periods: Dict[int, List[str]] = {}
+        if not tenant_ids:
+            return
+
+        for lease in (
+            db.query(models.Lease)
+            .filter(models.Lease.tenant_id.in_(tenant_ids), models.Lease.active == 1)
+            .order_by(models.Lease.id)
+        ):
+            self.leases.setdefault(lease.tenant_id, []).append(lease)
+
+        for p in (
+            db.query(P)
+            .filter(P.tenant_id.in_(tenant_ids))
+            .filter(P.status.in_((models.PaymentStatus.pending, models.PaymentStatus.failed)))
+            .filter(P.reference.is_(None))
+            .order_by(P.created_at, P.id)
+        ):
+            self.pending.setdefault(p.tenant_id, []).append(p)
+
+        lease_ids = [lease.id for leases in self.leases.values() for lease in leases]
+        if lease_ids:
+            L = models.LeasePeriodLedger
+            rows = (
+                db.query(L.lease_id, L.period)
+                .filter(L.lease_id.in_(lease_ids))
+                .filter(L.status.in_(("unpaid", "partial")))
+                .filter(L.period <= ledger_service.current_period())
+                .order_by(L.period)
+            )
+            for lease_id, period in rows:
+                self.open_periods.setdefault(lease_id, []).append(period)
+
+
+def _confirm(line: Dict[str, Any], payment: models.Payment, claimed: Set[int]) -> Dict[str, Any]:
+    """A recorded but unsettled payment the statement line settles."""
+    ids = {"payment_id": payment.id, "tenant_id": payment.tenant_id, "lease_id": payment.lease_id}
+    if payment.id in claimed:
+        return _item(line, "discrepancy", "payment_already_matched", **ids)
+    if safe_decimal(payment.amount) != line["amount"]:
+        return _item(line, "discrepancy", "amount_mismatch", expected_amount=float(payment.amount or 0), **ids)
+    if payment.lease_id is None:
+        return _item(line, "discrepancy", "payment_without_lease", **ids)
+    claimed.add(payment.id)
+    return _item(line, "matched", f"{payment.status.value}_payment", action="confirm",
+                 periods=selected_periods(payment), **ids)
+
+
+def _classify(line: Dict[str, Any], index: _BatchIndex, seen: Set[str], claimed: Set[int]) -> Dict[str, Any]:
+    if line["receipt"] in seen:
+        return _item(line, "discrepancy", "duplicate_receipt")
+    seen.add(line["receipt"])
+
+    payment = index.by_reference.get(line["receipt"])
+    if payment is not None:
+        if payment.status != models.PaymentStatus.paid:
+            return _confirm(line, payment, claimed)
+        ids = {"payment_id": payment.id, "tenant_id": payment.tenant_id, "lease_id": payment.lease_id}
+        if safe_decimal(payment.amount) != line["amount"]:
+            return _item(line, "discrepancy", "amount_mismatch", expected_amount=float(payment.amount or 0), **ids)
+        return _item(line, "matched", "already_recorded", **ids)
+
+    payment = index.by_merchant_id.get(line["merchant_request_id"])
+    if payment is not None:
+        if payment.status == models.PaymentStatus.paid:
+            return _item(line, "discrepancy", "paid_under_other_reference",
+                         payment_id=payment.id, recorded_reference=payment.reference)
+        return _confirm(line, payment, claimed)
+
+    if not line["phone"]:
+        return _item(line, "unmatched", "no_reference_or_phone_match")
+    tenant_ids = index.tenants_by_phone.get(line["phone"]) or set()
+    if not tenant_ids:
+        return _item(line, "unmatched", "unknown_phone")
+    if len(tenant_ids) > 1:
+        return _item(line, "discrepancy", "ambiguous_tenant", tenant_ids=sorted(tenant_ids))
+    tenant_id = next(iter(tenant_ids))
+
+    # an STK push whose callback never arrived, for the same amount
+    earliest = (
+        line["completed_at"] - timedelta(days=settings.STATEMENT_RECONCILE_PENDING_MATCH_DAYS)
+        if line["completed_at"] else None
+    )
+    for payment in index.pending.get(tenant_id, []):
+        if payment.id in claimed or safe_decimal(payment.amount) != line["amount"]:
+            continue
+        if earliest is not None and payment.created_at < earliest:
+            continue
+        return _confirm(line, payment, claimed)
+
+    leases = index.leases.get(tenant_id, [])
+    if len(leases) != 1:
+        reason = "no_active_lease" if not leases else "ambiguous_lease"
+        return _item(line, "discrepancy", reason, tenant_id=tenant_id, lease_ids=[l.id for l in leases])
+
+    lease = leases[0]
+    period = ledger_service.yyyymm(line["completed_at"] or date.today())
+    periods = list(index.open_periods.get(lease.id, []))
+    if period not in periods:
+        periods.append(period)
+    return _item(line, "matched", "tenant_phone", action="create",
+                 tenant_id=tenant_id, lease_id=lease.id, periods=sorted(periods))
+
+
+def match_statement(
+    db: Session,
+    stream: TextIO,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Classify every money-in line of a statement into matched, unmatched and
+    discrepancies. Lines are read lazily and looked up in batches of
+    STATEMENT_RECONCILE_BATCH_SIZE with a fixed number of queries per batch.
+
+    Matching order per line: Payment.reference == receipt, then
+    Payment.merchant_request_id, then the payer's phone (tenant -> a pending
+    STK payment of the same amount, else the tenant's only active lease).
+    Matched lines carry the action applying them would take: "none"
+    (already recorded), "confirm" (settle a pending/failed payment) or
+    "create" (record a new M-Pesa payment).
+    """
+    size = max(1, batch_size or settings.STATEMENT_RECONCILE_BATCH_SIZE)
+    counts: Dict[str, int] = {"skipped": 0}
+    result: Dict[str, List[Dict[str, Any]]] = {"matched": [], "unmatched": [], "discrepancies": []}
+    bucket = {"matched": "matched", "unmatched": "unmatched", "discrepancy": "discrepancies"}
+    seen: Set[str] = set()
+    claimed: Set[int] = set()
+
+    for batch in _batches(parse_statement(stream, counts), size):
+        index = _BatchIndex(db, batch)
+        for line in batch:
+            item = _classify(line, index, seen, claimed)
+            result[bucket[item["outcome"]]].append(item)
+
+    return {**result, "skipped": counts["skipped"]}
+
+
+def apply_matches(db: Session, items: List[Dict[str, Any]], chunk_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Apply "confirm" / "create" matches through allocate_payment, committing
+    every STATEMENT_RECONCILE_APPLY_CHUNK_SIZE lines. Each chunk loads its
+    payments, leases and already used receipts with one query apiece. A line
+    that fails is rolled back to its savepoint and reported; one whose
+    payment was settled meanwhile (e.g. by a late callback) is skipped.
+    Receipts and notifications follow once the chunk is committed.
+    """
+    size = max(1, chunk_size or settings.STATEMENT_RECONCILE_APPLY_CHUNK_SIZE)
+    actionable = [i for i in items if i.get("action") in ("confirm", "create")]
+    counts = {"confirmed": 0, "created": 0, "skipped": 0, "error": 0}
+    P = models.Payment
+
+    for start in range(0, len(actionable), size):
+        chunk = actionable[start:start + size]
+        payment_ids = [i["payment_id"] for i in chunk if i["action"] == "confirm"]
+        payments = {p.id: p for p in db.query(P).filter(P.id.in_(payment_ids))} if payment_ids else {}
+        leases = {
+            lease.id: lease
+            for lease in db.query(models.Lease).filter(models.Lease.id.in_({i["lease_id"] for i in chunk}))
+        }
+        used = {
+            ref.upper() for (ref,) in db.query(P.reference).filter(P.reference.in_([i["receipt"] for i in chunk]))
+        }
+
+        applied: List[int] = []
+        for item in chunk:
+            payment = payments.get(item.get("payment_id"))
+            if item["receipt"] in used or (item["action"] == "confirm" and (
+                payment is None or payment.status == models.PaymentStatus.paid
+            )):
+                item["applied"] = "skipped"
+                counts["skipped"] += 1
+                continue
+            try:
+                with db.begin_nested():
+                    payment = _apply_one(db, item, payment, leases[item["lease_id"]])
+            except Exception as exc:
+                logger.warning("Statement line %s (%s) not applied: %s", item["line"], item["receipt"], exc)
+                item["applied"] = "error"
+                item["error"] = str(exc)[:500]
+                counts["error"] += 1
+                continue
+            used.add(item["receipt"])
+            item["applied"] = "confirmed" if item["action"] == "confirm" else "created"
+            item["payment_id"] = payment.id
+            counts[item["applied"]] += 1
+            applied.append(payment.id)
+        db.commit()
+
+        if applied:
+            for payment in list(
+                db.query(P)
+                .options(
+                    joinedload(P.allocations),
+                    joinedload(P.tenant),
+                    joinedload(P.unit).joinedload(models.Unit.property),
+                )
+                .filter(P.id.in_(applied))
+            ):
+                try:
+                    handle_payment_success(db, payment)
+                except Exception:
+                    # it commits internally; later receipts and chunks need a usable session
+                    db.rollback()
+                    logger.exception("Receipt for reconciled payment %s failed", payment.id)
+
+    return counts
+
+
+def _apply_one(
+    db: Session,
+    item: Dict[str, Any],
+    payment: Optional[models.Payment],
+    lease: models.Lease,
+) -> models.Payment:
+    paid_date = item["completed_at"].date() if item["completed_at"] else date.today()
+    if payment is None:
+        payment = models.Payment(
+            tenant_id=lease.tenant_id,
+            unit_id=lease.unit_id,
+            lease_id=lease.id,
+            amount=Decimal(str(item["amount"])),
+            period=item["periods"][0],
+            payment_method="M-Pesa",
+            allocation_mode="statement",
+            selected_periods_json=json.dumps(item["periods"]),
+        )
+        db.add(payment)
+    payment.reference = item["receipt"]
+    payment.status = models.PaymentStatus.paid
+    payment.paid_date = paid_date
+    db.flush()
+
+    alloc_result = allocate_payment(db, payment=payment, lease=lease, periods=item["periods"])
+    payment.notes = build_mpesa_notes(
+        existing_notes=payment.notes,
+        result_code=0,
+        result_desc="Reconciled from paybill statement",
+        merchant_request_id=payment.merchant_request_id,
+        checkout_request_id=payment.checkout_request_id,
+        amount=item["amount"],
+        receipt=item["receipt"],
+        phone=item["phone"],
+        transaction_date=item["completed_at"].strftime("%Y%m%d%H%M%S") if item["completed_at"] else None,
+        unapplied_amount=alloc_result["remaining"],
+    )
+    db.flush()
+    return payment
+
+
+def reconcile_statement(
+    db: Session,
+    stream: TextIO,
+    apply: bool = False,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Match a paybill statement and, when `apply` is set, apply the confirmed
+    matches. Without `apply` nothing is written (dry run).
+    """
+    started = time.perf_counter()
+    result = match_statement(db, stream, batch_size)
+    result["applied"] = apply_matches(db, result["matched"]) if apply else None
+
+    for outcome in ("matched", "unmatched", "discrepancies", "skipped"):
+        n = result[outcome] if outcome == "skipped" else len(result[outcome])
+        if n:
+            lines_total.inc(n, outcome=outcome)
+    elapsed = time.perf_counter() - started
+    run_seconds.observe(elapsed)
+
+    result["summary"] = {
+        "lines": sum(len(result[k]) for k in ("matched", "unmatched", "discrepancies")),
+        "matched": len(result["matched"]),
+        "to_apply": sum(1 for i in result["matched"] if i["action"] != "none"),
+        "unmatched": len(result["unmatched"]),
+        "discrepancies": len(result["discrepancies"]),
+        "skipped": result.pop("skipped"),
+        "seconds": round(elapsed, 3),
+    }
+    logger.info(f"Statement reconciliation: {result['summary']}")
+    return result
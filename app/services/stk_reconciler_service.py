@@ -0,0 +1,150 @@
+# app/services/stk_reconciler_service.py
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.rate_limit import RateLimiter
+from app.services import webhook_inbox_service
+from app.services.daraja_service import daraja_client
+
+logger = logging.getLogger(__name__)
+
+reconcile_queries_total = registry.counter(
+    "stk_reconcile_queries_total", "STK status queries for stale pending payments by outcome.", ("outcome",)
+)
+reconcile_run_seconds = registry.histogram(
+    "stk_reconcile_run_seconds", "Duration of one reconciliation run.",
+    buckets=(0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+# summary of the most recent run (per process), also exposed as gauges
+last_run: Dict[str, Any] = {}
+
+registry.gauge(
+    "stk_reconcile_backlog",
+    "Stale pending STK payments still unresolved after the last reconciliation run.",
+    lambda: last_run.get("remaining"),
+)
+registry.gauge(
+    "stk_reconcile_throughput_per_second",
+    "STK status queries per second achieved by the last reconciliation run.",
+    lambda: last_run.get("throughput_per_second"),
+)
+
+
+def stale_pending(db: Session, now: Optional[datetime] = None) -> Tuple[List[Tuple[int, str, Optional[str]]], int]:
+    """
+    (payment id, CheckoutRequestID, MerchantRequestID) of the oldest pending
+    STK payments whose callback is overdue, up to STK_RECONCILE_BATCH_SIZE,
+    plus the total number waiting.
+    """
+    now = now or datetime.utcnow()
+    P = models.Payment
+    q = (
+        db.query(P.id, P.checkout_request_id, P.merchant_request_id)
+        .filter(P.status == models.PaymentStatus.pending)
+        .filter(P.checkout_request_id.isnot(None))
+        .filter(P.created_at <= now - timedelta(seconds=settings.STK_RECONCILE_MIN_AGE_SECONDS))
+        .filter(P.created_at >= now - timedelta(hours=settings.STK_RECONCILE_MAX_AGE_HOURS))
+    )
+    backlog = q.count()
+    rows = q.order_by(P.created_at, P.id).limit(settings.STK_RECONCILE_BATCH_SIZE).all()
+    return [tuple(r) for r in rows], backlog
+
+
+def _callback_body(checkout_request_id: str, merchant_request_id: Optional[str], result: Dict[str, Any]) -> Dict[str, Any]:
+    """STK query result shaped as the callback Daraja failed to deliver."""
+    return {"Body": {"stkCallback": {
+        "MerchantRequestID": result.get("MerchantRequestID") or merchant_request_id,
+        "CheckoutRequestID": checkout_request_id,
+        "ResultCode": result["ResultCode"],
+        "ResultDesc": result.get("ResultDesc") or "Resolved by STK status query",
+    }}}
+
+
+def reconcile(db: Session, client=None, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Query Daraja for stale pending payments and apply the final answers.
+
+    HTTP queries run on STK_RECONCILE_CONCURRENCY threads, paced to
+    STK_RECONCILE_RATE_PER_SECOND overall; results are applied on `db` as
+    they arrive, through the webhook inbox and process_daraja_callback,
+    i.e. the same allocation path (and dedup) as a real callback. Outcomes
+    are counted from the payment's status after processing.
+    """
+    client = client or daraja_client
+    started = time.perf_counter()
+    candidates, backlog = stale_pending(db, now)
+    counts = {"paid": 0, "failed": 0, "pending": 0, "error": 0}
+    limiter = RateLimiter(settings.STK_RECONCILE_RATE_PER_SECOND)
+
+    def _query(checkout_request_id: str) -> Dict[str, Any]:
+        limiter.acquire()
+        return client.query_stk_status(checkout_request_id)
+
+    workers = max(1, min(settings.STK_RECONCILE_CONCURRENCY, len(candidates) or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stk-reconcile") as pool:
+        futures = {pool.submit(_query, cid): (pid, cid, mid) for pid, cid, mid in candidates}
+        for future in as_completed(futures):
+            payment_id, checkout_request_id, merchant_request_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                counts["error"] += 1
+                logger.warning("STK query for payment %s failed: %s", payment_id, exc)
+                continue
+
+            if result.get("pending"):
+                counts["pending"] += 1
+                continue
+
+            body = _callback_body(checkout_request_id, merchant_request_id, result)
+            # own key: the real callback's event may already be done without having matched
+            event_id, created = webhook_inbox_service.record(
+                db, "daraja", body, event_key=f"stkquery:{checkout_request_id}", dispatch=False
+            )
+            if not created:
+                event = db.get(models.WebhookInbox, event_id)
+                if event is not None and event.status == "done":
+                    webhook_inbox_service.replay(db, event_id, dispatch=False)
+            webhook_inbox_service.process_event(db, event_id)
+
+            # count what actually happened to the payment, not what the query said
+            status = db.query(models.Payment.status).filter(models.Payment.id == payment_id).scalar()
+            if status == models.PaymentStatus.paid:
+                counts["paid"] += 1
+            elif status == models.PaymentStatus.failed:
+                counts["failed"] += 1
+            else:
+                counts["error"] += 1
+
+    for outcome, n in counts.items():
+        if n:
+            reconcile_queries_total.inc(n, outcome=outcome)
+
+    elapsed = time.perf_counter() - started
+    reconcile_run_seconds.observe(elapsed)
+    queried = len(candidates)
+    summary = {
+        "backlog": backlog,
+        "queried": queried,
+        "remaining": backlog - counts["paid"] - counts["failed"],
+        **counts,
+        "seconds": round(elapsed, 3),
+        "throughput_per_second": round(queried / elapsed, 2) if elapsed > 0 else 0.0,
+        "finished_at": datetime.utcnow(),
+    }
+    last_run.clear()
+    last_run.update(summary)
+    if queried:
+        logger.info(f"STK reconcile: {summary}")
+    return summary
@@ -0,0 +1,274 @@
+# app/services/webhook_inbox_service.py
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import registry
+from app.database import SessionLocal
+from app.utils.db_utils import insert_ignore
+
+logger = logging.getLogger(__name__)
+
+PENDING_STATUSES = ("received", "retry")
+
+# source -> handler(db, payload) -> result dict; registered by the owning router
+Handler = Callable[[Session, Dict[str, Any]], Dict[str, Any]]
+HANDLERS: Dict[str, Handler] = {}
+
+inbox_events_total = registry.counter(
+    "webhook_inbox_events_total", "Webhook inbox events by source and outcome.", ("source", "outcome")
+)
+
+# (source, event_key) -> inbox id of events this process has already stored;
+# provider retries are acknowledged from here without touching the database
+seen_events = TTLCache(
+    maxsize=settings.WEBHOOK_DEDUP_CACHE_SIZE,
+    ttl_seconds=settings.WEBHOOK_DEDUP_CACHE_TTL_SECONDS,
+    name="webhook_dedup",
+)
+
+_executor = (
+    ThreadPoolExecutor(max_workers=int(settings.WEBHOOK_INBOX_WORKERS), thread_name_prefix="webhook-inbox")
+    if settings.WEBHOOK_INBOX_WORKERS > 0
+    else None
+)
+
+
+def register_handler(source: str):
+    """Decorator: process stored `source` events with the decorated function."""
+
+    def decorator(fn: Handler) -> Handler:
+        HANDLERS[source] = fn
+        return fn
+
+    return decorator
+
+
+def event_key_for(payload: Dict[str, Any], key: Optional[str]) -> str:
+    """The provider's event id, or a content hash when the payload carries none."""
+    if key:
+        return str(key)[:120]
+    canonical = json.dumps(payload, sort_keys=True, default=str)
+    return "sha256:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff after the given number of failed attempts."""
+    seconds = settings.WEBHOOK_INBOX_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1))
+    return timedelta(seconds=min(seconds, settings.WEBHOOK_INBOX_RETRY_MAX_SECONDS))
+
+
+def record(
+    db: Session,
+    source: str,
+    payload: Dict[str, Any],
+    event_key: Optional[str] = None,
+    dispatch: bool = True,
+) -> Tuple[int, bool]:
+    """
+    Persist a raw webhook and hand it to the worker pool.
+
+    Returns (event id, created). A repeat of an already stored event
+    (same source and key) is not stored again and returns created=False;
+    recent repeats are answered from memory.
+    """
+    key = event_key_for(payload, event_key)
+    known = seen_events.get((source, key))
+    if known is not None:
+        inbox_events_total.inc(source=source, outcome="duplicate")
+        return known, False
+
+    now = datetime.utcnow()
+    event_id = insert_ignore(db, models.WebhookInbox, {
+        "source": source,
+        "event_key": key,
+        "payload_json": json.dumps(payload, default=str),
+        "status": "received",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "received_at": now,
+    }, ("source", "event_key"))
+    db.commit()
+
+    if event_id is None:
+        inbox_events_total.inc(source=source, outcome="duplicate")
+        existing = (
+            db.query(models.WebhookInbox.id)
+            .filter(models.WebhookInbox.source == source, models.WebhookInbox.event_key == key)
+            .scalar()
+        )
+        seen_events.set((source, key), existing)
+        return existing, False
+
+    seen_events.set((source, key), event_id)
+    inbox_events_total.inc(source=source, outcome="received")
+    if dispatch:
+        submit(event_id)
+    return event_id, True
+
+
+def submit(event_id: int) -> None:
+    if _executor is not None:
+        _executor.submit(_process_in_worker, event_id)
+
+
+def _claim(db: Session, event_id: int, now: datetime) -> bool:
+    """
+    Atomically move a due event to "processing". Exactly one worker (in any
+    process) wins; stale "processing" rows past the lease are reclaimable.
+    """
+    WI = models.WebhookInbox
+    lease_expired = now - timedelta(seconds=settings.WEBHOOK_INBOX_LEASE_SECONDS)
+    claimed = (
+        db.query(WI)
+        .filter(WI.id == event_id)
+        .filter(or_(
+            and_(WI.status.in_(PENDING_STATUSES), WI.next_attempt_at <= now),
+            and_(WI.status == "processing", WI.locked_at <= lease_expired),
+        ))
+        .update(
+            {WI.status: "processing", WI.attempts: WI.attempts + 1, WI.locked_at: now},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    return claimed == 1
+
+
+def process_event(db: Session, event_id: int, now: Optional[datetime] = None) -> Optional[models.WebhookInbox]:
+    """
+    Run the handler for one stored event if it is due. Worker body; also
+    callable inline. Failures are retried with exponential backoff until
+    WEBHOOK_INBOX_MAX_ATTEMPTS, after which the event is marked "dead".
+    """
+    now = now or datetime.utcnow()
+    if not _claim(db, event_id, now):
+        return db.get(models.WebhookInbox, event_id)
+
+    event = db.get(models.WebhookInbox, event_id)
+    source = event.source
+    handler = HANDLERS.get(source)
+    try:
+        if handler is None:
+            raise LookupError(f"No webhook handler registered for {source!r}")
+        result = handler(db, json.loads(event.payload_json))
+    except Exception as exc:
+        db.rollback()
+        logger.exception("Webhook event %s (%s) failed", event_id, source)
+        event = db.get(models.WebhookInbox, event_id)
+        event.last_error = str(exc)[:2000]
+        event.locked_at = None
+        if event.attempts >= settings.WEBHOOK_INBOX_MAX_ATTEMPTS:
+            event.status = "dead"
+        else:
+            event.status = "retry"
+            event.next_attempt_at = now + retry_delay(event.attempts)
+        db.commit()
+        inbox_events_total.inc(source=source, outcome=event.status)
+        return event
+
+    event = db.get(models.WebhookInbox, event_id)
+    event.status = "done"
+    event.result_json = json.dumps(result, default=str)
+    event.last_error = None
+    event.locked_at = None
+    event.processed_at = datetime.utcnow()
+    db.commit()
+    inbox_events_total.inc(source=source, outcome="done")
+    return event
+
+
+def _process_in_worker(event_id: int) -> None:
+    db = SessionLocal()
+    try:
+        process_event(db, event_id)
+    except Exception:
+        logger.exception("Webhook worker crashed on event %s", event_id)
+    finally:
+        db.close()
+
+
+def due_event_ids(db: Session, now: Optional[datetime] = None, limit: int = 200) -> List[int]:
+    """Pending events whose retry time has come, plus abandoned "processing" ones."""
+    WI = models.WebhookInbox
+    now = now or datetime.utcnow()
+    lease_expired = now - timedelta(seconds=settings.WEBHOOK_INBOX_LEASE_SECONDS)
+    rows = (
+        db.query(WI.id)
+        .filter(or_(
+            and_(WI.status.in_(PENDING_STATUSES), WI.next_attempt_at <= now),
+            and_(WI.status == "processing", WI.locked_at <= lease_expired),
+        ))
+        .order_by(WI.id)
+        .limit(limit)
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+def drain_due(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Hand due events to the pool (scheduler job). Without workers they are
+    processed inline on `db`.
+    """
+    ids = due_event_ids(db, now)
+    for event_id in ids:
+        if _executor is not None:
+            submit(event_id)
+        else:
+            process_event(db, event_id, now)
+    return len(ids)
+
+
+def replay(db: Session, event_id: int, dispatch: bool = True) -> Optional[models.WebhookInbox]:
+    """
+    Queue a stored event to run again from scratch (attempts reset). Handlers
+    are idempotent, so replaying a "done" event is safe. Returns None if the
+    event does not exist; raises ValueError while it is being processed.
+    """
+    event = db.get(models.WebhookInbox, event_id)
+    if event is None:
+        return None
+    lease_expired = datetime.utcnow() - timedelta(seconds=settings.WEBHOOK_INBOX_LEASE_SECONDS)
+    if event.status == "processing" and event.locked_at and event.locked_at > lease_expired:
+        raise ValueError("Event is being processed")
+
+    event.status = "received"
+    event.attempts = 0
+    event.next_attempt_at = datetime.utcnow()
+    event.locked_at = None
+    event.last_error = None
+    db.commit()
+    inbox_events_total.inc(source=event.source, outcome="replayed")
+    if dispatch:
+        submit(event_id)
+    return event
+
+
+def serialize_event(event: models.WebhookInbox, include_payload: bool = False) -> Dict[str, Any]:
+    out = {
+        "id": event.id,
+        "source": event.source,
+        "event_key": event.event_key,
+        "status": event.status,
+        "attempts": event.attempts,
+        "next_attempt_at": event.next_attempt_at,
+        "last_error": event.last_error,
+        "result": json.loads(event.result_json) if event.result_json else None,
+        "received_at": event.received_at,
+        "processed_at": event.processed_at,
+    }
+    if include_payload:
+        out["payload"] = json.loads(event.payload_json)
+    return out
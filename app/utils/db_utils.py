@@ -0,0 +1,39 @@
+# app/utils/db_utils.py
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+
+def insert_ignore(db: Session, model, values: Dict[str, Any], conflict_columns: Sequence[str]) -> Optional[Any]:
+    """
+    Single INSERT returning the new primary key, or None when a row with the
+    same `conflict_columns` (a unique constraint) already exists.
+
+    PostgreSQL and SQLite use ON CONFLICT DO NOTHING, so a duplicate never
+    aborts the surrounding transaction; other backends fall back to a
+    savepoint around a plain INSERT. Column defaults of the ORM model are
+    not applied, so pass every required value.
+    """
+    table = model.__table__
+    pk = list(table.primary_key.columns)[0]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        dialect_insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = (
+            dialect_insert(table)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=list(conflict_columns))
+            .returning(pk)
+        )
+        return db.execute(stmt).scalar()
+
+    try:
+        with db.begin_nested():
+            return db.execute(insert(table).values(**values).returning(pk)).scalar()
+    except IntegrityError:
+        return None
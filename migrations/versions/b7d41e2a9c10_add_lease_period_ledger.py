@@ -0,0 +1,63 @@
+"""add lease_period_ledger rollup table
+
+Revision ID: add_lease_period_ledger
+Revises: add_payment_fields_and_allocations
+Create Date: 2026-10-16 09:00:00.000000
+
+Backfill after upgrading with:  python rebuild_ledger.py
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "add_lease_period_ledger"
+down_revision: Union[str, Sequence[str], None] = "add_payment_fields_and_allocations"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "lease_period_ledger",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("lease_id", sa.Integer(), nullable=False),
+        sa.Column("tenant_id", sa.Integer(), nullable=False),
+        sa.Column("unit_id", sa.Integer(), nullable=False),
+        sa.Column("property_id", sa.Integer(), nullable=False),
+        sa.Column("period", sa.String(length=7), nullable=False),
+        sa.Column("expected", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("allocated", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("credit", sa.Numeric(12, 2), nullable=False, server_default="0"),
+        sa.Column("status", sa.String(length=20), nullable=False, server_default="unpaid"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.ForeignKeyConstraint(["lease_id"], ["leases.id"]),
+        sa.ForeignKeyConstraint(["tenant_id"], ["tenants.id"]),
+        sa.ForeignKeyConstraint(["unit_id"], ["units.id"]),
+        sa.ForeignKeyConstraint(["property_id"], ["properties.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("lease_id", "period", name="uq_lease_period_ledger_lease_period"),
+    )
+
+    op.create_index("ix_lease_period_ledger_id", "lease_period_ledger", ["id"], unique=False)
+    op.create_index("ix_lease_period_ledger_unit_id", "lease_period_ledger", ["unit_id"], unique=False)
+    op.create_index(
+        "ix_lease_period_ledger_property_period",
+        "lease_period_ledger",
+        ["property_id", "period"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_lease_period_ledger_tenant_period",
+        "lease_period_ledger",
+        ["tenant_id", "period"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lease_period_ledger_tenant_period", table_name="lease_period_ledger")
+    op.drop_index("ix_lease_period_ledger_property_period", table_name="lease_period_ledger")
+    op.drop_index("ix_lease_period_ledger_unit_id", table_name="lease_period_ledger")
+    op.drop_index("ix_lease_period_ledger_id", table_name="lease_period_ledger")
+    op.drop_table("lease_period_ledger")
@@ -0,0 +1,47 @@
+"""add report_jobs table
+
+Revision ID: add_report_jobs
+Revises: add_lease_period_ledger
+Create Date: 2026-10-16 11:00:00.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "add_report_jobs"
+down_revision: Union[str, Sequence[str], None] = "add_lease_period_ledger"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=60), nullable=False),
+        sa.Column("params_json", sa.Text(), nullable=False),
+        sa.Column("params_hash", sa.String(length=64), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("requested_by_role", sa.String(length=30), nullable=True),
+        sa.Column("requested_by_id", sa.Integer(), nullable=True),
+        sa.Column("file_path", sa.String(), nullable=True),
+        sa.Column("file_name", sa.String(), nullable=True),
+        sa.Column("media_type", sa.String(length=120), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_report_jobs_id", "report_jobs", ["id"], unique=False)
+    op.create_index("ix_report_jobs_hash_status", "report_jobs", ["params_hash", "status"], unique=False)
+    op.create_index("ix_report_jobs_expires_at", "report_jobs", ["expires_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_report_jobs_expires_at", table_name="report_jobs")
+    op.drop_index("ix_report_jobs_hash_status", table_name="report_jobs")
+    op.drop_index("ix_report_jobs_id", table_name="report_jobs")
+    op.drop_table("report_jobs")
@@ -0,0 +1,43 @@
+"""add webhook_inbox table
+
+Revision ID: add_webhook_inbox
+Revises: add_report_jobs
+Create Date: 2026-10-16 15:00:00.000000
+"""
+
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "add_webhook_inbox"
+down_revision: Union[str, Sequence[str], None] = "add_report_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_inbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("source", sa.String(length=30), nullable=False),
+        sa.Column("event_key", sa.String(length=120), nullable=False),
+        sa.Column("payload_json", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=True),
+        sa.Column("locked_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("result_json", sa.Text(), nullable=True),
+        sa.Column("received_at", sa.DateTime(), nullable=False),
+        sa.Column("processed_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("source", "event_key", name="uq_webhook_inbox_source_key"),
+    )
+    op.create_index("ix_webhook_inbox_id", "webhook_inbox", ["id"], unique=False)
+    op.create_index("ix_webhook_inbox_status_due", "webhook_inbox", ["status", "next_attempt_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_webhook_inbox_status_due", table_name="webhook_inbox")
+    op.drop_index("ix_webhook_inbox_id", table_name="webhook_inbox")
+    op.drop_table("webhook_inbox")
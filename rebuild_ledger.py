@@ -0,0 +1,17 @@
+import sys
+
+from app.database import SessionLocal
+from app.services import ledger_service
+
+# Usage:
+#   python rebuild_ledger.py              -> rebuild every lease
+#   python rebuild_ledger.py 12 15 40     -> rebuild only these lease ids
+lease_ids = [int(x) for x in sys.argv[1:]] or None
+
+print("📒 Rebuilding lease_period_ledger...")
+db = SessionLocal()
+try:
+    rows = ledger_service.rebuild(db, lease_ids=lease_ids)
+finally:
+    db.close()
+print(f"✅ Ledger rebuilt ({rows} rows written).")
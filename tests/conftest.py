@@ -1,11 +1,13 @@
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# query budget violations fail requests under test instead of logging
+os.environ.setdefault("SQL_BUDGET_MODE", "strict")
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.database import Base
-from app.models import user_models, notification_model, property_models, payment_model, maintenance_models, Lease
+from app.models import user_models, notification_model, property_models, payment_model, maintenance_models, payout_models, Lease
 
 
 TEST_DATABASE_URL = "sqlite:///:memory:"
@@ -26,3 +28,19 @@ def db_session(engine):
     session.close()
     transaction.rollback()
     connection.close()
+
+
+@pytest.fixture(scope="function")
+def query_counter(engine):
+    """
+    Collects every SQL statement executed on the test engine.
+    Use `len(query_counter)` after the call under test; `.clear()` to reset.
+    """
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", _before_cursor_execute)
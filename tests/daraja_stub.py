@@ -0,0 +1,120 @@
+# tests/daraja_stub.py
+"""
+Local stand-in for the Daraja API (OAuth, STK push, STK query) used by the
+client and reconciler tests. Speaks HTTP/1.1 keep-alive so connection reuse
+is observable.
+"""
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class DarajaStub:
+    def __init__(self, expires_in: int = 3599, latency: float = 0.0):
+        self.expires_in = expires_in
+        self.latency = latency
+        self.hits = Counter()
+        self.connections = set()
+        self.failures = {}  # path -> [status, ...] served before normal replies
+        self.stk_results = {}  # CheckoutRequestID -> (ResultCode, ResultDesc)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.tokens_issued = 0
+        self.rejected_tokens = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def fail(self, path: str, *statuses: int) -> None:
+        self.failures.setdefault(path, []).extend(statuses)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _reply(self, path: str, seq: int, headers, body: dict):
+        with self._lock:
+            queued = self.failures.get(path)
+            if queued:
+                return queued.pop(0), {"errorMessage": "injected failure"}
+
+        if path == "/oauth/v1/generate":
+            with self._lock:
+                self.tokens_issued += 1
+                token = f"token-{self.tokens_issued}"
+            return 200, {"access_token": token, "expires_in": str(self.expires_in)}
+
+        token = (headers.get("Authorization") or "").replace("Bearer ", "")
+        if not token.startswith("token-") or token in self.rejected_tokens:
+            return 401, {"errorMessage": "Invalid Access Token"}
+
+        if path == "/mpesa/stkpush/v1/processrequest":
+            return 200, {
+                "MerchantRequestID": f"m-{seq}",
+                "CheckoutRequestID": f"ws_CO_{seq}",
+                "ResponseCode": "0",
+                "CustomerMessage": "Success. Request accepted for processing",
+            }
+        if path == "/mpesa/stkpushquery/v1/query":
+            checkout_id = body.get("CheckoutRequestID")
+            if checkout_id not in self.stk_results:
+                return 500, {"errorCode": "500.001.1001", "errorMessage": "The transaction is being processed"}
+            code, desc = self.stk_results[checkout_id]
+            return 200, {
+                "ResponseCode": "0",
+                "MerchantRequestID": "m-query",
+                "CheckoutRequestID": checkout_id,
+                "ResultCode": str(code),
+                "ResultDesc": desc,
+            }
+        return 404, {"errorMessage": "not found"}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                path = self.path.split("?", 1)[0]
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                with stub._lock:
+                    stub.hits[path] += 1
+                    seq = stub.hits[path]
+                    stub.connections.add(self.client_address)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    status, payload = stub._reply(path, seq, self.headers, body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+                raw = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            do_GET = _handle
+            do_POST = _handle
+
+        return Handler
@@ -0,0 +1,100 @@
+# tests/test_access_log.py
+import io
+import json
+import time
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.core import access_log
+from app.core.config import settings
+from app.core.sql_monitor import sql_monitor_middleware
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.middleware("http")(sql_monitor_middleware)
+    app.middleware("http")(access_log.access_log_middleware)
+
+    def _claims(request: Request):
+        request.state.claims = {"sub": "7", "role": "landlord"}
+
+    @app.get("/units/{unit_id}", dependencies=[Depends(_claims)])
+    def unit(unit_id: int):
+        return {"id": unit_id}
+
+    @app.get("/slow")
+    def slow():
+        time.sleep(0.05)
+        return {}
+
+    @app.get("/broken")
+    def broken():
+        raise HTTPException(status_code=503, detail="down")
+
+    return TestClient(app)
+
+
+def _stop():
+    listener = access_log._listener
+    assert listener is not None
+    thread = listener._thread
+    access_log.stop_access_logging()  # drains the queue, then joins the writer
+    assert access_log._listener is None
+    assert not thread.is_alive()
+
+
+def _lines(stream: io.StringIO):
+    _stop()
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_access_log_json_lines():
+    stream = io.StringIO()
+    access_log.configure_access_logging(stream)
+    client = _client()
+    assert client.get("/units/42").status_code == 200
+
+    (line,) = _lines(stream)
+    assert line["method"] == "GET"
+    assert line["route"] == "/units/{unit_id}"
+    assert line["status"] == 200
+    assert line["role"] == "landlord"
+    assert line["duration_ms"] >= 0
+    assert line["db_queries"] == 0
+
+
+def test_access_log_sampling_keeps_errors_and_slow(monkeypatch):
+    monkeypatch.setattr(settings, "ACCESS_LOG_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "ACCESS_LOG_SLOW_MS", 30)
+    stream = io.StringIO()
+    access_log.configure_access_logging(stream)
+    client = _client()
+
+    for _ in range(5):
+        client.get("/units/1")
+    client.get("/slow")
+    client.get("/broken")
+
+    assert [(l["route"], l["status"]) for l in _lines(stream)] == [("/slow", 200), ("/broken", 503)]
+
+
+def test_access_log_full_queue_drops(monkeypatch):
+    monkeypatch.setattr(settings, "ACCESS_LOG_QUEUE_SIZE", 1)
+    stream = io.StringIO()
+    access_log.configure_access_logging(stream)
+    _stop()  # nothing drains now: logging must not block
+
+    handler = access_log.logger.handlers[0]
+    for _ in range(3):
+        access_log.logger.info("access", extra={"access": {"n": 1}})
+    assert handler.dropped == 2
+
+
+def test_reconfigure_stops_previous_writer():
+    first = access_log.configure_access_logging(io.StringIO())
+    thread = first._thread
+    second = access_log.configure_access_logging(io.StringIO())
+    assert access_log._listener is second
+    assert not thread.is_alive()
+    _stop()
@@ -0,0 +1,78 @@
+# tests/test_admin_overview.py
+from decimal import Decimal
+
+from app import models
+from app.reports.admin_overview import build_admin_overview, get_admin_overview, overview_cache
+
+
+def _seed(db_session, tag: str, units: int):
+    landlord = models.Landlord(name=f"Landlord {tag}", phone=f"07{tag}33333", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+
+    prop = models.Property(name=f"Estate {tag}", address="Mombasa", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+
+    leases = []
+    for i in range(units):
+        unit = models.Unit(number=f"{tag}-{i}", rent_amount=Decimal("8000"), property_id=prop.id, occupied=1 if i else 0)
+        db_session.add(unit)
+        db_session.flush()
+        if not i:
+            continue
+        tenant = models.Tenant(name=f"T {tag}-{i}", phone=f"07{tag}{i:05d}", property_id=prop.id, unit_id=unit.id)
+        db_session.add(tenant)
+        db_session.flush()
+        lease = models.Lease(tenant_id=tenant.id, unit_id=unit.id, rent_amount=Decimal("8000"), active=1)
+        db_session.add(lease)
+        db_session.flush()
+        leases.append(lease)
+
+    db_session.commit()
+    return prop, leases
+
+
+def test_overview_values_and_query_count(db_session, query_counter):
+    prop, leases = _seed(db_session, "51", units=4)
+    lease = leases[0]
+    db_session.add(models.Payment(
+        tenant_id=lease.tenant_id, unit_id=lease.unit_id, lease_id=lease.id,
+        amount=Decimal("8000"), period="2026-05", status=models.PaymentStatus.paid,
+    ))
+    db_session.commit()
+    prop_id = prop.id
+
+    query_counter.clear()
+    out = build_admin_overview(db_session, "2026-05", 6)
+    assert len(query_counter) == 2
+
+    assert out["counts"]["units"] >= 4
+    assert out["collections"]["collected_total"] >= 8000.0
+    assert out["collections"]["paid_count"] >= 1
+
+    top = {r["id"]: r for r in out["properties_top"]}
+    assert top[prop_id]["units"] == 4
+    assert top[prop_id]["occupied_units"] == 3
+    assert top[prop_id]["vacant_units"] == 1
+
+
+def test_overview_cache_hits_and_invalidates_on_commit(db_session, query_counter):
+    overview_cache.clear()
+    _, leases = _seed(db_session, "52", units=3)
+
+    first = get_admin_overview(db_session, "2026-06", 6)
+    query_counter.clear()
+    assert get_admin_overview(db_session, "2026-06", 6) is first
+    assert len(query_counter) == 0
+
+    lease = leases[0]
+    db_session.add(models.Payment(
+        tenant_id=lease.tenant_id, unit_id=lease.unit_id, lease_id=lease.id,
+        amount=Decimal("8000"), period="2026-06", status=models.PaymentStatus.paid,
+    ))
+    db_session.commit()
+
+    fresh = get_admin_overview(db_session, "2026-06", 6)
+    assert fresh is not first
+    assert fresh["collections"]["collected_total"] == first["collections"]["collected_total"] + 8000.0
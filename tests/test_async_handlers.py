@@ -0,0 +1,75 @@
+# tests/test_async_handlers.py
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import event
+
+from app import database
+from app.routers import payment_router, webhooks_daraja
+from app.services import webhook_inbox_service
+
+SLOW_QUERY_SECONDS = 0.5
+
+
+def _app(db_session, router) -> FastAPI:
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[database.get_db] = lambda: db_session
+
+    @app.get("/healthz")
+    def health_check():
+        return {"status": "ok"}
+
+    return app
+
+
+def _callback(checkout_id: str) -> dict:
+    return {"Body": {"stkCallback": {
+        "MerchantRequestID": "m-1", "CheckoutRequestID": checkout_id,
+        "ResultCode": 0, "ResultDesc": "ok", "CallbackMetadata": {"Item": []},
+    }}}
+
+
+async def _race(app: FastAPI, path: str):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        started = time.perf_counter()
+
+        async def timed(coro):
+            res = await coro
+            return res, time.perf_counter() - started  # finish time since the race began
+
+        async def health_checks():
+            await asyncio.sleep(0.05)  # let the callback start first
+            return await asyncio.gather(*(timed(client.get("/healthz")) for _ in range(5)))
+
+        callback, checks = await asyncio.gather(
+            timed(client.post(path, json=_callback("slow-1"))), health_checks()
+        )
+    return callback, checks
+
+
+@pytest.mark.parametrize("router", [webhooks_daraja.router, payment_router.router])
+def test_slow_callback_does_not_block_health_checks(db_session, engine, router):
+    app = _app(db_session, router)
+    webhook_inbox_service.seen_events.clear()  # the callback must reach the database
+
+    def _slow(conn, cursor, statement, parameters, context, executemany):
+        # legacy handler queries payments; the inbox handler only stores the callback
+        if "FROM payments" in statement or "INTO webhook_inbox" in statement:
+            time.sleep(SLOW_QUERY_SECONDS)
+
+    event.listen(engine, "before_cursor_execute", _slow)
+    try:
+        (callback, callback_done), checks = asyncio.run(_race(app, "/payments/webhooks/daraja"))
+        assert callback.status_code == 200
+        assert callback_done >= SLOW_QUERY_SECONDS
+        # health checks are answered while the callback is still inside its slow query
+        for res, done in checks:
+            assert res.status_code == 200
+            assert done < SLOW_QUERY_SECONDS
+    finally:
+        event.remove(engine, "before_cursor_execute", _slow)
@@ -0,0 +1,112 @@
+# tests/test_daraja_client.py
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.services.daraja_service import AsyncDarajaClient, DarajaClient
+from daraja_stub import DarajaStub
+
+OAUTH = "/oauth/v1/generate"
+STK = "/mpesa/stkpush/v1/processrequest"
+
+
+def _push(client, n=1):
+    return client.initiate_stk_push(phone="254700000001", amount=100 * n, account_ref="LEASE1", description="Rent")
+
+
+def test_token_reused_over_one_keepalive_connection():
+    with DarajaStub() as stub:
+        client = DarajaClient(base_url=stub.url)
+        results = [_push(client, n) for n in range(5)]
+        client.close()
+
+    assert [r["CheckoutRequestID"] for r in results] == [f"ws_CO_{n}" for n in range(1, 6)]
+    assert stub.hits[OAUTH] == 1
+    assert stub.hits[STK] == 5
+    assert len(stub.connections) == 1
+
+
+def test_token_refresh_is_single_flight():
+    with DarajaStub(latency=0.1) as stub:
+        client = DarajaClient(base_url=stub.url)
+        barrier = threading.Barrier(8)
+        tokens = []
+
+        def worker():
+            barrier.wait()
+            tokens.append(client._access_token())
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    assert stub.hits[OAUTH] == 1
+    assert set(tokens) == {"token-1"}
+
+
+def test_rejected_token_is_refreshed_once():
+    with DarajaStub() as stub:
+        client = DarajaClient(base_url=stub.url)
+        _push(client)
+        stub.rejected_tokens.add("token-1")
+        assert _push(client)["ResponseCode"] == "0"
+
+    assert stub.hits[OAUTH] == 2
+    assert stub.hits[STK] == 3  # ok, 401, retried with token-2
+
+
+def test_retries_only_idempotent_requests():
+    with DarajaStub() as stub:
+        client = DarajaClient(base_url=stub.url)
+        stub.fail(OAUTH, 503)
+        assert client._access_token() == "token-1"  # GET retried transparently
+        assert stub.hits[OAUTH] == 2
+
+        stub.fail(STK, 503)
+        with pytest.raises(HTTPException) as exc:
+            _push(client)
+        assert exc.value.status_code == 502
+        assert stub.hits[STK] == 1  # an STK push is never re-sent
+
+
+def test_circuit_breaker_fails_fast():
+    with DarajaStub() as stub:
+        client = DarajaClient(base_url=stub.url, breaker=CircuitBreaker("daraja-test", failure_threshold=2, reset_seconds=60))
+        client._access_token()
+        stub.fail(STK, 500, 500)
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                _push(client)
+
+        with pytest.raises(HTTPException) as exc:
+            _push(client)
+        assert exc.value.status_code == 503
+        assert "Retry-After" in exc.value.headers
+        assert stub.hits[STK] == 2
+        assert client.breaker.state == "open"
+
+        client.breaker.reset_seconds = 0  # next call is the half-open trial
+        assert _push(client)["ResponseCode"] == "0"
+        assert client.breaker.state == "closed"
+
+
+def test_async_client_shares_token_and_pool():
+    with DarajaStub(latency=0.05) as stub:
+        client = AsyncDarajaClient(base_url=stub.url)
+
+        async def run():
+            try:
+                return await asyncio.gather(*(_push(client, n) for n in range(6)))
+            finally:
+                await client.aclose()
+
+        results = asyncio.run(run())
+
+    assert len({r["CheckoutRequestID"] for r in results}) == 6
+    assert stub.hits[OAUTH] == 1
+    assert stub.hits[STK] == 6
@@ -0,0 +1,49 @@
+# tests/test_db_pool.py
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.config import settings
+from app.core.db_pool import InstrumentedQueuePool, pool_metrics, pool_status
+from app.database import engine_options
+
+
+def test_engine_options_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 5000)
+
+    pg = engine_options("postgresql://u:p@db/app")
+    assert pg["echo"] is False
+    assert pg["poolclass"] is InstrumentedQueuePool
+    assert pg["pool_size"] == settings.DB_POOL_SIZE
+    assert pg["pool_recycle"] == settings.DB_POOL_RECYCLE_SECONDS
+    assert pg["connect_args"] == {"options": "-c statement_timeout=5000"}
+
+    assert "poolclass" not in engine_options("sqlite:///:memory:")
+    assert "connect_args" not in engine_options("sqlite:////tmp/app.db")
+
+
+def test_pool_checkout_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT_SECONDS", 0.05)
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    eng = create_engine(url, **engine_options(url))
+
+    before = pool_metrics.snapshot()
+    with eng.connect() as conn:
+        conn.execute(text("select 1"))
+        status = pool_status(eng)
+        assert (status["size"], status["checked_out"]) == (1, 1)
+
+        # pool of one, no overflow: a second checkout times out
+        with pytest.raises(exc.TimeoutError):
+            eng.connect()
+
+    after = pool_status(eng)
+    assert after["checked_out"] == 0
+    assert after["checkouts"] == before["checkouts"] + 1
+    assert after["timeouts"] == before["timeouts"] + 1
+    assert after["waiting"] == 0
+    latency = after["checkout_latency_seconds"]
+    assert latency["count"] == before["checkout_latency_seconds"]["count"] + 1
+    assert latency["buckets"]["+Inf"] == latency["count"]
+    eng.dispose()
@@ -0,0 +1,78 @@
+# tests/test_finance_summary.py
+from decimal import Decimal
+
+from app import models
+from app.reports.finance_summary import build_finance_summary
+from app.services import ledger_service
+
+
+def _seed_properties(db_session, tag: str, count: int, leases_per_property: int = 2):
+    landlord = models.Landlord(name=f"Landlord {tag}", phone=f"07{tag}44444", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+
+    props = []
+    for p in range(count):
+        prop = models.Property(name=f"Plaza {tag}-{p}", address="Kisumu", landlord_id=landlord.id)
+        db_session.add(prop)
+        db_session.flush()
+        props.append(prop)
+
+        for i in range(leases_per_property):
+            unit = models.Unit(number=f"{tag}-{p}-{i}", rent_amount=Decimal("6000"), property_id=prop.id)
+            db_session.add(unit)
+            db_session.flush()
+            tenant = models.Tenant(
+                name=f"T {tag}-{p}-{i}", phone=f"07{tag}{p:03d}{i:02d}", property_id=prop.id, unit_id=unit.id
+            )
+            db_session.add(tenant)
+            db_session.flush()
+            lease = models.Lease(tenant_id=tenant.id, unit_id=unit.id, rent_amount=Decimal("6000"), active=1)
+            db_session.add(lease)
+            db_session.flush()
+
+            # first lease of each property pays for the period
+            if i == 0:
+                payment = models.Payment(
+                    tenant_id=tenant.id, unit_id=unit.id, lease_id=lease.id, amount=Decimal("6000"),
+                    period="2026-04", status=models.PaymentStatus.paid,
+                )
+                db_session.add(payment)
+                db_session.flush()
+                db_session.add(models.PaymentAllocation(
+                    payment_id=payment.id, tenant_id=tenant.id, unit_id=unit.id, lease_id=lease.id,
+                    period="2026-04", amount_applied=Decimal("6000"),
+                ))
+                ledger_service.sync_lease(db_session, lease, periods=["2026-04"])
+
+    db_session.commit()
+    return [p.id for p in props]
+
+
+def test_finance_summary_values(db_session):
+    ids = _seed_properties(db_session, "61", count=2)
+
+    rows = {r["property_id"]: r for r in build_finance_summary(db_session, "2026-04", 2000)}
+    row = rows[ids[0]]
+
+    assert row["expected_rent"] == 12000.0
+    assert row["received_rent"] == 6000.0
+    assert row["balance"] == 6000.0
+    assert (row["paid_leases"], row["unpaid_leases"]) == (1, 1)
+
+
+def test_finance_summary_single_query_and_keyset(db_session, query_counter):
+    ids = _seed_properties(db_session, "62", count=12, leases_per_property=1)
+
+    query_counter.clear()
+    first = build_finance_summary(db_session, "2026-04", 5)
+    assert len(query_counter) == 1
+
+    second = build_finance_summary(db_session, "2026-04", 5, before_id=first[-1]["property_id"])
+    seen = [r["property_id"] for r in first + second]
+
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == 10
+    assert max(ids) in seen
+    # the lease aggregate is limited to the page, including keyset pages
+    assert all(r["expected_rent"] == 6000.0 for r in first + second)
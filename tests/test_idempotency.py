@@ -0,0 +1,251 @@
+# tests/test_idempotency.py
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app import database, models
+from app.core.config import settings
+from app.dependencies import get_current_user
+from app.routers import payment_router
+from app.services import idempotency_service, ledger_service, webhook_inbox_service
+
+ADMIN = {"sub": "1", "role": "admin"}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_caches(monkeypatch):
+    idempotency_service.replay_cache.clear()
+    webhook_inbox_service.seen_events.clear()
+    monkeypatch.setattr(webhook_inbox_service, "_executor", None)
+    # receipts and notifications are not under test here
+    monkeypatch.setattr(payment_router, "handle_payment_success", lambda db, payment: None)
+
+
+def _lease(db_session) -> models.Lease:
+    landlord = models.Landlord(name="Landlord Idem", phone="0794000000", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+    prop = models.Property(name="Idem Flats", address="Embu", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+    unit = models.Unit(number="ID-1", rent_amount=Decimal("6000"), property_id=prop.id)
+    db_session.add(unit)
+    db_session.flush()
+    tenant = models.Tenant(name="Idem Tenant", phone="0794000001", property_id=prop.id, unit_id=unit.id)
+    db_session.add(tenant)
+    db_session.flush()
+    lease = models.Lease(
+        tenant_id=tenant.id, unit_id=unit.id, rent_amount=Decimal("6000"),
+        start_date=date(2026, 1, 1), active=1,
+    )
+    db_session.add(lease)
+    db_session.flush()
+    ledger_service.sync_lease(db_session, lease)
+    db_session.commit()
+    return lease
+
+
+def _client(db_session) -> TestClient:
+    app = FastAPI()
+    app.include_router(payment_router.router)
+    app.dependency_overrides[database.get_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: ADMIN
+    return TestClient(app)
+
+
+def _payments(db_session, lease) -> int:
+    return db_session.query(models.Payment).filter(models.Payment.lease_id == lease.id).count()
+
+
+def test_record_payment_replays_on_retry(db_session, query_counter):
+    lease = _lease(db_session)
+    client = _client(db_session)
+    body = {"lease_id": lease.id, "amount": 2000, "periods": ["2026-01"]}
+    headers = {"Idempotency-Key": "pay-abc-1"}
+
+    first = client.post("/payments/record", json=body, headers=headers)
+    assert first.status_code == 200
+    assert "Idempotent-Replayed" not in first.headers
+
+    query_counter.clear()
+    again = client.post("/payments/record", json=body, headers=headers)
+    assert again.status_code == 200
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert again.json() == first.json()
+    assert query_counter == []  # answered from the replay cache
+    assert _payments(db_session, lease) == 1
+
+    # another worker process (empty cache) replays from the stored row
+    idempotency_service.replay_cache.clear()
+    assert client.post("/payments/record", json=body, headers=headers).json() == first.json()
+    assert _payments(db_session, lease) == 1
+
+    reused = client.post("/payments/record", json={**body, "amount": 2500}, headers=headers)
+    assert reused.status_code == 422
+
+    # no key: plain, non-idempotent behaviour
+    client.post("/payments/record", json=body)
+    assert _payments(db_session, lease) == 2
+
+
+def test_in_progress_and_expired_keys(db_session):
+    lease = _lease(db_session)
+    client = _client(db_session)
+    body = {"lease_id": lease.id, "amount": 1000, "periods": ["2026-02"]}
+    now = datetime.utcnow()
+    db_session.add(models.IdempotencyKey(
+        principal="admin:1", scope="POST /payments/record", key="busy",
+        request_hash=idempotency_service.request_hash(body), status="in_progress",
+        created_at=now, expires_at=now + timedelta(hours=1),
+    ))
+    db_session.add(models.IdempotencyKey(
+        principal="admin:1", scope="POST /payments/record", key="old",
+        request_hash="stale", status="completed", response_json="{}",
+        created_at=now - timedelta(days=2), expires_at=now - timedelta(days=1),
+    ))
+    db_session.commit()
+
+    busy = client.post("/payments/record", json=body, headers={"Idempotency-Key": "busy"})
+    assert busy.status_code == 409
+    assert busy.headers["Retry-After"] == "1"
+
+    # an expired key is taken over by the new request
+    fresh = client.post("/payments/record", json=body, headers={"Idempotency-Key": "old"})
+    assert fresh.status_code == 200
+    assert "Idempotent-Replayed" not in fresh.headers
+    assert _payments(db_session, lease) == 1
+
+    assert idempotency_service.purge_expired(db_session, now=now + timedelta(days=2)) == 2
+
+
+def test_duplicate_callbacks_short_circuit(db_session, query_counter):
+    lease = _lease(db_session)
+    client = _client(db_session)
+    db_session.add(models.Payment(
+        tenant_id=lease.tenant_id, unit_id=lease.unit_id, lease_id=lease.id, amount=Decimal("6000"),
+        period="2026-01", status=models.PaymentStatus.paid, checkout_request_id="ws_CO_dup",
+    ))
+    db_session.commit()
+    callback = {"Body": {"stkCallback": {
+        "MerchantRequestID": "m-dup", "CheckoutRequestID": "ws_CO_dup", "ResultCode": 0,
+        "CallbackMetadata": {"Item": [{"Name": "Amount", "Value": 6000}]},
+    }}}
+
+    event_id = client.post("/payments/webhooks/daraja", json=callback).json()["event_id"]
+    query_counter.clear()
+    assert client.post("/payments/webhooks/daraja", json=callback).json()["event_id"] == event_id
+    assert query_counter == []  # in-memory dedup
+
+    # the worker sees the payment is settled before loading any relationships
+    query_counter.clear()
+    event = webhook_inbox_service.process_event(db_session, event_id)
+    assert '"Payment already processed"' in event.result_json
+    assert not any("JOIN" in s for s in query_counter)
+
+
+def test_key_lease_and_failures_before_and_after_commit(engine):
+    # failures roll the session back, so use a real (committing) session
+    db = sessionmaker(bind=engine)()
+    IK = models.IdempotencyKey
+    calls = []
+
+    def _row(key):
+        return db.query(IK).filter(IK.principal == "admin:1", IK.key == key).one_or_none()
+
+    def _fails_before_commit():
+        calls.append("before")
+        raise RuntimeError("lease not found")
+
+    def _fails_after_commit():
+        calls.append("after")
+        now = datetime.utcnow()
+        db.add(IK(principal="side", scope="s", key=str(len(calls)), request_hash="x",
+                  status="completed", created_at=now, expires_at=now))
+        db.commit()
+        raise RuntimeError("receipt PDF failed")
+
+    def _succeeds():
+        row = _row("ok")
+        calls.append((row.status, row.expires_at))
+        return {"ok": True}
+
+    try:
+        # nothing written: the key is released and a retry runs again
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                idempotency_service.run(db, key="k1", scope="s", current=ADMIN, payload={}, fn=_fails_before_commit)
+        assert calls == ["before", "before"]
+        assert _row("k1") is None
+
+        # written, then failed: the failure is stored and a retry does not run fn again
+        with pytest.raises(RuntimeError):
+            idempotency_service.run(db, key="k2", scope="s", current=ADMIN, payload={}, fn=_fails_after_commit)
+        idempotency_service.replay_cache.clear()
+        with pytest.raises(HTTPException) as exc:
+            idempotency_service.run(db, key="k2", scope="s", current=ADMIN, payload={}, fn=_fails_after_commit)
+        assert exc.value.status_code == 500
+        assert exc.value.headers[idempotency_service.REPLAY_HEADER] == "true"
+        assert calls.count("after") == 1
+
+        # the reservation is a short lease, extended to the full TTL on completion
+        started = datetime.utcnow()
+        idempotency_service.run(db, key="ok", scope="s", current=ADMIN, payload={}, fn=_succeeds)
+        status, reserved_until = calls[-1]
+        assert status == "in_progress"
+        assert reserved_until <= started + timedelta(seconds=settings.IDEMPOTENCY_IN_PROGRESS_SECONDS + 5)
+        assert _row("ok").expires_at >= started + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    finally:
+        db.rollback()
+        db.query(IK).filter(IK.principal.in_(("admin:1", "side"))).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+
+def test_receipt_db_failure_still_completes_the_key(engine, monkeypatch):
+    db = sessionmaker(bind=engine)()
+    IK = models.IdempotencyKey
+
+    def _receipt_fails(session, payment):
+        session.add(models.Notification(user_id=None, user_type="tenant", title="x", message="x"))
+        session.commit()  # IntegrityError: the session now needs a rollback
+
+    monkeypatch.setattr(payment_router, "handle_payment_success", _receipt_fails)
+    lease = _lease(db)
+    try:
+        body = {"lease_id": lease.id, "amount": 2000, "periods": ["2026-01"]}
+
+        def _record():
+            # called directly: the in-memory test engine is per thread
+            return idempotency_service.run(
+                db, key="pay-receipt-fails", scope="POST /payments/record", current=ADMIN,
+                payload=body, response=Response(), fn=lambda: payment_router._record_payment(db, body),
+            )
+
+        first = _record()
+        row = db.query(IK).filter(IK.principal == "admin:1", IK.key == "pay-receipt-fails").one()
+        assert row.status == "completed"
+
+        idempotency_service.replay_cache.clear()
+        assert _record() == first
+        assert _payments(db, lease) == 1
+    finally:
+        db.rollback()
+        ids = [lease.id]
+        payment_ids = [p for (p,) in db.query(models.Payment.id).filter(models.Payment.lease_id.in_(ids))]
+        db.query(models.PaymentAllocation).filter(models.PaymentAllocation.payment_id.in_(payment_ids)).delete(
+            synchronize_session=False
+        )
+        db.query(models.Payment).filter(models.Payment.id.in_(payment_ids)).delete(synchronize_session=False)
+        db.query(models.LeasePeriodLedger).filter(models.LeasePeriodLedger.lease_id.in_(ids)).delete(
+            synchronize_session=False
+        )
+        db.query(IK).filter(IK.principal == "admin:1").delete(synchronize_session=False)
+        for obj in (lease, lease.tenant, lease.unit, lease.unit.property, lease.unit.property.landlord):
+            db.delete(obj)
+            db.flush()
+        db.commit()
+        db.close()
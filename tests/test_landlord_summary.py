@@ -0,0 +1,104 @@
+# tests/test_landlord_summary.py
+import csv
+import io
+import os
+from datetime import date
+from decimal import Decimal
+
+from openpyxl import load_workbook
+
+from app import models
+from app.reports.landlord_summary import (
+    build_landlord_monthly_summary,
+    iter_file_and_remove,
+    stream_landlord_monthly_csv,
+    write_landlord_monthly_xlsx,
+)
+from app.services.payment_allocation_service import allocate_payment
+
+
+def _seed_landlord(db_session, tag: str, properties: int, units: int):
+    landlord = models.Landlord(name=f"Landlord {tag}", phone=f"07{tag}55555", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+
+    for p in range(properties):
+        prop = models.Property(name=f"Heights {tag}-{p}", address="Eldoret", landlord_id=landlord.id)
+        db_session.add(prop)
+        db_session.flush()
+
+        for i in range(units):
+            unit = models.Unit(number=f"{tag}-{p}-{i}", rent_amount=Decimal("7000"), property_id=prop.id)
+            db_session.add(unit)
+            db_session.flush()
+            tenant = models.Tenant(
+                name=f"T {tag}-{p}-{i}", phone=f"07{tag}{p:02d}{i:03d}", property_id=prop.id, unit_id=unit.id
+            )
+            db_session.add(tenant)
+            db_session.flush()
+            lease = models.Lease(
+                tenant_id=tenant.id, unit_id=unit.id, start_date=date(2026, 1, 1),
+                rent_amount=Decimal("7000"), active=1,
+            )
+            db_session.add(lease)
+            db_session.flush()
+
+            # even units pay in full, odd units pay 3000
+            payment = models.Payment(
+                tenant_id=tenant.id, unit_id=unit.id, lease_id=lease.id,
+                amount=Decimal("7000") if i % 2 == 0 else Decimal("3000"),
+                period="2026-02", status=models.PaymentStatus.paid,
+            )
+            db_session.add(payment)
+            db_session.flush()
+            allocate_payment(db_session, payment=payment, lease=lease, periods=["2026-02"])
+
+    db_session.commit()
+    return landlord.id
+
+
+def test_landlord_summary_shape(db_session):
+    landlord_id = _seed_landlord(db_session, "71", properties=2, units=4)
+
+    out = build_landlord_monthly_summary(db_session, landlord_id, 2026, 2)
+
+    assert out["expected_total"] == 56000.0
+    assert out["received_total"] == 40000.0
+    assert out["pending_total"] == 16000.0
+    assert [p["expected"] for p in out["properties"]] == [28000.0, 28000.0]
+    assert len(out["arrears"]) == 4
+    assert all(a["balance"] == 4000.0 and a["lease_id"] for a in out["arrears"])
+
+
+def test_landlord_summary_query_budget_is_constant(db_session, query_counter):
+    small = _seed_landlord(db_session, "72", properties=1, units=2)
+    large = _seed_landlord(db_session, "73", properties=5, units=30)
+
+    query_counter.clear()
+    build_landlord_monthly_summary(db_session, small, 2026, 2)
+    small_count = len(query_counter)
+
+    query_counter.clear()
+    out = build_landlord_monthly_summary(db_session, large, 2026, 2)
+    large_count = len(query_counter)
+
+    assert small_count == large_count == 2
+    assert len(out["arrears"]) == 75
+
+
+def test_streaming_exports(db_session):
+    landlord_id = _seed_landlord(db_session, "74", properties=2, units=3)
+
+    chunks = list(stream_landlord_monthly_csv(db_session, landlord_id, 2026, 2))
+    rows = list(csv.reader(io.StringIO("".join(chunks))))
+    assert rows[1] == ["Expected Total", "42000.0"]
+    assert rows[-1][4] == "4000.0"
+    assert len([r for r in rows if len(r) == 6]) == 1 + 2  # header + two short leases
+
+    path = write_landlord_monthly_xlsx(db_session, landlord_id, 2026, 2)
+    data = b"".join(iter_file_and_remove(path))
+    assert not os.path.exists(path)
+
+    wb = load_workbook(io.BytesIO(data), read_only=True)
+    assert wb.sheetnames == ["Summary", "Properties", "Arrears"]
+    assert len(list(wb["Arrears"].iter_rows(values_only=True))) == 3
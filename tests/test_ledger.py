@@ -0,0 +1,131 @@
+# tests/test_ledger.py
+from datetime import date
+from decimal import Decimal
+
+from app import models, schemas
+from app.crud import report_crud, unit_crud
+from app.services import ledger_service
+from app.services.payment_allocation_service import allocate_payment
+
+
+def _seed_lease(db_session, tag: str, start: date, rent: str = "10000"):
+    landlord = models.Landlord(name=f"Landlord {tag}", phone=f"07{tag}11111", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+
+    prop = models.Property(name=f"Court {tag}", address="Nakuru", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+
+    unit = models.Unit(number=f"{tag}-A", rent_amount=Decimal(rent), property_id=prop.id)
+    db_session.add(unit)
+    db_session.flush()
+
+    tenant = models.Tenant(name=f"Tenant {tag}", phone=f"07{tag}22222", property_id=prop.id, unit_id=unit.id)
+    db_session.add(tenant)
+    db_session.flush()
+
+    lease = models.Lease(
+        tenant_id=tenant.id,
+        unit_id=unit.id,
+        start_date=start,
+        rent_amount=Decimal(rent),
+        active=1,
+    )
+    db_session.add(lease)
+    db_session.flush()
+    return landlord, prop, lease
+
+
+def _pay(db_session, lease, amount: str, periods):
+    payment = models.Payment(
+        tenant_id=lease.tenant_id,
+        unit_id=lease.unit_id,
+        lease_id=lease.id,
+        amount=Decimal(amount),
+        period=periods[0],
+        status=models.PaymentStatus.paid,
+    )
+    db_session.add(payment)
+    db_session.flush()
+    return allocate_payment(db_session, payment=payment, lease=lease, periods=periods)
+
+
+def _rows(db_session, lease):
+    return {
+        r.period: r
+        for r in db_session.query(models.LeasePeriodLedger)
+        .filter(models.LeasePeriodLedger.lease_id == lease.id)
+        .all()
+    }
+
+
+def test_sync_lease_opens_rows_up_to_current_period(db_session):
+    start = ledger_service.add_months(ledger_service.current_period(), -2)
+    _, _, lease = _seed_lease(db_session, "41", date(int(start[:4]), int(start[5:]), 1))
+
+    ledger_service.sync_lease(db_session, lease)
+    rows = _rows(db_session, lease)
+
+    assert sorted(rows) == ledger_service.period_range(start, ledger_service.current_period())
+    assert all(r.status == "unpaid" and r.expected == Decimal("10000") for r in rows.values())
+
+
+def test_allocate_payment_updates_ledger(db_session):
+    _, prop, lease = _seed_lease(db_session, "42", date(2026, 1, 1))
+    ledger_service.sync_lease(db_session, lease)
+
+    _pay(db_session, lease, "15000", ["2026-01", "2026-02"])
+    _pay(db_session, lease, "8000", ["2026-02"])
+
+    rows = _rows(db_session, lease)
+    assert rows["2026-01"].allocated == Decimal("10000")
+    assert rows["2026-01"].status == "paid"
+    assert rows["2026-02"].allocated == Decimal("10000")
+    assert rows["2026-02"].status == "paid"
+    assert rows[ledger_service.CREDIT_PERIOD].allocated == Decimal("3000")
+
+    # ledger matches a recompute from scratch
+    before = {p: (r.expected, r.allocated, r.status) for p, r in rows.items()}
+    db_session.query(models.LeasePeriodLedger).delete()
+    ledger_service._sync(db_session, [lease])
+    after = {p: (r.expected, r.allocated, r.status) for p, r in _rows(db_session, lease).items()}
+    assert after == before
+
+
+def test_monthly_summary_reads_ledger(db_session):
+    landlord, prop, lease = _seed_lease(db_session, "43", date(2026, 1, 1))
+    ledger_service.sync_lease(db_session, lease)
+    _pay(db_session, lease, "4000", ["2026-03"])
+
+    out = report_crud.landlord_monthly_summary(db_session, landlord.id, 2026, 3)
+    assert out["expected_total"] == 10000.0
+    assert out["received_total"] == 4000.0
+    assert out["arrears"][0]["balance"] == 6000.0
+
+    single = report_crud.property_monthly_summary(db_session, prop.id, 2026, 3)
+    assert (single["expected"], single["received"], single["pending"]) == (10000.0, 4000.0, 6000.0)
+
+
+def test_unit_rent_change_keeps_past_expected(db_session):
+    start = ledger_service.add_months(ledger_service.current_period(), -2)
+    _, _, lease = _seed_lease(db_session, "44", date(int(start[:4]), int(start[5:]), 1))
+    ledger_service.sync_lease(db_session, lease)
+
+    unit_crud.update_unit(db_session, lease.unit_id, schemas.UnitUpdate(rent_amount=12000))
+
+    rows = _rows(db_session, lease)
+    now = ledger_service.current_period()
+    assert rows[now].expected == Decimal("12000")
+    assert all(r.expected == Decimal("10000") for p, r in rows.items() if p < now)
+
+    # paying and rebuilding a past month keeps what was due then
+    past = ledger_service.add_months(now, -1)
+    _pay(db_session, lease, "10000", [past])
+    assert _rows(db_session, lease)[past].expected == Decimal("10000")
+    assert _rows(db_session, lease)[past].status == "paid"
+
+    ledger_service.rebuild(db_session, lease_ids=[lease.id])
+    rows = _rows(db_session, lease)
+    assert rows[now].expected == Decimal("12000")
+    assert all(r.expected == Decimal("10000") for p, r in rows.items() if p < now)
@@ -0,0 +1,104 @@
+# tests/test_metrics.py
+import pytest
+import requests
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.http_metrics import http_metrics_middleware
+from app.routers import metrics_router
+from app.services import daraja_service, reminder_service
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.middleware("http")(http_metrics_middleware)
+    app.include_router(metrics_router.router)
+
+    @app.get("/units/{unit_id}/probe")
+    def probe(unit_id: int):
+        return {"id": unit_id}
+
+    return TestClient(app)
+
+
+def _sample(text: str, prefix: str) -> float:
+    (line,) = [l for l in text.splitlines() if l.startswith(prefix + " ")]
+    return float(line.rsplit(" ", 1)[1])
+
+
+def test_exposition_format():
+    reg = metrics.Registry()
+    c = reg.counter("jobs_total", "Jobs.", ("kind",))
+    h = reg.histogram("job_seconds", "Job time.", buckets=(0.1, 1.0))
+    reg.gauge("depth", "Queue depth.", lambda: 3)
+    c.inc(kind='a"b')
+    c.inc(2, kind="x")
+    h.observe(0.05)
+    h.observe(5)
+
+    assert reg.render().splitlines() == [
+        "# HELP jobs_total Jobs.",
+        "# TYPE jobs_total counter",
+        'jobs_total{kind="a\\"b"} 1',
+        'jobs_total{kind="x"} 2',
+        "# HELP job_seconds Job time.",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{le="0.1"} 1',
+        'job_seconds_bucket{le="1"} 1',
+        'job_seconds_bucket{le="+Inf"} 2',
+        "job_seconds_sum 5.05",
+        "job_seconds_count 2",
+        "# HELP depth Queue depth.",
+        "# TYPE depth gauge",
+        "depth 3",
+    ]
+    with pytest.raises(ValueError):
+        c.inc(other="x")
+
+
+def test_metrics_endpoint_route_template(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    client = _client()
+    before = client.get("/metrics").text
+    prefix = 'http_requests_total{method="GET",route="/units/{unit_id}/probe",status="200"}'
+    start = _sample(before, prefix) if prefix in before else 0
+
+    for unit_id in (1, 2, 3):
+        client.get(f"/units/{unit_id}/probe")
+    client.get("/no/such/path")
+
+    resp = client.get("/metrics")
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = resp.text
+    assert _sample(body, prefix) == start + 3
+    assert "/units/1/probe" not in body
+    assert 'route="<unmatched>",status="404"' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/units/{unit_id}/probe",le="+Inf"}' in body
+    assert "# TYPE db_pool_connections gauge" in body
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_job_and_daraja_instrumentation(monkeypatch):
+    @reminder_service.instrumented
+    def flaky_job():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flaky_job()
+    assert reminder_service.job_runs_total.value(job="flaky_job", outcome="error") == 1
+    assert reminder_service.job_duration_seconds.labels(job="flaky_job").count == 1
+
+    def _timeout(*args, **kwargs):
+        raise requests.Timeout("slow")
+
+    client = daraja_service.DarajaClient()
+    monkeypatch.setattr(client.session, "request", _timeout)
+    before = daraja_service.daraja_errors_total.value(operation="oauth", reason="timeout")
+    with pytest.raises(requests.Timeout):
+        client._access_token()
+    assert daraja_service.daraja_errors_total.value(operation="oauth", reason="timeout") == before + 1
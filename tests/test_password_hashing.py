@@ -0,0 +1,193 @@
+# tests/test_password_hashing.py
+import asyncio
+import threading
+import time
+
+import anyio
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app import models
+from app.auth import password_utils
+from app.core.config import settings
+from app.routers.auth_router import login_user
+from app.schemas.auth_schemas import LoginUser
+from app.utils.phone_utils import normalize_ke_phone
+
+
+def _rounds(hashed: str) -> int:
+    return int(hashed.split("$")[2])
+
+
+def test_rehash_on_login_when_cost_changes(db_session):
+    weak = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("s3cret!")
+    landlord = models.Landlord(name="Rehash", phone=normalize_ke_phone("0712000111"), password=weak)
+    db_session.add(landlord)
+    db_session.commit()
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(login_user(LoginUser(phone="0712000111", password="wrong", role="landlord"), db=db_session))
+    assert exc.value.status_code == 401
+    assert db_session.get(models.Landlord, landlord.id).password == weak
+
+    out = asyncio.run(login_user(LoginUser(phone="0712000111", password="s3cret!", role="landlord"), db=db_session))
+    assert out["id"] == landlord.id
+
+    upgraded = db_session.get(models.Landlord, landlord.id).password
+    assert _rounds(upgraded) == settings.BCRYPT_ROUNDS
+    assert password_utils.verify_password("s3cret!", upgraded)
+
+    # already at the configured cost: nothing to update
+    assert password_utils.verify_and_update("s3cret!", upgraded) == (True, None)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate(password_utils.hasher_stats()):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_executor_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", 1)
+    workers = password_utils.hasher_stats()["workers"]
+    release = threading.Event()
+    threads = []
+
+    def _start():
+        t = threading.Thread(target=password_utils._run, args=(release.wait,))
+        t.start()
+        threads.append(t)
+
+    try:
+        # occupy every worker, then put one call in the queue
+        for i in range(workers):
+            _start()
+            assert _wait_for(lambda s: s["running"] == i + 1)
+        _start()
+        assert _wait_for(lambda s: s["queue_depth"] == 1)
+
+        rejected = password_utils.hasher_stats()["rejected"]
+        with pytest.raises(password_utils.PasswordHasherBusy):
+            password_utils.hash_password("another")
+        assert password_utils.hasher_stats()["rejected"] == rejected + 1
+    finally:
+        release.set()
+        for t in threads:
+            t.join()
+
+    assert password_utils.hasher_stats()["queue_depth"] == 0
+
+
+def test_hasher_busy_is_a_503_everywhere(db_session, monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.crud import tenant as tenant_crud
+    from app.schemas.tenant_schema import TenantCreate
+
+    assert main.app.exception_handlers[password_utils.PasswordHasherBusy] is main.password_hasher_busy_handler
+
+    def _busy(password):
+        raise password_utils.PasswordHasherBusy("Password hashing queue is full")
+
+    landlord = models.Landlord(name="Landlord Busy", phone="0799000100", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+    prop = models.Property(name="Busy Court", address="Kisumu", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+    unit = models.Unit(number="B-1", rent_amount=1000, property_id=prop.id)
+    db_session.add(unit)
+    db_session.commit()
+
+    monkeypatch.setattr(tenant_crud, "hash_password", _busy)
+    app = FastAPI()
+    app.add_exception_handler(password_utils.PasswordHasherBusy, main.password_hasher_busy_handler)
+
+    @app.post("/tenants")
+    def _create():
+        payload = TenantCreate(
+            name="Busy Tenant", phone="0799000123", property_id=prop.id, unit_id=unit.id, password="secret1"
+        )
+        return tenant_crud.create_tenant(db_session, payload)
+
+    resp = TestClient(app).post("/tenants")
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
+
+
+@pytest.fixture
+def blocked_hasher(monkeypatch):
+    """Every hasher worker busy and the queue (size 1) full until released."""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", 1)
+    workers = password_utils.hasher_stats()["workers"]
+    release = threading.Event()
+    futures = [password_utils._submit(release.wait) for _ in range(workers)]
+    assert _wait_for(lambda s: s["running"] == workers)
+    futures.append(password_utils._submit(release.wait))
+    assert _wait_for(lambda s: s["queue_depth"] == 1)
+    yield release
+    release.set()
+    for f in futures:
+        f.result()
+
+
+def _login_landlord(db_session, phone):
+    landlord = models.Landlord(
+        name="Login Busy", phone=normalize_ke_phone(phone),
+        password=CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("s3cret!"),
+    )
+    db_session.add(landlord)
+    db_session.commit()
+    return LoginUser(phone=phone, password="s3cret!", role="landlord")
+
+
+def test_login_waits_for_bcrypt_without_a_threadpool_worker(db_session, monkeypatch):
+    data = _login_landlord(db_session, "0712000222")
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_QUEUE", 1)
+    workers = password_utils.hasher_stats()["workers"]
+    release = threading.Event()
+    futures = [password_utils._submit(release.wait) for _ in range(workers)]
+    assert _wait_for(lambda s: s["running"] == workers)
+
+    async def _main():
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        login = asyncio.create_task(login_user(data, db=db_session))
+        while password_utils.hasher_stats()["queue_depth"] < 1:
+            await asyncio.sleep(0.01)
+        # queued behind bcrypt, yet holding no request thread
+        assert limiter.borrowed_tokens == 0
+        release.set()
+        return await login
+
+    try:
+        assert asyncio.run(_main())["role"] == "landlord"
+    finally:
+        release.set()
+        for f in futures:
+            f.result()
+
+
+def test_login_burst_gets_503_when_hasher_is_full(db_session, blocked_hasher):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.auth.dependencies import get_db
+    from app.routers import auth_router
+
+    data = _login_landlord(db_session, "0712000333")
+    app = FastAPI()
+    app.include_router(auth_router.router)
+    app.add_exception_handler(password_utils.PasswordHasherBusy, main.password_hasher_busy_handler)
+    app.dependency_overrides[get_db] = lambda: db_session
+
+    resp = TestClient(app).post("/auth/login", json=data.model_dump())
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
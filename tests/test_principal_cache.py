@@ -0,0 +1,76 @@
+# tests/test_principal_cache.py
+import pytest
+from fastapi import HTTPException
+
+from app import models
+from app.auth.jwt_utils import create_access_token, decode_access_token
+from app.auth.principal_cache import principal_cache
+from app.dependencies import get_current_user as _get_current_user
+
+
+def get_current_user(token, db):
+    return _get_current_user(payload=decode_access_token(token), db=db)
+
+
+def _admin(db_session, tag: str):
+    admin = models.Admin(name=f"Admin {tag}", email=f"admin{tag}@example.com", password="x", active=True)
+    db_session.add(admin)
+    db_session.commit()
+    return admin
+
+
+def test_principal_cached_per_token(db_session, query_counter):
+    principal_cache.clear()
+    before = principal_cache.stats()
+    admin = _admin(db_session, "91")
+    token = create_access_token({"sub": str(admin.id), "role": "admin"})
+
+    query_counter.clear()
+    first = get_current_user(token=token, db=db_session)
+    assert len(query_counter) == 1
+
+    query_counter.clear()
+    second = get_current_user(token=token, db=db_session)
+    assert len(query_counter) == 0
+    assert second == first
+
+    # callers mutating the returned context never touch the cached copy
+    second["role"] = "super_admin"
+    assert get_current_user(token=token, db=db_session)["role"] == "admin"
+
+    stats = principal_cache.stats()
+    assert stats["hits"] - before["hits"] == 2
+    assert stats["misses"] - before["misses"] == 1
+
+
+def test_principal_invalidated_on_deactivate(db_session):
+    principal_cache.clear()
+    admin = _admin(db_session, "92")
+    other = _admin(db_session, "93")
+    token = create_access_token({"sub": str(admin.id), "role": "admin"})
+    other_token = create_access_token({"sub": str(other.id), "role": "admin"})
+    get_current_user(token=token, db=db_session)
+    get_current_user(token=other_token, db=db_session)
+    assert len(principal_cache) == 2
+
+    admin.active = False
+    db_session.commit()
+    assert len(principal_cache) == 1
+
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(token=token, db=db_session)
+    assert exc.value.status_code == 403
+
+
+def test_principal_invalidated_on_password_change(db_session, query_counter):
+    principal_cache.clear()
+    admin = _admin(db_session, "94")
+    token = create_access_token({"sub": str(admin.id), "role": "admin"})
+    get_current_user(token=token, db=db_session)
+
+    admin.password = "changed"
+    db_session.commit()
+
+    query_counter.clear()
+    get_current_user(token=token, db=db_session)
+    assert len(query_counter) == 1
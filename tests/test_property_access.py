@@ -0,0 +1,88 @@
+# tests/test_property_access.py
+from app import models
+from app.models.agency_models import AgencyAgentLink, PropertyExternalManagerAssignment
+from app.routers.agency_router import (
+    assign_property_to_external_manager,
+    assign_property_to_staff,
+    unassign_property_from_staff,
+)
+from app.services.property_access_service import (
+    access_cache,
+    can_access_property,
+    visible_property_ids,
+)
+
+
+def _seed(db_session):
+    landlord = models.Landlord(name="Access Landlord", phone="0755000000", password="x")
+    agency = models.PropertyManager(name="Agency", phone="0755000001", type="agency")
+    agent = models.PropertyManager(name="Agent Org", phone="0755000002", type="individual")
+    db_session.add_all([landlord, agency, agent])
+    db_session.flush()
+
+    admin = models.ManagerUser(
+        manager_id=agency.id, name="Agency Admin", phone="0755000003",
+        password_hash="x", staff_role="manager_admin",
+    )
+    staff = models.ManagerUser(manager_id=agency.id, name="Staff", phone="0755000004", password_hash="x")
+    agent_staff = models.ManagerUser(manager_id=agent.id, name="Agent Staff", phone="0755000005", password_hash="x")
+    db_session.add_all([admin, staff, agent_staff])
+    db_session.flush()
+
+    props = [
+        models.Property(name=f"Access {i}", address="Kisumu", landlord_id=landlord.id, manager_id=agency.id)
+        for i in range(3)
+    ]
+    db_session.add_all(props)
+    db_session.add(AgencyAgentLink(agency_manager_id=agency.id, agent_manager_id=agent.id, status="active"))
+    db_session.commit()
+
+    claims = {
+        "admin": {"role": "manager", "sub": str(admin.id), "manager_id": agency.id, "staff_role": "manager_admin"},
+        "staff": {"role": "manager", "sub": str(staff.id), "manager_id": agency.id},
+        "agent": {"role": "manager", "sub": str(agent_staff.id), "manager_id": agent.id},
+        "landlord": {"role": "landlord", "sub": str(landlord.id)},
+    }
+    return claims, [p.id for p in props], staff.id, agent.id
+
+
+def test_visible_set_single_query_and_cached(db_session, query_counter):
+    access_cache.clear()
+    claims, prop_ids, staff_id, agent_id = _seed(db_session)
+
+    query_counter.clear()
+    assert visible_property_ids(db_session, claims["agent"]) == frozenset()
+    assert len(query_counter) == 1
+
+    query_counter.clear()
+    assert visible_property_ids(db_session, claims["staff"]) == frozenset(prop_ids)
+    assert visible_property_ids(db_session, claims["staff"]) == frozenset(prop_ids)
+    assert len(query_counter) == 1
+
+    assert visible_property_ids(db_session, claims["landlord"]) == frozenset(prop_ids)
+    assert visible_property_ids(db_session, {"role": "admin", "sub": "1"}) is None
+    assert visible_property_ids(db_session, {"role": "tenant", "sub": "1"}) == frozenset()
+
+
+def test_agency_endpoints_invalidate(db_session):
+    access_cache.clear()
+    claims, prop_ids, staff_id, agent_id = _seed(db_session)
+    target = prop_ids[0]
+
+    assert not can_access_property(db_session, claims["agent"], target)
+    assign_property_to_external_manager(target, agent_id, db=db_session, payload=claims["admin"])
+    assert can_access_property(db_session, claims["agent"], target)
+
+    # a raw bulk update bypasses the session hooks: the set stays cached
+    # until one of the agency endpoints invalidates the index
+    db_session.query(PropertyExternalManagerAssignment).update({"active": False}, synchronize_session=False)
+    db_session.commit()
+    assert can_access_property(db_session, claims["agent"], target)
+
+    assign_property_to_staff(target, staff_id, db=db_session, payload=claims["admin"])
+    assert not can_access_property(db_session, claims["agent"], target)
+
+    visible_property_ids(db_session, claims["staff"])
+    assert len(access_cache) > 0
+    unassign_property_from_staff(target, db=db_session, payload=claims["admin"])
+    assert len(access_cache) == 0
@@ -0,0 +1,93 @@
+# tests/test_property_status_report.py
+from decimal import Decimal
+
+from app import models
+from app.reports.property_status import build_property_status
+
+
+def _seed_property(db_session, units: int, tag: str):
+    landlord = models.Landlord(name=f"Landlord {tag}", phone=f"07{tag}00000", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+
+    prop = models.Property(name=f"Block {tag}", address="Nairobi", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+
+    for i in range(units):
+        unit = models.Unit(number=f"{tag}-{i}", rent_amount=Decimal("10000"), property_id=prop.id)
+        db_session.add(unit)
+        db_session.flush()
+
+        # every third unit is vacant
+        if i % 3 == 2:
+            continue
+
+        tenant = models.Tenant(
+            name=f"Tenant {tag}-{i}",
+            phone=f"07{tag}{i:05d}",
+            property_id=prop.id,
+            unit_id=unit.id,
+        )
+        db_session.add(tenant)
+        db_session.flush()
+
+        lease = models.Lease(tenant_id=tenant.id, unit_id=unit.id, rent_amount=Decimal("10000"), active=1)
+        db_session.add(lease)
+        db_session.flush()
+
+        # even units pay in full, odd units pay half and stay pending
+        amount = Decimal("10000") if i % 2 == 0 else Decimal("5000")
+        status = models.PaymentStatus.paid if i % 2 == 0 else models.PaymentStatus.pending
+        db_session.add(models.Payment(
+            tenant_id=tenant.id,
+            unit_id=unit.id,
+            lease_id=lease.id,
+            amount=amount,
+            period="2026-03",
+            status=status,
+        ))
+
+    db_session.commit()
+    return prop
+
+
+def test_property_status_shape(db_session):
+    prop = _seed_property(db_session, units=6, tag="11")
+
+    out = build_property_status(db_session, [prop.id], "2026-03")[prop.id]
+
+    assert out["property_id"] == prop.id
+    assert out["period"] == "2026-03"
+    assert len(out["items"]) == 6
+
+    by_number = {it["unit_number"]: it for it in out["items"]}
+    assert by_number["11-0"]["paid"] is True
+    assert by_number["11-0"]["amount_due"] == 0.0
+    assert by_number["11-1"]["status"] == "pending"
+    assert by_number["11-1"]["amount_due"] == 5000.0
+    assert by_number["11-2"]["lease_id"] is None
+    assert by_number["11-2"]["expected"] == 0.0
+
+    assert out["totals"] == {"expected": 40000.0, "received": 30000.0, "pending": 10000.0}
+
+
+def test_property_status_query_count_is_flat(db_session, query_counter):
+    small = _seed_property(db_session, units=5, tag="22")
+    large = _seed_property(db_session, units=200, tag="33")
+    small_id, large_id = small.id, large.id
+
+    query_counter.clear()
+    build_property_status(db_session, [small_id], "2026-03")
+    small_count = len(query_counter)
+
+    query_counter.clear()
+    build_property_status(db_session, [large_id], "2026-03")
+    large_count = len(query_counter)
+
+    query_counter.clear()
+    grid = build_property_status(db_session, [small_id, large_id], "2026-03")
+    portfolio_count = len(query_counter)
+
+    assert small_count == large_count == portfolio_count == 2
+    assert len(grid[large_id]["items"]) == 200
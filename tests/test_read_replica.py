@@ -0,0 +1,80 @@
+# tests/test_read_replica.py
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import database, models
+from app.auth.jwt_utils import create_access_token
+from app.core import read_replica
+from app.dependencies import get_claims, get_read_db
+
+
+def _db(tmp_path, name: str, marker: str):
+    url = f"sqlite:///{tmp_path / name}"
+    eng = create_engine(url, **database.engine_options(url))
+    database.Base.metadata.create_all(eng)
+    factory = sessionmaker(bind=eng, autocommit=False, autoflush=False)
+    with factory() as db:
+        db.add(models.Landlord(name=marker, phone=f"07{len(marker)}0000000", password="x"))
+        db.commit()
+    return eng, factory
+
+
+def _client(tmp_path, monkeypatch) -> TestClient:
+    _, primary = _db(tmp_path, "primary.db", "primary")
+    replica_engine, replica = _db(tmp_path, "replica.db", "replica!")
+    monkeypatch.setattr(database, "SessionLocal", primary)
+    monkeypatch.setattr(database, "ReplicaSessionLocal", replica)
+    monkeypatch.setattr(database, "replica_engine", replica_engine)
+    read_replica.recent_writers.clear()
+
+    app = FastAPI()
+    app.middleware("http")(read_replica.pin_writers_to_primary)
+
+    @app.get("/source")
+    def source(db: Session = Depends(get_read_db)):
+        return {"source": db.query(models.Landlord.name).scalar()}
+
+    @app.post("/write")
+    def write(claims: dict = Depends(get_claims)):
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def _auth(sub: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(sub), 'role': 'landlord'})}"}
+
+
+def test_reads_route_to_replica_until_principal_writes(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    alice, bob = _auth(1), _auth(2)
+
+    assert client.get("/source").json() == {"source": "replica!"}
+    assert client.get("/source", headers=alice).json() == {"source": "replica!"}
+
+    assert client.post("/write", headers=alice).status_code == 200
+    # read-your-writes: alice is pinned to the primary, bob is not
+    assert client.get("/source", headers=alice).json() == {"source": "primary"}
+    assert client.get("/source", headers=bob).json() == {"source": "replica!"}
+
+    # failed writes do not pin
+    assert client.post("/write").status_code == 401
+    assert client.get("/source").json() == {"source": "replica!"}
+
+    read_replica.recent_writers.clear()  # lag window elapsed
+    assert client.get("/source", headers=alice).json() == {"source": "replica!"}
+
+
+def test_lagging_replica_falls_back_to_primary(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    monkeypatch.setattr(read_replica, "replica_lag_seconds", lambda engine: 60.0)
+    assert client.get("/source").json() == {"source": "primary"}
+
+
+def test_no_replica_configured_uses_primary(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    monkeypatch.setattr(database, "ReplicaSessionLocal", None)
+    monkeypatch.setattr(database, "replica_engine", None)
+    assert client.get("/source").json() == {"source": "primary"}
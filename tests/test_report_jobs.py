@@ -0,0 +1,87 @@
+# tests/test_report_jobs.py
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import models
+from app.services import report_job_service
+
+
+def _seed_landlord(db_session):
+    landlord = models.Landlord(name="Landlord Jobs", phone="0781000000", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+    prop = models.Property(name="Jobs Court", address="Thika", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+    unit = models.Unit(number="J-1", rent_amount=Decimal("9000"), property_id=prop.id)
+    db_session.add(unit)
+    db_session.flush()
+    tenant = models.Tenant(name="Jobs Tenant", phone="0781000001", property_id=prop.id, unit_id=unit.id)
+    db_session.add(tenant)
+    db_session.flush()
+    db_session.add(models.Lease(tenant_id=tenant.id, unit_id=unit.id, rent_amount=Decimal("9000"), active=1))
+    db_session.commit()
+    return landlord.id
+
+
+def test_report_job_lifecycle(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(report_job_service, "REPORT_DIR", str(tmp_path))
+    landlord_id = _seed_landlord(db_session)
+    params = {"landlord_id": landlord_id, "year": 2026, "month": 7}
+
+    job = report_job_service.enqueue(db_session, "landlord_monthly_xlsx", params, "landlord", landlord_id, submit=False)
+    assert job.status == "queued"
+
+    # identical in-flight request is deduplicated
+    dup = report_job_service.enqueue(db_session, "landlord_monthly_xlsx", dict(params), "landlord", landlord_id, submit=False)
+    assert dup.id == job.id
+
+    done = report_job_service.run_job(db_session, job.id)
+    assert done.status == "done"
+    assert os.path.dirname(done.file_path) == str(tmp_path)
+    assert os.path.getsize(done.file_path) > 0
+    assert report_job_service.serialize_job(done)["download_url"] == f"/reports/jobs/{job.id}/download"
+
+    # still downloadable -> reused
+    again = report_job_service.enqueue(db_session, "landlord_monthly_xlsx", params, "landlord", landlord_id, submit=False)
+    assert again.id == job.id
+
+    # retention removes the artifact; the next request produces a new job
+    path = done.file_path
+    purged = report_job_service.purge_expired(db_session, now=datetime.utcnow() + timedelta(days=30))
+    assert purged >= 1
+    assert not os.path.exists(path)
+    assert db_session.get(models.ReportJob, job.id).status == "expired"
+
+    fresh = report_job_service.enqueue(db_session, "landlord_monthly_xlsx", params, "landlord", landlord_id, submit=False)
+    assert fresh.id != job.id
+
+
+def test_report_job_validation(db_session):
+    with pytest.raises(ValueError):
+        report_job_service.enqueue(db_session, "nope", {}, submit=False)
+    with pytest.raises(ValueError):
+        report_job_service.enqueue(db_session, "landlord_monthly_csv", {"landlord_id": 1}, submit=False)
+
+
+def test_report_job_dedup_is_per_requester_and_type_insensitive(db_session):
+    landlord_id = _seed_landlord(db_session)
+    params = {"landlord_id": landlord_id, "year": 2026, "month": 7}
+
+    job = report_job_service.enqueue(db_session, "landlord_monthly_csv", params, "landlord", landlord_id, submit=False)
+    same = report_job_service.enqueue(
+        db_session, "landlord_monthly_csv",
+        {"landlord_id": str(landlord_id), "year": "2026", "month": "07"}, "landlord", landlord_id, submit=False,
+    )
+    assert same.id == job.id
+
+    # an admin asking for the same report gets a job it can read, not the landlord's
+    other = report_job_service.enqueue(db_session, "landlord_monthly_csv", params, "admin", 1, submit=False)
+    assert other.id != job.id
+    assert (other.requested_by_role, other.requested_by_id) == ("admin", 1)
+
+    with pytest.raises(ValueError):
+        report_job_service.enqueue(db_session, "landlord_monthly_csv", dict(params, month="July"), submit=False)
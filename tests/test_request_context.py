@@ -0,0 +1,55 @@
+# tests/test_request_context.py
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import app.dependencies as deps
+from app import database, models
+from app.auth import dependencies as auth_deps
+from app.auth.jwt_utils import create_access_token, decode_access_token
+from app.auth.principal_cache import principal_cache
+from app.deps import get_db as legacy_get_db
+
+
+def test_single_session_dependency():
+    assert deps.get_db is database.get_db
+    assert auth_deps.get_db is database.get_db
+    assert legacy_get_db is database.get_db
+    assert auth_deps.get_current_user is deps.get_current_user
+
+
+def test_claims_decoded_once_per_request(db_session, monkeypatch):
+    principal_cache.clear()
+    admin = models.Admin(name="Ctx Admin", email="ctx@example.com", password="x", active=True)
+    db_session.add(admin)
+    db_session.commit()
+
+    decoded = []
+
+    def _counting_decode(token):
+        decoded.append(token)
+        return decode_access_token(token)
+
+    monkeypatch.setattr(deps, "decode_access_token", _counting_decode)
+
+    app = FastAPI()
+    app.dependency_overrides[database.get_db] = lambda: db_session
+
+    @app.get("/ctx")
+    def ctx(
+        claims: dict = Depends(deps.get_claims),
+        user: dict = Depends(deps.get_current_user),
+        admin_user: dict = Depends(deps.role_required(["admin"])),
+    ):
+        return {"claims_sub": claims["sub"], "user": user["id"], "admin": admin_user["id"]}
+
+    client = TestClient(app)
+    token = create_access_token({"sub": str(admin.id), "role": "admin"})
+    res = client.get("/ctx", headers={"Authorization": f"Bearer {token}"})
+
+    assert res.status_code == 200
+    assert res.json() == {"claims_sub": str(admin.id), "user": admin.id, "admin": admin.id}
+    assert len(decoded) == 1
+
+    assert client.get("/ctx").status_code == 401
+    assert client.get("/ctx", headers={"Authorization": "Bearer nope"}).status_code == 401
+
@@ -0,0 +1,78 @@
+# tests/test_sql_monitor.py
+import logging
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import database, models
+from app.core.config import settings
+from app.core.sql_monitor import sql_monitor_middleware, statement_shape, track_queries
+
+
+def _client(db_session) -> TestClient:
+    app = FastAPI()
+    app.middleware("http")(sql_monitor_middleware)
+    app.dependency_overrides[database.get_db] = lambda: db_session
+
+    @app.get("/landlords/{n}/n-plus-one")
+    def n_plus_one(n: int, db: Session = Depends(database.get_db)):
+        ids = [row[0] for row in db.query(models.Landlord.id).limit(n).all()]
+        return [db.query(models.Landlord.name).filter(models.Landlord.id == i).scalar() for i in ids]
+
+    @app.get("/landlords")
+    def batched(db: Session = Depends(database.get_db)):
+        return [name for (name,) in db.query(models.Landlord.name).all()]
+
+    return TestClient(app)
+
+
+def _seed(db_session, n: int):
+    db_session.add_all([
+        models.Landlord(name=f"Budget {i}", phone=f"0720{i:06d}", password="x") for i in range(n)
+    ])
+    db_session.commit()
+
+
+def test_statement_shape():
+    a = statement_shape("SELECT * FROM units WHERE id IN (?, ?, ?) AND number = 'A1'")
+    b = statement_shape("SELECT *  FROM units\nWHERE id IN (?) AND number = 'B2'")
+    assert a == b == "SELECT * FROM units WHERE id IN (?) AND number = ?"
+
+
+def test_server_timing_and_strict_n_plus_one(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "SQL_BUDGET_MODE", "strict")
+    monkeypatch.setattr(settings, "SQL_REPEAT_THRESHOLD", 5)
+    _seed(db_session, 8)
+    client = _client(db_session)
+
+    ok = client.get("/landlords")
+    assert ok.status_code == 200
+    assert ok.headers["Server-Timing"].startswith("db;dur=")
+    assert 'desc="1 queries"' in ok.headers["Server-Timing"]
+
+    assert client.get("/landlords/4/n-plus-one").status_code == 200
+
+    bad = client.get("/landlords/8/n-plus-one")
+    assert bad.status_code == 500
+    assert "possible N+1" in bad.json()["problems"]
+    assert bad.json()["problems"].startswith("GET /landlords/{n}/n-plus-one")
+
+
+def test_warn_mode_logs_and_passes(db_session, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "SQL_BUDGET_MODE", "warn")
+    monkeypatch.setattr(settings, "SQL_QUERY_BUDGET", 3)
+    _seed(db_session, 5)
+
+    with caplog.at_level(logging.WARNING, logger="app.sql"):
+        res = _client(db_session).get("/landlords/5/n-plus-one")
+    assert res.status_code == 200
+    assert "6 queries (budget 3)" in caplog.text
+
+
+def test_track_queries_outside_http(db_session):
+    with track_queries() as stats:
+        db_session.query(models.Landlord).all()
+        db_session.query(models.Landlord).all()
+    assert stats.count == 2
+    assert list(stats.shapes.values()) == [2]
@@ -0,0 +1,224 @@
+# tests/test_statement_reconciliation.py
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.services import ledger_service, statement_reconciliation_service as recon
+
+HEADER = (
+    "Receipt No.,Completion Time,Initiation Time,Details,Transaction Status,"
+    "Paid In,Withdrawn,Balance,Other Party Info,A/C No.,Merchant Request ID"
+)
+
+
+@pytest.fixture(autouse=True)
+def _no_receipts(monkeypatch):
+    monkeypatch.setattr(recon, "handle_payment_success", lambda db, payment: None)
+
+
+def _line(receipt, amount, party, status="Completed", merchant_id="", withdrawn=""):
+    return f'{receipt},2026-10-01 10:00:00,2026-10-01 10:00:00,Pay Bill,{status},"{amount}",{withdrawn},,{party},,{merchant_id}'
+
+
+def _statement(*lines):
+    return io.StringIO("\n".join(["Account Holder:,Stmt Paybill", "Time Period:,Oct 2026", HEADER, *lines]) + "\n")
+
+
+def _seed(db_session):
+    landlord = models.Landlord(name="Landlord Stmt", phone="0796000000", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+    prop = models.Property(name="Statement Court", address="Nyeri", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+    units = [models.Unit(number=f"ST-{i}", rent_amount=Decimal("5000"), property_id=prop.id) for i in range(3)]
+    db_session.add_all(units)
+    db_session.flush()
+    tenants = [
+        models.Tenant(name=f"Stmt Tenant {i}", phone=phone, property_id=prop.id, unit_id=units[i].id)
+        for i, phone in enumerate(("0796000001", "+254796000002", "0796000003"))
+    ]
+    db_session.add_all(tenants)
+    db_session.flush()
+    leases = [
+        models.Lease(tenant_id=t.id, unit_id=t.unit_id, rent_amount=Decimal("5000"),
+                     start_date=date(2026, 9, 1), active=1)
+        for t in tenants[:2]
+    ]
+    db_session.add_all(leases)
+    db_session.flush()
+    for lease in leases:
+        ledger_service.sync_lease(db_session, lease)
+
+    a, b = leases
+
+    def _payment(lease, amount, **kw):
+        return models.Payment(
+            tenant_id=lease.tenant_id, unit_id=lease.unit_id, lease_id=lease.id, amount=Decimal(amount),
+            period="2026-09", payment_method="M-Pesa", created_at=datetime(2026, 9, 30, 9, 0), **kw,
+        )
+
+    db_session.add_all([
+        _payment(a, "5000", reference="RKA0000001", status=models.PaymentStatus.paid),
+        _payment(a, "1000", reference="RKA0000009", status=models.PaymentStatus.paid),
+        _payment(a, "2000", merchant_request_id="m-stmt-1", checkout_request_id="ws_CO_stmt_1",
+                 status=models.PaymentStatus.pending),
+        _payment(b, "1500", checkout_request_id="ws_CO_stmt_2", status=models.PaymentStatus.pending),
+    ])
+    db_session.commit()
+    return tenants, leases
+
+
+def _statement_lines():
+    return _statement(
+        _line("RKA0000001", "5,000.00", "254796000001 - STMT TENANT 0"),
+        _line("RKA0000002", "2000.00", "254796000001 - STMT TENANT 0", merchant_id="m-stmt-1"),
+        _line("RKA0000003", "1500.00", "254796000002 - STMT TENANT 1"),
+        _line("RKA0000004", "3000.00", "254796000001 - STMT TENANT 0"),
+        _line("RKA0000005", "100.00", "254700999999 - STRANGER"),
+        _line("RKA0000006", "999.00", "2547******678 - MASKED"),
+        _line("RKA0000001", "5,000.00", "254796000001 - STMT TENANT 0"),
+        _line("RKA0000007", "4000.00", "254796000003 - STMT TENANT 2"),
+        _line("RKA0000009", "1200.00", "254796000001 - STMT TENANT 0"),
+        _line("RKA0000010", "100.00", "254796000001 - X", status="Failed"),
+        _line("RKA0000011", "", "Business Charge", withdrawn="50.00"),
+    )
+
+
+def test_statement_lines_are_classified(db_session):
+    _, (a, b) = _seed(db_session)
+
+    result = recon.reconcile_statement(db_session, _statement_lines(), apply=False)
+
+    matched = {i["receipt"]: i for i in result["matched"]}
+    assert matched["RKA0000001"]["action"] == "none"
+    assert matched["RKA0000001"]["reason"] == "already_recorded"
+    assert matched["RKA0000002"]["action"] == "confirm"
+    assert matched["RKA0000003"]["action"] == "confirm"
+    assert matched["RKA0000003"]["lease_id"] == b.id
+    assert matched["RKA0000004"]["action"] == "create"
+    assert matched["RKA0000004"]["lease_id"] == a.id
+    assert matched["RKA0000004"]["periods"][0] == "2026-09"
+
+    assert {i["receipt"]: i["reason"] for i in result["unmatched"]} == {
+        "RKA0000005": "unknown_phone",
+        "RKA0000006": "no_reference_or_phone_match",
+    }
+    assert sorted((i["receipt"], i["reason"]) for i in result["discrepancies"]) == [
+        ("RKA0000001", "duplicate_receipt"),
+        ("RKA0000007", "no_active_lease"),
+        ("RKA0000009", "amount_mismatch"),
+    ]
+    assert result["summary"]["skipped"] == 2
+    assert result["summary"]["to_apply"] == 3
+    assert result["applied"] is None
+
+    # dry run writes nothing
+    assert db_session.query(models.Payment).filter(models.Payment.reference == "RKA0000004").count() == 0
+    assert db_session.query(models.Payment).filter(
+        models.Payment.status == models.PaymentStatus.pending
+    ).count() == 2
+
+
+def test_apply_allocates_in_chunks_and_is_repeatable(db_session):
+    _, (a, _) = _seed(db_session)
+
+    result = recon.reconcile_statement(db_session, _statement_lines(), apply=False)
+    counts = recon.apply_matches(db_session, result["matched"], chunk_size=2)
+    assert counts == {"confirmed": 2, "created": 1, "skipped": 0, "error": 0}
+
+    confirmed = db_session.query(models.Payment).filter(models.Payment.checkout_request_id == "ws_CO_stmt_1").one()
+    assert confirmed.status == models.PaymentStatus.paid
+    assert confirmed.reference == "RKA0000002"
+    assert confirmed.paid_date == date(2026, 10, 1)
+
+    created = db_session.query(models.Payment).filter(models.Payment.reference == "RKA0000004").one()
+    assert created.lease_id == a.id
+    assert created.status == models.PaymentStatus.paid
+    assert sum(al.amount_applied for al in created.allocations) == Decimal("3000")
+    assert db_session.query(models.LeasePeriodLedger.status).filter(
+        models.LeasePeriodLedger.lease_id == a.id, models.LeasePeriodLedger.period == "2026-09",
+    ).scalar() == "paid"
+
+    # the same statement again: everything is already recorded
+    again = recon.reconcile_statement(db_session, _statement_lines(), apply=True)
+    assert again["summary"]["to_apply"] == 0
+    assert again["applied"] == {"confirmed": 0, "created": 0, "skipped": 0, "error": 0}
+    assert {i["reason"] for i in again["matched"]} == {"already_recorded"}
+
+
+def test_settled_meanwhile_is_skipped(db_session):
+    _seed(db_session)
+    result = recon.reconcile_statement(db_session, _statement(
+        _line("RKA0000002", "2000.00", "254796000001 - STMT TENANT 0", merchant_id="m-stmt-1"),
+    ))
+    # a late callback settles the payment between matching and applying
+    payment = db_session.query(models.Payment).filter(models.Payment.merchant_request_id == "m-stmt-1").one()
+    payment.status = models.PaymentStatus.paid
+    db_session.commit()
+
+    assert recon.apply_matches(db_session, result["matched"]) == {
+        "confirmed": 0, "created": 0, "skipped": 1, "error": 0,
+    }
+
+
+def test_lookups_are_per_batch_not_per_line(db_session, query_counter):
+    _seed(db_session)
+
+    def _queries(n):
+        lines = [_line(f"RKB{i:07d}", "10.00", "254796000001 - STMT TENANT 0") for i in range(n)]
+        query_counter.clear()
+        result = recon.match_statement(db_session, _statement(*lines), batch_size=1000)
+        assert len(result["matched"]) == n
+        return len(query_counter)
+
+    assert _queries(20) == _queries(400)
+
+
+def test_statement_without_header_is_rejected(db_session):
+    with pytest.raises(ValueError):
+        recon.match_statement(db_session, io.StringIO("a,b,c\n1,2,3\n"))
+
+
+def test_receipt_db_failure_does_not_stop_the_apply(engine, monkeypatch):
+    # the failing receipt rolls the session back, so use a real (committing) session
+    db = sessionmaker(bind=engine)()
+    receipts = []
+
+    def _receipt(session, payment):
+        receipts.append(payment.id)
+        if len(receipts) == 1:
+            session.add(models.Notification(user_id=None, user_type="tenant", title="x", message="x"))
+            session.commit()  # IntegrityError: the session now needs a rollback
+
+    monkeypatch.setattr(recon, "handle_payment_success", _receipt)
+    tenants, leases = _seed(db)
+    try:
+        result = recon.reconcile_statement(db, _statement_lines(), apply=False)
+        counts = recon.apply_matches(db, result["matched"], chunk_size=1)
+        assert counts == {"confirmed": 2, "created": 1, "skipped": 0, "error": 0}
+        assert len(receipts) == 3
+        assert db.query(models.Payment).filter(models.Payment.reference == "RKA0000004").count() == 1
+    finally:
+        db.rollback()
+        lease_ids = [l.id for l in leases]
+        payment_ids = [p for (p,) in db.query(models.Payment.id).filter(models.Payment.lease_id.in_(lease_ids))]
+        for model, column, ids in (
+            (models.PaymentAllocation, models.PaymentAllocation.payment_id, payment_ids),
+            (models.Payment, models.Payment.id, payment_ids),
+            (models.LeasePeriodLedger, models.LeasePeriodLedger.lease_id, lease_ids),
+            (models.Lease, models.Lease.id, lease_ids),
+        ):
+            db.query(model).filter(column.in_(ids)).delete(synchronize_session=False)
+        prop = tenants[0].property_id
+        landlord = db.query(models.Property.landlord_id).filter(models.Property.id == prop).scalar()
+        db.query(models.Tenant).filter(models.Tenant.property_id == prop).delete(synchronize_session=False)
+        db.query(models.Unit).filter(models.Unit.property_id == prop).delete(synchronize_session=False)
+        db.query(models.Property).filter(models.Property.id == prop).delete(synchronize_session=False)
+        db.query(models.Landlord).filter(models.Landlord.id == landlord).delete(synchronize_session=False)
+        db.commit()
+        db.close()
@@ -0,0 +1,133 @@
+# tests/test_stk_reconciler.py
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app import models
+from app.core.config import settings
+from app.routers import payment_router
+from app.services import ledger_service, stk_reconciler_service, webhook_inbox_service
+from app.services.daraja_service import DarajaClient
+from daraja_stub import DarajaStub
+
+
+@pytest.fixture(autouse=True)
+def _inline(monkeypatch):
+    monkeypatch.setattr(webhook_inbox_service, "_executor", None)
+    webhook_inbox_service.seen_events.clear()
+    monkeypatch.setattr(payment_router, "handle_payment_success", lambda db, payment: None)
+
+
+def _seed(db_session, n: int):
+    landlord = models.Landlord(name="Landlord Recon", phone="0795000000", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+    prop = models.Property(name="Recon Plaza", address="Nanyuki", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+    unit = models.Unit(number="RC-1", rent_amount=Decimal("5000"), property_id=prop.id)
+    db_session.add(unit)
+    db_session.flush()
+    tenant = models.Tenant(name="Recon Tenant", phone="0795000001", property_id=prop.id, unit_id=unit.id)
+    db_session.add(tenant)
+    db_session.flush()
+    lease = models.Lease(
+        tenant_id=tenant.id, unit_id=unit.id, rent_amount=Decimal("5000"),
+        start_date=date(2026, 1, 1), active=1,
+    )
+    db_session.add(lease)
+    db_session.flush()
+    ledger_service.sync_lease(db_session, lease)
+
+    stale = datetime.utcnow() - timedelta(minutes=30)
+    payments = [
+        models.Payment(
+            tenant_id=tenant.id, unit_id=unit.id, lease_id=lease.id, amount=Decimal("500"),
+            period="2026-01", status=models.PaymentStatus.pending, payment_method="M-Pesa",
+            checkout_request_id=f"ws_CO_recon_{i}", merchant_request_id=f"m-recon-{i}", created_at=stale,
+        )
+        for i in range(n)
+    ]
+    # too recent: the real callback may still arrive
+    payments.append(models.Payment(
+        tenant_id=tenant.id, unit_id=unit.id, lease_id=lease.id, amount=Decimal("500"),
+        period="2026-01", status=models.PaymentStatus.pending, checkout_request_id="ws_CO_recon_new",
+        created_at=datetime.utcnow(),
+    ))
+    db_session.add_all(payments)
+    db_session.commit()
+    return lease
+
+
+def _status(db_session, checkout_id):
+    return (
+        db_session.query(models.Payment.status)
+        .filter(models.Payment.checkout_request_id == checkout_id)
+        .scalar()
+    )
+
+
+def test_reconciler_applies_results_rate_limited(db_session, monkeypatch):
+    monkeypatch.setattr(settings, "STK_RECONCILE_CONCURRENCY", 3)
+    monkeypatch.setattr(settings, "STK_RECONCILE_RATE_PER_SECOND", 20.0)
+    lease = _seed(db_session, 10)
+
+    with DarajaStub(latency=0.05) as stub:
+        for i in range(10):
+            if i < 6:
+                stub.stk_results[f"ws_CO_recon_{i}"] = (0, "The service request is processed successfully.")
+            elif i < 8:
+                stub.stk_results[f"ws_CO_recon_{i}"] = (1032, "Request cancelled by user")
+            # 8, 9: customer has not answered yet
+        summary = stk_reconciler_service.reconcile(db_session, client=DarajaClient(base_url=stub.url))
+
+    assert {k: summary[k] for k in ("backlog", "queried", "paid", "failed", "pending", "error", "remaining")} == {
+        "backlog": 10, "queried": 10, "paid": 6, "failed": 2, "pending": 2, "error": 0, "remaining": 2,
+    }
+    assert stub.hits["/mpesa/stkpushquery/v1/query"] == 10
+    assert stub.max_in_flight <= 3
+    assert summary["seconds"] >= 9 / 20  # paced at 20 queries per second
+    assert summary["throughput_per_second"] <= 21
+
+    assert _status(db_session, "ws_CO_recon_0") == models.PaymentStatus.paid
+    assert _status(db_session, "ws_CO_recon_6") == models.PaymentStatus.failed
+    assert _status(db_session, "ws_CO_recon_8") == models.PaymentStatus.pending
+    assert _status(db_session, "ws_CO_recon_new") == models.PaymentStatus.pending
+    # applied through allocate_payment, like a real callback
+    allocated = (
+        db_session.query(models.PaymentAllocation)
+        .filter(models.PaymentAllocation.lease_id == lease.id)
+        .count()
+    )
+    assert allocated == 6
+    assert stk_reconciler_service.last_run["remaining"] == 2
+
+
+def test_reconciled_payments_are_not_queried_again(db_session):
+    _seed(db_session, 1)
+    with DarajaStub() as stub:
+        stub.stk_results["ws_CO_recon_0"] = (0, "ok")
+        client = DarajaClient(base_url=stub.url)
+        assert stk_reconciler_service.reconcile(db_session, client=client)["paid"] == 1
+        # next run: nothing left to query
+        assert stk_reconciler_service.reconcile(db_session, client=client)["queried"] == 0
+    assert stub.hits["/mpesa/stkpushquery/v1/query"] == 1
+
+
+def test_payment_whose_callback_was_consumed_early_is_resolved(db_session):
+    _seed(db_session, 1)
+    # the real callback arrived before the payment row existed and its event ended "done"
+    now = datetime.utcnow()
+    db_session.add(models.WebhookInbox(
+        source="daraja", event_key="ws_CO_recon_0", payload_json="{}", status="done",
+        attempts=1, next_attempt_at=now, received_at=now, processed_at=now,
+    ))
+    db_session.commit()
+
+    with DarajaStub() as stub:
+        stub.stk_results["ws_CO_recon_0"] = (0, "ok")
+        summary = stk_reconciler_service.reconcile(db_session, client=DarajaClient(base_url=stub.url))
+
+    assert (summary["paid"], summary["error"], summary["remaining"]) == (1, 0, 0)
+    assert _status(db_session, "ws_CO_recon_0") == models.PaymentStatus.paid
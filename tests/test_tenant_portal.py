@@ -0,0 +1,159 @@
+# tests/test_tenant_portal.py
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import joinedload
+
+from app import models
+from app.routers.tenant_portal_router import _tenant_principal, tenant_maintenance, tenant_overview
+from app.services import ledger_service
+from app.services.payment_allocation_service import allocate_payment
+
+
+def _seed_tenant(db_session, tag: str, history: int):
+    landlord = models.Landlord(name=f"Landlord {tag}", phone=f"07{tag}66666", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+    prop = models.Property(name=f"Portal {tag}", address="Machakos", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+    units = [models.Unit(number=f"{tag}-{i}", rent_amount=Decimal("4000"), property_id=prop.id) for i in range(history + 1)]
+    db_session.add_all(units)
+    db_session.flush()
+    tenant = models.Tenant(name=f"Portal {tag}", phone=f"07{tag}77777", property_id=prop.id, unit_id=units[-1].id)
+    db_session.add(tenant)
+    db_session.flush()
+
+    # `history` ended leases followed by one active lease
+    for i, unit in enumerate(units):
+        active = i == history
+        lease = models.Lease(
+            tenant_id=tenant.id, unit_id=unit.id, rent_amount=Decimal("4000"),
+            start_date=date(2025, 1 + i, 1),
+            end_date=None if active else date(2025, 2 + i, 28),
+            active=1 if active else 0,
+        )
+        db_session.add(lease)
+        db_session.flush()
+        ledger_service.sync_lease(db_session, lease)
+
+        payment = models.Payment(
+            tenant_id=tenant.id, unit_id=unit.id, lease_id=lease.id, amount=Decimal("6000"),
+            period=f"2025-{1 + i:02d}", status=models.PaymentStatus.paid,
+        )
+        db_session.add(payment)
+        db_session.flush()
+        allocate_payment(
+            db_session, payment=payment, lease=lease,
+            periods=[f"2025-{1 + i:02d}", f"2025-{2 + i:02d}"],
+        )
+
+    db_session.commit()
+    return tenant.id
+
+
+def _load_tenant(db_session, tenant_id):
+    return _tenant_principal(db_session, tenant_id)
+
+
+def _rows_fetched(db_session, statements) -> int:
+    # re-run captured SELECTs to measure how many rows each one returned
+    conn = db_session.connection()
+    return sum(
+        len(conn.exec_driver_sql(sql, params).fetchall())
+        for sql, params in statements
+        if sql.lstrip().upper().startswith("SELECT")
+    )
+
+
+def test_planner_matches_allocations(db_session):
+    tenant_id = _seed_tenant(db_session, "81", history=2)
+    out = tenant_overview(current=_load_tenant(db_session, tenant_id), db=db_session)
+
+    assert len(out["rentals"]) == 1
+    assert len(out["history"]) == 2
+
+    for rental in out["rentals"] + out["history"]:
+        for row in rental["planner"]["rows"]:
+            expected = (
+                db_session.query(func.coalesce(func.sum(models.PaymentAllocation.amount_applied), 0))
+                .filter(models.PaymentAllocation.lease_id == rental["lease_id"])
+                .filter(models.PaymentAllocation.period == row["period"])
+                .scalar()
+            )
+            assert row["received"] == float(expected)
+
+    first = out["rentals"][0]["planner"]["rows"]
+    assert (first[0]["received"], first[0]["status"]) == (4000.0, "paid")
+    assert (first[1]["received"], first[1]["status"]) == (2000.0, "partial")
+
+
+def test_overview_query_count_is_flat(db_session, query_counter):
+    few_id = _seed_tenant(db_session, "82", history=0)
+    many_id = _seed_tenant(db_session, "83", history=8)
+    few, many = _load_tenant(db_session, few_id), _load_tenant(db_session, many_id)
+
+    query_counter.clear()
+    tenant_overview(current=few, db=db_session)
+    few_count = len(query_counter)
+
+    query_counter.clear()
+    out = tenant_overview(current=many, db=db_session)
+    many_count = len(query_counter)
+
+    assert len(out["history"]) == 8
+    assert few_count == many_count == 2
+
+
+def test_lean_principal_row_volume(db_session, engine):
+    tenant_id = _seed_tenant(db_session, "84", history=5)
+    status = models.MaintenanceStatus(name="open")
+    db_session.add(status)
+    db_session.flush()
+    tenant = db_session.get(models.Tenant, tenant_id)
+    for i in range(6):
+        db_session.add(models.MaintenanceRequest(
+            tenant_id=tenant_id, unit_id=tenant.unit_id, description=f"Leak {i}", status_id=status.id,
+        ))
+    db_session.commit()
+
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    def _measure(fn) -> int:
+        db_session.expunge_all()
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", _capture)
+        try:
+            fn()
+        finally:
+            event.remove(engine, "before_cursor_execute", _capture)
+        captured = list(statements)
+        return _rows_fetched(db_session, captured)
+
+    # previous principal: every lease/payment/maintenance row joined together
+    def _eager_principal():
+        (
+            db_session.query(models.Tenant)
+            .options(
+                joinedload(models.Tenant.leases).joinedload(models.Lease.unit).joinedload(models.Unit.property),
+                joinedload(models.Tenant.payments),
+                joinedload(models.Tenant.maintenance_requests).joinedload(models.MaintenanceRequest.status),
+            )
+            .filter(models.Tenant.id == tenant_id)
+            .first()
+        )
+
+    eager_rows = _measure(_eager_principal)
+    lean_rows = _measure(lambda: _tenant_principal(db_session, tenant_id))
+    maintenance_rows = _measure(
+        lambda: tenant_maintenance(current=_tenant_principal(db_session, tenant_id), db=db_session)
+    )
+
+    # 6 leases x 6 payments x 6 requests before; one row for the lean principal
+    assert eager_rows == 6 * 6 * 6
+    assert lean_rows == 1
+    assert maintenance_rows == 1 + 6
@@ -0,0 +1,83 @@
+# tests/test_trends.py
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app import models
+from app.reports import trends
+from app.services import ledger_service
+from app.services.payment_allocation_service import allocate_payment
+
+
+def _seed(db_session):
+    landlord = models.Landlord(name="Landlord Trend", phone="0791000000", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+    prop = models.Property(name="Trend Towers", address="Nyeri", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+
+    leases = []
+    for i in range(2):
+        unit = models.Unit(number=f"TR-{i}", rent_amount=Decimal("5000"), property_id=prop.id)
+        db_session.add(unit)
+        db_session.flush()
+        tenant = models.Tenant(name=f"Trend {i}", phone=f"079100000{i + 1}", property_id=prop.id, unit_id=unit.id)
+        db_session.add(tenant)
+        db_session.flush()
+        lease = models.Lease(
+            tenant_id=tenant.id, unit_id=unit.id, start_date=date(2026, 1, 1),
+            rent_amount=Decimal("5000"), active=1,
+        )
+        db_session.add(lease)
+        db_session.flush()
+        ledger_service.sync_lease(db_session, lease)
+        leases.append(lease)
+
+    def pay(lease, amount, periods):
+        payment = models.Payment(
+            tenant_id=lease.tenant_id, unit_id=lease.unit_id, lease_id=lease.id,
+            amount=Decimal(amount), period=periods[0], status=models.PaymentStatus.paid,
+        )
+        db_session.add(payment)
+        db_session.flush()
+        allocate_payment(db_session, payment=payment, lease=lease, periods=periods)
+
+    pay(leases[0], "10000", ["2026-01", "2026-02"])
+    pay(leases[1], "5000", ["2026-01"])
+    pay(leases[1], "2000", ["2026-02"])
+    db_session.commit()
+    return landlord.id, prop.id
+
+
+def test_landlord_trend_series(db_session, query_counter):
+    landlord_id, prop_id = _seed(db_session)
+
+    query_counter.clear()
+    out = trends.landlord_trend(db_session, landlord_id, "2025-12", "2026-03")
+    assert len(query_counter) == 1
+
+    by_period = {r["period"]: r for r in out["series"]}
+    assert list(by_period) == ["2025-12", "2026-01", "2026-02", "2026-03"]
+    assert by_period["2025-12"] == {
+        "period": "2025-12", "expected": 0.0, "received": 0.0, "arrears": 0.0,
+        "collection_rate": 0.0, "cumulative_arrears": 0.0,
+    }
+    assert by_period["2026-01"]["received"] == 10000.0
+    assert by_period["2026-01"]["collection_rate"] == 1.0
+    assert by_period["2026-02"]["arrears"] == 3000.0
+    assert by_period["2026-03"]["arrears"] == 10000.0
+    assert by_period["2026-03"]["cumulative_arrears"] == 13000.0
+    assert out["totals"]["expected"] == 30000.0
+
+    assert trends.property_trend(db_session, prop_id, "2026-01", "2026-03")["totals"] == out["totals"]
+
+
+def test_trend_range_validation(db_session):
+    with pytest.raises(ValueError):
+        trends.landlord_trend(db_session, 1, "2026-05", "2026-01")
+    with pytest.raises(ValueError):
+        trends.landlord_trend(db_session, 1, "2020-01", "2026-01")
+    with pytest.raises(ValueError):
+        trends.landlord_trend(db_session, 1, "2026-13", "2026-14")
@@ -0,0 +1,176 @@
+# tests/test_webhook_inbox.py
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app import database, models
+from app.core.config import settings
+from app.routers import payment_router
+from app.services import ledger_service, webhook_inbox_service
+
+
+@pytest.fixture(autouse=True)
+def _no_workers(monkeypatch):
+    # process inline in the tests instead of on the worker pool
+    monkeypatch.setattr(webhook_inbox_service, "_executor", None)
+    webhook_inbox_service.seen_events.clear()
+    # receipt PDFs and notifications are not under test here
+    monkeypatch.setattr(payment_router, "handle_payment_success", lambda db, payment: None)
+
+
+def _callback(checkout_id: str, amount: float = 7000) -> dict:
+    return {"Body": {"stkCallback": {
+        "MerchantRequestID": "m-inbox", "CheckoutRequestID": checkout_id,
+        "ResultCode": 0, "ResultDesc": "ok",
+        "CallbackMetadata": {"Item": [
+            {"Name": "Amount", "Value": amount},
+            {"Name": "MpesaReceiptNumber", "Value": "RKT000INBOX"},
+        ]},
+    }}}
+
+
+def _pending_payment(db_session, checkout_id: str) -> models.Payment:
+    landlord = models.Landlord(name="Landlord Inbox", phone="0793000000", password="x")
+    db_session.add(landlord)
+    db_session.flush()
+    prop = models.Property(name="Inbox House", address="Kitale", landlord_id=landlord.id)
+    db_session.add(prop)
+    db_session.flush()
+    unit = models.Unit(number="IN-1", rent_amount=Decimal("7000"), property_id=prop.id)
+    db_session.add(unit)
+    db_session.flush()
+    tenant = models.Tenant(name="Inbox Tenant", phone="0793000001", property_id=prop.id, unit_id=unit.id)
+    db_session.add(tenant)
+    db_session.flush()
+    lease = models.Lease(
+        tenant_id=tenant.id, unit_id=unit.id, rent_amount=Decimal("7000"),
+        start_date=date(2026, 1, 1), active=1,
+    )
+    db_session.add(lease)
+    db_session.flush()
+    ledger_service.sync_lease(db_session, lease)
+    payment = models.Payment(
+        tenant_id=tenant.id, unit_id=unit.id, lease_id=lease.id, amount=Decimal("7000"),
+        period="2026-01", status=models.PaymentStatus.pending, checkout_request_id=checkout_id,
+    )
+    db_session.add(payment)
+    db_session.commit()
+    return payment
+
+
+def test_callback_is_one_insert_and_processed_by_worker(db_session, query_counter):
+    payment = _pending_payment(db_session, "ws_CO_inbox_1")
+    app = FastAPI()
+    app.include_router(payment_router.router)
+    app.dependency_overrides[database.get_db] = lambda: db_session
+    client = TestClient(app)
+
+    query_counter.clear()
+    first = client.post("/payments/webhooks/daraja", json=_callback("ws_CO_inbox_1"))
+    assert first.json()["ResultDesc"] == "Accepted"
+    assert [s.split()[0] for s in query_counter] == ["INSERT"]
+    assert db_session.get(models.Payment, payment.id).status == models.PaymentStatus.pending
+
+    # a provider retry of the same CheckoutRequestID is acknowledged, not stored again
+    dup = client.post("/payments/webhooks/daraja", json=_callback("ws_CO_inbox_1"))
+    assert dup.json()["ResultDesc"] == "Duplicate callback ignored"
+    assert dup.json()["event_id"] == first.json()["event_id"]
+    assert db_session.query(models.WebhookInbox).count() == 1
+
+    assert webhook_inbox_service.drain_due(db_session) == 1
+    event = db_session.get(models.WebhookInbox, first.json()["event_id"])
+    assert (event.status, event.attempts) == ("done", 1)
+    paid = db_session.get(models.Payment, payment.id)
+    assert paid.status == models.PaymentStatus.paid
+    assert paid.reference == "RKT000INBOX"
+
+    # replay is idempotent: the payment is already paid
+    webhook_inbox_service.replay(db_session, event.id, dispatch=False)
+    event = webhook_inbox_service.process_event(db_session, event.id)
+    assert event.status == "done"
+    assert '"Payment already processed"' in event.result_json
+
+
+def test_retry_backoff_dead_and_replay(engine, monkeypatch):
+    monkeypatch.setattr(settings, "WEBHOOK_INBOX_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "WEBHOOK_INBOX_RETRY_BASE_SECONDS", 10)
+    calls = []
+
+    def flaky(db, payload):
+        calls.append(payload["n"])
+        if len(calls) < 4:
+            raise RuntimeError("downstream unavailable")
+        return {"ok": True}
+
+    monkeypatch.setitem(webhook_inbox_service.HANDLERS, "test", flaky)
+    # handler failures roll the session back, so use a real (committing) session
+    db = sessionmaker(bind=engine)()
+    try:
+        event_id, created = webhook_inbox_service.record(db, "test", {"n": 1}, dispatch=False)
+        assert created
+        now = datetime.utcnow()
+
+        event = webhook_inbox_service.process_event(db, event_id, now)
+        assert (event.status, event.attempts) == ("retry", 1)
+        assert event.next_attempt_at == now + timedelta(seconds=10)
+        assert "downstream unavailable" in event.last_error
+
+        # not due yet: nothing runs
+        assert webhook_inbox_service.process_event(db, event_id, now).attempts == 1
+        assert webhook_inbox_service.due_event_ids(db, now) == []
+
+        now += timedelta(seconds=10)
+        event = webhook_inbox_service.process_event(db, event_id, now)
+        assert event.next_attempt_at == now + timedelta(seconds=20)
+
+        event = webhook_inbox_service.process_event(db, event_id, now + timedelta(seconds=20))
+        assert (event.status, event.attempts) == ("dead", 3)
+        assert webhook_inbox_service.due_event_ids(db, now + timedelta(days=1)) == []
+
+        webhook_inbox_service.replay(db, event_id, dispatch=False)
+        event = webhook_inbox_service.process_event(db, event_id)
+        assert (event.status, event.attempts, event.last_error) == ("done", 1, None)
+        assert len(calls) == 4
+    finally:
+        db.query(models.WebhookInbox).delete()
+        db.commit()
+        db.close()
+
+
+def test_callback_before_payment_commit_is_retried(engine):
+    # handler failures roll the session back, so use a real (committing) session
+    db = sessionmaker(bind=engine)()
+    payment = None
+    try:
+        event_id, _ = webhook_inbox_service.record(db, "daraja", _callback("ws_CO_inbox_early"), dispatch=False)
+        now = datetime.utcnow()
+
+        # the callback beat _initiate_mpesa's commit: no payment yet
+        event = webhook_inbox_service.process_event(db, event_id, now)
+        assert (event.status, event.attempts) == ("retry", 1)
+        assert "ws_CO_inbox_early" in event.last_error
+
+        payment = _pending_payment(db, "ws_CO_inbox_early")
+        event = webhook_inbox_service.process_event(db, event_id, now + timedelta(hours=1))
+        assert event.status == "done"
+        assert db.get(models.Payment, payment.id).status == models.PaymentStatus.paid
+    finally:
+        db.rollback()
+        db.query(models.WebhookInbox).delete()
+        if payment is not None:
+            lease = db.get(models.Lease, payment.lease_id)
+            unit = db.get(models.Unit, payment.unit_id)
+            prop = db.get(models.Property, unit.property_id)
+            db.query(models.PaymentAllocation).filter(models.PaymentAllocation.lease_id == lease.id).delete()
+            db.query(models.LeasePeriodLedger).filter(models.LeasePeriodLedger.lease_id == lease.id).delete()
+            db.query(models.Payment).filter(models.Payment.lease_id == lease.id).delete()
+            for obj in (lease, db.get(models.Tenant, payment.tenant_id), unit, prop,
+                        db.get(models.Landlord, prop.landlord_id)):
+                db.delete(obj)
+                db.flush()
+        db.commit()
+        db.close()